@@ -0,0 +1,350 @@
+"""
+Measures every stage of the text detection and the end-to-end TextDetection.run on
+the bundled ONNX model with synthetic frames and probability maps at several
+resolutions and text densities, writes the results as JSON and compares them with
+a stored baseline.
+
+Run from the samplemodule folder:
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --tolerance 0.1 --resolutions 720p,1080p
+    python -m benchmarks.bench_pipeline --update-baseline
+
+The exit code is 1 when a case is slower than the baseline by more than the
+tolerance. Baselines are only comparable on the machine they were recorded on.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from benchmarks.synthetic import (
+    RESOLUTIONS,
+    TEXT_DENSITIES,
+    make_frame,
+    make_probability_map,
+)
+from src.edgeinferencing.config import EdgeModelConfig
+from src.edgeinferencing.edge_model import TextDetection
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+LOCAL_DATA_DIR = os.path.normpath(os.path.join(BENCHMARKS_DIR, "..", "local_data"))
+MODEL_PATH = os.path.join(LOCAL_DATA_DIR, "ch_pp_inf_dynamic.onnx")
+ENGINE_PATH = os.path.join(LOCAL_DATA_DIR, "ch_pp_inf_dynamic_fp16.engine")
+DEFAULT_BASELINE = os.path.join(BENCHMARKS_DIR, "baseline.json")
+DEFAULT_OUTPUT = os.path.join(BENCHMARKS_DIR, "results.json")
+# statistic the regression check compares
+COMPARED_STATISTIC = "median_ms"
+# cheap cases are repeated until they ran this long, so their median is stable
+MIN_DURATION_S = 0.5
+MAX_ITERATIONS = 1000
+
+
+def measure(
+    fn: Callable[[], object],
+    iterations: int,
+    warmup: int = 2,
+    min_duration: float = MIN_DURATION_S,
+) -> Dict[str, float]:
+    """
+    Time fn after a few untimed warm-up calls, at least iterations times and until
+    the timed calls took min_duration seconds.
+
+    @param
+        fn (Callable): function to time
+        iterations (int): minimum number of timed calls
+        warmup (int): number of untimed calls first
+        min_duration (float): minimum total duration of the timed calls in seconds
+    @return
+        Dict[str, float]: median, p95, mean and min latency in milliseconds
+    """
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    total_ms = 0.0
+    while len(latencies) < max(1, iterations) or (
+        total_ms < min_duration * 1000.0 and len(latencies) < MAX_ITERATIONS
+    ):
+        start_time = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start_time) * 1000.0)
+        total_ms += latencies[-1]
+    return {
+        "median_ms": float(np.median(latencies)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "mean_ms": float(np.mean(latencies)),
+        "min_ms": float(np.min(latencies)),
+        "iterations": len(latencies),
+    }
+
+
+def create_text_detection(backend: str) -> TextDetection:
+    """
+    TextDetection with the configuration main.py uses, on the given backend.
+
+    @param
+        backend (str): name of the inference backend
+    @return
+        TextDetection: initialized text detection
+    """
+    config = EdgeModelConfig(MODEL_PATH, ENGINE_PATH)
+    config.backend = backend
+    text_detection = TextDetection(config)
+    text_detection.initialize()
+    return text_detection
+
+
+def run_benchmarks(
+    text_detection: TextDetection,
+    resolutions: List[str],
+    densities: List[str],
+    iterations: int,
+    warmup: int = 2,
+    min_duration: float = MIN_DURATION_S,
+) -> Dict[str, Dict[str, float]]:
+    """
+    Measure the pre-processing operators, inference, post-processing and the end to
+    end run for every resolution and text density.
+
+    @param
+        text_detection (TextDetection): initialized text detection
+        resolutions (List[str]): keys of RESOLUTIONS
+        densities (List[str]): keys of TEXT_DENSITIES
+        iterations (int): minimum number of timed calls per case
+        warmup (int): number of untimed calls per case
+        min_duration (float): minimum total duration of the timed calls of a case
+    @return
+        Dict[str, Dict[str, float]]: statistics per case, "stage/resolution[/density]"
+    """
+    results = {}
+
+    def add(case: str, fn: Callable[[], object]) -> None:
+        results[case] = measure(fn, iterations, warmup, min_duration)
+        print(f"{case:<48}{results[case]['median_ms']:>10.2f} ms")
+
+    for resolution in resolutions:
+        height, width = RESOLUTIONS[resolution]
+        frame = make_frame(height, width, TEXT_DENSITIES["sparse"])
+        data = {"image": frame}
+        for op in text_detection.pre_processors:
+            # every operator is timed on the output of the operators before it
+            op_input = data
+            add(
+                f"preprocess.{type(op).__name__}/{resolution}",
+                lambda: op(dict(op_input)),
+            )
+            data = op(dict(op_input))
+        img, shape_list = text_detection.preprocess(frame)
+        add(f"inference/{resolution}", lambda: text_detection.infer(img))
+        for density in densities:
+            prob = make_probability_map(img.shape[2], img.shape[3], TEXT_DENSITIES[density])
+            add(
+                f"postprocess/{resolution}/{density}",
+                lambda: text_detection.postprocess(prob, shape_list),
+            )
+        for density in densities:
+            frame = make_frame(height, width, TEXT_DENSITIES[density])
+            add(f"end_to_end/{resolution}/{density}", lambda: text_detection.run(frame))
+    return results
+
+
+def machine_info(backend: str) -> Dict[str, str]:
+    """
+    Description of the machine and libraries the results were measured with.
+
+    @param
+        backend (str): name of the inference backend
+    @return
+        Dict[str, str]: machine, processor, CPU count and library versions
+    """
+    info = {
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": str(os.cpu_count()),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "backend": backend,
+    }
+    if backend == "onnxruntime":
+        import onnxruntime
+
+        info["onnxruntime"] = onnxruntime.__version__
+    return info
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float,
+    min_delta_ms: float = 0.1,
+) -> List[Dict]:
+    """
+    Compare results with a baseline case by case. A case only regresses or improves
+    when it changed by more than the tolerance and by more than min_delta_ms, which
+    keeps cases of a few microseconds from failing on timer noise.
+
+    @param
+        results (Dict): statistics per case of the current run
+        baseline (Dict): statistics per case of the baseline
+        tolerance (float): allowed slowdown relative to the baseline, 0.2 is 20 %
+        min_delta_ms (float): smallest change in milliseconds that is reported
+    @return
+        List[Dict]: case, baseline and current value, relative change and a status
+            of "ok", "improved", "regression" or "new"
+    """
+    rows = []
+    for case, values in results.items():
+        current = values[COMPARED_STATISTIC]
+        if case not in baseline:
+            rows.append(
+                {"case": case, "baseline": None, "current": current, "change": None, "status": "new"}
+            )
+            continue
+        reference = baseline[case][COMPARED_STATISTIC]
+        change = (current - reference) / reference if reference > 0 else 0.0
+        if abs(current - reference) <= min_delta_ms:
+            status = "ok"
+        elif change > tolerance:
+            status = "regression"
+        elif change < -tolerance:
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append(
+            {
+                "case": case,
+                "baseline": reference,
+                "current": current,
+                "change": change,
+                "status": status,
+            }
+        )
+    return rows
+
+
+def print_comparison(rows: List[Dict]) -> None:
+    """
+    Print the comparison as a table.
+
+    @param
+        rows (List[Dict]): rows returned by compare
+    """
+    print(f"{'case':<48}{'baseline ms':>14}{'current ms':>14}{'change':>10}  status")
+    for row in rows:
+        baseline = "-" if row["baseline"] is None else f"{row['baseline']:.2f}"
+        change = "-" if row["change"] is None else f"{row['change'] * 100:+.1f}%"
+        print(
+            f"{row['case']:<48}{baseline:>14}{row['current']:>14.2f}{change:>10}  {row['status']}"
+        )
+
+
+def load_results(path: str) -> Dict:
+    """
+    Load a results or baseline file.
+
+    @param
+        path (str): path to the JSON file
+    @return
+        Dict: {"machine", "iterations", "results"}
+    """
+    with open(path) as results_file:
+        return json.load(results_file)
+
+
+def save_results(path: str, document: Dict) -> None:
+    """
+    Write a results or baseline file.
+
+    @param
+        path (str): path to the JSON file
+        document (Dict): {"machine", "iterations", "results"}
+    """
+    with open(path, "w") as results_file:
+        json.dump(document, results_file, indent=4, sort_keys=True)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--backend", default="onnxruntime", help="inference backend")
+    parser.add_argument(
+        "--resolutions", default=",".join(RESOLUTIONS), help="comma separated resolutions"
+    )
+    parser.add_argument(
+        "--densities", default=",".join(TEXT_DENSITIES), help="comma separated text densities"
+    )
+    parser.add_argument("--iterations", type=int, default=10, help="timed calls per case")
+    parser.add_argument("--warmup", type=int, default=2, help="untimed calls per case")
+    parser.add_argument(
+        "--min-duration",
+        type=float,
+        default=MIN_DURATION_S,
+        help="seconds every case is repeated for at least",
+    )
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="results JSON file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="allowed slowdown of the median relative to the baseline",
+    )
+    parser.add_argument(
+        "--min-delta-ms",
+        type=float,
+        default=0.1,
+        help="changes of the median below this many milliseconds are ignored",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="write the results to the baseline file instead of comparing",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    text_detection = create_text_detection(args.backend)
+    results = run_benchmarks(
+        text_detection,
+        args.resolutions.split(","),
+        args.densities.split(","),
+        args.iterations,
+        args.warmup,
+        args.min_duration,
+    )
+    document = {
+        "machine": machine_info(args.backend),
+        "iterations": args.iterations,
+        "results": results,
+    }
+    save_results(args.output, document)
+    print(f"Results written to {args.output}")
+    if args.update_baseline:
+        save_results(args.baseline, document)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --update-baseline to record one")
+        return 0
+    baseline = load_results(args.baseline)
+    if baseline["machine"] != document["machine"]:
+        print(
+            f"Warning: the baseline was recorded on {baseline['machine']}, "
+            "the comparison is only indicative"
+        )
+    rows = compare(results, baseline["results"], args.tolerance, args.min_delta_ms)
+    print_comparison(rows)
+    regressions = [row["case"] for row in rows if row["status"] == "regression"]
+    if regressions:
+        print(f"{len(regressions)} regressions beyond {args.tolerance * 100:.0f} %")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+"""
+Compares the legacy double resize (model image size, then DetResizeForTest) with
+the fused single resize at 1080p and 4K.
+
+Run from the samplemodule folder:
+    python -m benchmarks.bench_resize
+"""
+import time
+
+import cv2
+import numpy as np
+
+from src.edgeinferencing.common.preprocess_operator import DetResizeForTest
+from src.edgeinferencing.common.resize_planner import FusedResizeForTest
+
+IMAGE_SIZE = (960, 960)
+RESOLUTIONS = {"1080p": (1080, 1920), "4K": (2160, 3840)}
+ITERATIONS = 50
+
+
+def bench(fn, frame, iterations=ITERATIONS):
+    fn(frame)
+    start_time = time.perf_counter()
+    for _ in range(iterations):
+        fn(frame)
+    return (time.perf_counter() - start_time) / iterations * 1000.0
+
+
+def main():
+    det_resize_for_test = DetResizeForTest()
+    fused_resize = FusedResizeForTest(image_size=IMAGE_SIZE)
+
+    def legacy(frame):
+        return det_resize_for_test({"image": cv2.resize(frame, IMAGE_SIZE)})
+
+    def fused(frame):
+        return fused_resize({"image": frame})
+
+    print(f"{'resolution':<12}{'legacy ms':>12}{'fused ms':>12}{'saving ms':>12}")
+    for name, (height, width) in RESOLUTIONS.items():
+        frame = np.random.randint(0, 255, (height, width, 3), dtype=np.uint8)
+        legacy_ms = bench(legacy, frame)
+        fused_ms = bench(fused, frame)
+        print(f"{name:<12}{legacy_ms:>12.2f}{fused_ms:>12.2f}{legacy_ms - fused_ms:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
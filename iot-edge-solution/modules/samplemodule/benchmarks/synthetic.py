@@ -0,0 +1,94 @@
+"""
+Deterministic synthetic frames and probability maps for the benchmarks.
+
+The text density is the number of text lines drawn on a frame, or of text regions
+marked in a probability map, so the post-processing cost can be measured from an
+empty scene up to a crowded one.
+"""
+from typing import Tuple
+
+import cv2
+import numpy as np
+
+RESOLUTIONS = {"720p": (720, 1280), "1080p": (1080, 1920), "4K": (2160, 3840)}
+TEXT_DENSITIES = {"empty": 0, "sparse": 4, "dense": 40}
+
+
+def _text_lines(
+    height: int, width: int, count: int, seed: int
+) -> Tuple[np.random.RandomState, list]:
+    """
+    Positions of count text lines that stay inside the frame.
+
+    @param
+        height (int): frame height
+        width (int): frame width
+        count (int): number of text lines
+        seed (int): random seed
+    @return
+        Tuple: random state and a list of (x, y, columns) lines
+    """
+    random_state = np.random.RandomState(seed)
+    lines = []
+    for _ in range(count):
+        columns = random_state.randint(4, 16)
+        x = random_state.randint(0, max(1, width // 2))
+        y = random_state.randint(height // 20, height - height // 20)
+        lines.append((x, y, columns))
+    return random_state, lines
+
+
+def make_frame(height: int, width: int, density: int, seed: int = 0) -> np.ndarray:
+    """
+    Camera-like BGR frame with density lines of dark text on a noisy background.
+
+    @param
+        height (int): frame height
+        width (int): frame width
+        density (int): number of text lines
+        seed (int): random seed
+    @return
+        np.ndarray: frame with shape (height, width, 3) and dtype uint8
+    """
+    random_state, lines = _text_lines(height, width, density, seed)
+    frame = random_state.randint(170, 200, (height, width, 3)).astype(np.uint8)
+    scale = height / 720.0
+    for x, y, columns in lines:
+        text = "".join(
+            random_state.choice(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"), columns)
+        )
+        cv2.putText(
+            frame,
+            text,
+            (x, y),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            scale,
+            (20, 20, 20),
+            max(1, int(2 * scale)),
+        )
+    return frame
+
+
+def make_probability_map(
+    height: int, width: int, density: int, seed: int = 0
+) -> np.ndarray:
+    """
+    Model output with density text regions of high probability on a low background.
+
+    @param
+        height (int): map height
+        width (int): map width
+        density (int): number of text regions
+        seed (int): random seed
+    @return
+        np.ndarray: probability map with shape (1, 1, height, width)
+    """
+    random_state, lines = _text_lines(height, width, density, seed)
+    prob = random_state.uniform(0.0, 0.1, (height, width)).astype(np.float32)
+    line_height = max(4, height // 40)
+    for x, y, columns in lines:
+        line_width = columns * line_height * 2 // 3
+        prob[y - line_height : y, x : x + line_width] = random_state.uniform(  # noqa E203
+            0.6, 1.0
+        )
+    return prob[None, None]
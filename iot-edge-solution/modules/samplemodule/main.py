@@ -4,9 +4,35 @@
 
 
 from src.frameprovider.frame_provider import VideoCapture
+from src.frameprovider.multi_camera import MultiCameraCapture
+from src.frameprovider.config import FrameProviderConfig
 from src.edgeinferencing.edge_model import TextDetection
-from src.edgeinferencing.config import EdgeModelConfig
-from src.common.utils import get_parent_dir_path, get_camera_path
+from src.edgeinferencing.config import EdgeModelConfig, OrtSessionConfig
+from src.common.metrics import METRICS, MetricsExporter, MetricsReporter
+from src.common.utils import (
+    get_parent_dir_path,
+    get_camera_paths,
+    get_camera_weights,
+    get_batch_size,
+    get_capture_mode,
+    get_pipeline_queue_depth,
+    get_pipeline_backpressure,
+    get_change_gate,
+    get_change_threshold,
+    get_change_refresh_interval,
+    get_tiled_inference,
+    get_shape_bucketing,
+    get_warm_up,
+    get_ort_session_config_path,
+    get_ort_model_cache,
+    get_metrics_interval,
+    get_metrics_port,
+    get_frame_log_every,
+    get_post_process_workers,
+    get_post_process_cpu_affinity,
+    get_shared_frame_slots,
+    get_shared_frame_shape,
+)
 
 ONNX_MODEL_FILE_NAME = "ch_pp_inf_dynamic.onnx"
 ENGINE_FILE_NAME = "ch_pp_inf_dynamic_fp16.engine"
@@ -14,14 +40,51 @@ ENGINE_FILE_NAME = "ch_pp_inf_dynamic_fp16.engine"
 
 def main():
     print("Starting Application..")
+    METRICS.log_every = get_frame_log_every()
+    metrics_interval = get_metrics_interval()
+    if metrics_interval > 0:
+        MetricsReporter(METRICS, metrics_interval).start()
     cur_dir = get_parent_dir_path()
     onnx_file_path = cur_dir + "/local_data/" + ONNX_MODEL_FILE_NAME
     engine_file_path = cur_dir + "/local_data/" + ENGINE_FILE_NAME
     config = EdgeModelConfig(onnx_file_path, engine_file_path)
+    config.tiled = get_tiled_inference()
+    config.shape_bucketing = get_shape_bucketing()
+    ort_session_config_path = get_ort_session_config_path()
+    if ort_session_config_path:
+        config.ort_session = OrtSessionConfig.load(ort_session_config_path)
+    config.ort_model_cache = get_ort_model_cache()
+    config.post_process_workers = get_post_process_workers()
+    config.post_process_cpu_affinity = get_post_process_cpu_affinity()
     text_detection = TextDetection(config)
+    metrics_port = get_metrics_port()
+    if metrics_port is not None:
+        MetricsExporter(
+            METRICS, metrics_port, ready=lambda: text_detection.ready
+        ).start()
     text_detection.initialize()
-    camera_path = get_camera_path()
-    VideoCapture(camera_path, text_detection)
+    camera_paths = get_camera_paths()
+    if get_warm_up():
+        # batches of frames from several cameras are warmed up as well
+        text_detection.warm_up(batch_size=get_batch_size() if len(camera_paths) > 1 else 1)
+    else:
+        text_detection.ready = True
+    frame_provider_config = FrameProviderConfig()
+    frame_provider_config.capture_mode = get_capture_mode()
+    frame_provider_config.queue_depth = get_pipeline_queue_depth()
+    frame_provider_config.backpressure = get_pipeline_backpressure()
+    frame_provider_config.batch_size = get_batch_size()
+    frame_provider_config.change_gate = get_change_gate()
+    frame_provider_config.change_threshold = get_change_threshold()
+    frame_provider_config.change_refresh_interval = get_change_refresh_interval()
+    frame_provider_config.shared_frame_slots = get_shared_frame_slots()
+    frame_provider_config.shared_max_frame_shape = get_shared_frame_shape()
+    if len(camera_paths) > 1:
+        MultiCameraCapture(
+            camera_paths, text_detection, get_camera_weights(), frame_provider_config
+        )
+    else:
+        VideoCapture(camera_paths[0], text_detection, frame_provider_config)
 
 
 if __name__ == "__main__":
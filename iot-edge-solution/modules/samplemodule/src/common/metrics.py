@@ -0,0 +1,359 @@
+"""
+This module is used to provide low overhead latency and counter metrics for the
+capture, pre-processing, inference, post-processing and emission stages.
+
+Stage timers use time.perf_counter_ns and record into rolling histograms of the
+most recent samples, percentiles are only computed when a summary is requested.
+A MetricsReporter prints the summary periodically and a MetricsExporter serves it
+over HTTP in the Prometheus text format (/metrics) and as JSON (/metrics.json).
+"""
+import json
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+STAGE_CAPTURE = "capture"
+STAGE_RESIZE = "resize"
+STAGE_TRANSFORM = "transform"
+STAGE_INFERENCE = "inference"
+STAGE_POSTPROCESS = "postprocess"
+STAGE_EMIT = "emit"
+PERCENTILES = [50, 95, 99]
+
+
+class RollingHistogram:
+    """
+    Ring buffer of the most recent samples of one stage.
+    """
+
+    def __init__(self, window: int = 1024) -> None:
+        """
+        Initialize the RollingHistogram.
+
+        @param
+            window (int): number of most recent samples the percentiles cover
+        """
+        # a list, item assignment is much cheaper than on a numpy array
+        self._samples = [0] * max(1, window)
+        self._index = 0
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, elapsed_ns: int) -> None:
+        """
+        Record one sample.
+
+        @param
+            elapsed_ns (int): duration in nanoseconds
+        """
+        self._samples[self._index] = elapsed_ns
+        self._index = (self._index + 1) % len(self._samples)
+        self.count += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+
+    def snapshot(self) -> Dict[str, float]:
+        """
+        Count, mean, max and percentiles of the recorded samples.
+
+        @return
+            Dict[str, float]: values in milliseconds, percentiles over the window
+        """
+        samples = np.array(self._samples[: min(self.count, len(self._samples))])
+        snapshot = {
+            "count": self.count,
+            "mean_ms": self.total_ns / self.count / 1e6 if self.count else 0.0,
+            "max_ms": self.max_ns / 1e6,
+        }
+        values = np.percentile(samples, PERCENTILES) if len(samples) else [0.0] * 3
+        for percentile, value in zip(PERCENTILES, values):
+            snapshot[f"p{percentile}_ms"] = float(value) / 1e6
+        return snapshot
+
+
+class _StageTimer:
+    __slots__ = ["_metrics", "_stage", "_start"]
+
+    def __init__(self, metrics: "Metrics", stage: str) -> None:
+        self._metrics = metrics
+        self._stage = stage
+
+    def __enter__(self) -> "_StageTimer":
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._metrics.record(self._stage, time.perf_counter_ns() - self._start)
+
+
+class Metrics:
+    """
+    Stage histograms, counters and sampling of per-frame log lines, shared by all
+    threads of the process.
+    """
+
+    def __init__(self, window: int = 1024, log_every: int = 0) -> None:
+        """
+        Initialize the Metrics.
+
+        @param
+            window (int): number of most recent samples per stage histogram
+            log_every (int): log every n-th frame, 0 turns per-frame logging off
+        """
+        self.window = window
+        self.log_every = log_every
+        self.started_at = time.monotonic()
+        self._histograms: Dict[str, RollingHistogram] = {}
+        self._counters: Dict[str, int] = {}
+        self._frames_seen = 0
+        self._lock = threading.Lock()
+
+    def timer(self, stage: str) -> _StageTimer:
+        """
+        Context manager recording the duration of its block.
+
+        @param
+            stage (str): stage name
+        @return
+            _StageTimer: timer
+        """
+        return _StageTimer(self, stage)
+
+    def record(self, stage: str, elapsed_ns: int) -> None:
+        """
+        Record the duration of a stage.
+
+        @param
+            stage (str): stage name
+            elapsed_ns (int): duration in nanoseconds
+        """
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = RollingHistogram(self.window)
+            histogram.record(elapsed_ns)
+
+    def increment(self, name: str, value: int = 1) -> None:
+        """
+        Add to a counter.
+
+        @param
+            name (str): counter name
+            value (int): amount added
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def sample_frame(self) -> bool:
+        """
+        Whether the current frame should be logged, every log_every-th frame is.
+
+        @return
+            bool: True to log the frame
+        """
+        if self.log_every <= 0:
+            return False
+        with self._lock:
+            self._frames_seen += 1
+            return self._frames_seen % self.log_every == 0
+
+    def snapshot(self) -> Dict:
+        """
+        Current values of every stage and counter.
+
+        @return
+            Dict: {"uptime_s", "stages": {stage: histogram snapshot}, "counters"}
+        """
+        with self._lock:
+            stages = {
+                stage: histogram.snapshot()
+                for stage, histogram in self._histograms.items()
+            }
+            counters = dict(self._counters)
+        return {
+            "uptime_s": time.monotonic() - self.started_at,
+            "stages": stages,
+            "counters": counters,
+        }
+
+    def summary(self) -> str:
+        """
+        Human readable summary, one line per stage followed by the counters.
+
+        @return
+            str: summary
+        """
+        snapshot = self.snapshot()
+        lines = [
+            f"{stage}: count: {values['count']}, p50/p95/p99/max: "
+            f"{values['p50_ms']:.2f}/{values['p95_ms']:.2f}/{values['p99_ms']:.2f}/"
+            f"{values['max_ms']:.2f} ms"
+            for stage, values in snapshot["stages"].items()
+        ]
+        if snapshot["counters"]:
+            lines.append(
+                ", ".join(f"{name}: {value}" for name, value in snapshot["counters"].items())
+            )
+        return "\n".join(lines)
+
+    def prometheus(self) -> str:
+        """
+        Current values in the Prometheus text exposition format.
+
+        @return
+            str: metrics text
+        """
+        snapshot = self.snapshot()
+        lines: List[str] = [
+            "# TYPE stage_latency_seconds summary",
+        ]
+        for stage, values in snapshot["stages"].items():
+            for percentile in PERCENTILES:
+                quantile = percentile / 100.0
+                lines.append(
+                    f'stage_latency_seconds{{stage="{stage}",quantile="{quantile}"}} '
+                    f"{values[f'p{percentile}_ms'] / 1000.0}"
+                )
+            lines.append(f'stage_latency_seconds_count{{stage="{stage}"}} {values["count"]}')
+            lines.append(
+                f'stage_latency_seconds_sum{{stage="{stage}"}} '
+                f"{values['mean_ms'] * values['count'] / 1000.0}"
+            )
+        for name, value in snapshot["counters"].items():
+            lines.append(f"# TYPE {name}_total counter")
+            lines.append(f"{name}_total {value}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """
+        Forget every sample and counter.
+        """
+        with self._lock:
+            self._histograms = {}
+            self._counters = {}
+            self._frames_seen = 0
+            self.started_at = time.monotonic()
+
+
+# metrics of the process, used by the frame provider and the text detection
+METRICS = Metrics()
+
+
+class MetricsReporter:
+    """
+    Prints the metrics summary on a background thread every interval seconds.
+    """
+
+    def __init__(self, metrics: Metrics, interval: float = 60.0) -> None:
+        """
+        Initialize the MetricsReporter.
+
+        @param
+            metrics (Metrics): metrics to report
+            interval (float): seconds between two summaries
+        """
+        self.metrics = metrics
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """
+        Start the reporting thread.
+        """
+        self._thread = threading.Thread(
+            target=self._report, name="metrics-reporter", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the reporting thread.
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _report(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            print(f"Metrics:\n{self.metrics.summary()}")
+
+
+class MetricsExporter:
+    """
+    Serves the metrics over HTTP on a background thread.
+    """
+
+    def __init__(
+        self,
+        metrics: Metrics,
+        port: int,
+        host: str = "0.0.0.0",
+        ready: Optional[Callable[[], bool]] = None,
+    ) -> None:
+        """
+        Initialize the MetricsExporter.
+
+        @param
+            metrics (Metrics): metrics to serve
+            port (int): port to listen on, 0 picks a free port
+            host (str): address to listen on
+            ready (Callable): readiness check served on /ready, None disables /ready
+        """
+        # http.server takes longer to import than the rest of this module
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        exported = metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path == "/metrics":
+                    body = exported.prometheus().encode()
+                    content_type = "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body = json.dumps(exported.snapshot()).encode()
+                    content_type = "application/json"
+                elif self.path == "/ready" and ready is not None:
+                    if not ready():
+                        self.send_error(503, "not ready")
+                        return
+                    body = b"ready"
+                    content_type = "text/plain"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args) -> None:
+                # scrapes are not worth a log line each
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.port = self.server.server_address[1]
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """
+        Start serving.
+        """
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, name="metrics-exporter", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop serving.
+        """
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread is not None:
+            self._thread.join()
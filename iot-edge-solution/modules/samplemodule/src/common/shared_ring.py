@@ -0,0 +1,309 @@
+"""
+This module is used to move frames and probability maps between processes without
+pickling them.
+
+A SharedRing is one block of shared memory split into preallocated slots of the
+same size. The indices of the free slots travel through a multiprocessing queue,
+a producer takes a free slot, writes its array into it and hands the consumer a
+SlotRef: the slot index with the shape, dtype and metadata of the array. The
+consumer reads the array in place and releases the slot, so only a few bytes per
+frame cross the process boundary.
+
+multiprocessing.shared_memory is used where available (Python 3.8+), on Python 3.7
+the block is a memory mapped file in /dev/shm.
+"""
+import mmap
+import multiprocessing
+import os
+import queue
+import tempfile
+import uuid
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python 3.7
+    shared_memory = None
+
+SHM_DIR = "/dev/shm"
+
+
+class _SharedBlock:
+    """
+    Named block of shared memory that other processes can attach to by name.
+    """
+
+    def __init__(self, size: int, name: Optional[str] = None) -> None:
+        """
+        Create a block, or attach to an existing one.
+
+        @param
+            size (int): size in bytes
+            name (str): name of the block to attach to, None creates a new block
+        """
+        self.size = size
+        self.owner = name is None
+        # a forked child inherits the object, only the creating process frees it
+        self.owner_pid = os.getpid() if self.owner else None
+        if shared_memory is not None:
+            if self.owner:
+                self._shm = shared_memory.SharedMemory(create=True, size=size)
+            else:
+                self._shm = _attach_untracked(name)
+            self.name = self._shm.name
+            self.buf = self._shm.buf
+            return
+        self._shm = None
+        directory = SHM_DIR if os.path.isdir(SHM_DIR) else tempfile.gettempdir()
+        self.name = name or os.path.join(directory, f"shared_ring_{uuid.uuid4().hex}")
+        with open(self.name, "w+b" if self.owner else "r+b") as block_file:
+            if self.owner:
+                block_file.truncate(size)
+            self.buf = mmap.mmap(block_file.fileno(), size)
+
+    def close(self) -> None:
+        """
+        Detach from the block. Fails with BufferError while arrays still use it.
+        """
+        if self._shm is not None:
+            self._shm.close()
+        else:
+            self.buf.close()
+
+    def unlink(self) -> None:
+        """
+        Free the block once every process closed it.
+        """
+        if self._shm is not None:
+            self._shm.unlink()
+        elif os.path.exists(self.name):
+            os.remove(self.name)
+
+
+def _attach_untracked(name: str):
+    """
+    Attach to a block without registering it with the resource tracker, which the
+    processes of a ring share and which would otherwise unlink the block when the
+    first of them exits. Only the creating process frees the block.
+
+    @param
+        name (str): name of the block
+    @return
+        shared_memory.SharedMemory: attached block
+    """
+    try:
+        # Python 3.13+
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    from multiprocessing import resource_tracker
+
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class SlotRef:
+    """
+    Reference to an array in a slot of a SharedRing, cheap to send between processes.
+    """
+
+    def __init__(
+        self,
+        slot: int,
+        shape: Tuple[int, ...],
+        dtype: str,
+        metadata: Optional[Dict] = None,
+    ) -> None:
+        """
+        Initialize the SlotRef.
+
+        @param
+            slot (int): slot index
+            shape (Tuple[int, ...]): shape of the array
+            dtype (str): dtype of the array
+            metadata (Dict): small values describing the array, e.g. stream name,
+                frame index and capture timestamp
+        """
+        self.slot = slot
+        self.shape = tuple(shape)
+        self.dtype = dtype
+        self.metadata = metadata if metadata is not None else {}
+
+
+class SharedRing:
+    """
+    Ring of preallocated shared memory slots. Create it in the parent process and
+    pass it to the child processes as a Process argument, they attach to the same
+    memory.
+    """
+
+    def __init__(self, num_slots: int, slot_bytes: int, context=None) -> None:
+        """
+        Initialize the SharedRing.
+
+        @param
+            num_slots (int): number of slots, the number of arrays alive at once
+            slot_bytes (int): size of every slot in bytes
+            context (multiprocessing context): context of the processes using the
+                ring, defaults to the default context
+        """
+        if num_slots < 1 or slot_bytes < 1:
+            raise ValueError(
+                f"A shared ring needs at least one slot and byte, got {num_slots} "
+                f"slots of {slot_bytes} bytes"
+            )
+        context = context or multiprocessing.get_context()
+        self.num_slots = num_slots
+        self.slot_bytes = slot_bytes
+        self._block = _SharedBlock(num_slots * slot_bytes)
+        self._free = context.Queue()
+        for slot in range(num_slots):
+            self._free.put(slot)
+
+    @classmethod
+    def for_arrays(
+        cls,
+        num_slots: int,
+        max_shape: Tuple[int, ...],
+        dtype=np.uint8,
+        context=None,
+    ) -> "SharedRing":
+        """
+        Ring with slots large enough for arrays of up to max_shape.
+
+        @param
+            num_slots (int): number of slots
+            max_shape (Tuple[int, ...]): largest array shape, e.g. (2160, 3840, 3)
+            dtype (np.dtype): dtype of the arrays
+            context (multiprocessing context): context of the processes
+        @return
+            SharedRing: ring
+        """
+        slot_bytes = int(np.prod(max_shape)) * np.dtype(dtype).itemsize
+        return cls(num_slots, slot_bytes, context)
+
+    def __getstate__(self) -> Dict:
+        return {
+            "num_slots": self.num_slots,
+            "slot_bytes": self.slot_bytes,
+            "name": self._block.name,
+            "free": self._free,
+        }
+
+    def __setstate__(self, state: Dict) -> None:
+        self.num_slots = state["num_slots"]
+        self.slot_bytes = state["slot_bytes"]
+        self._block = _SharedBlock(self.num_slots * self.slot_bytes, state["name"])
+        self._free = state["free"]
+
+    def acquire(self, timeout: Optional[float] = None) -> Optional[int]:
+        """
+        Take a free slot, waiting for one to be released if all are in use.
+
+        @param
+            timeout (float): seconds to wait, None waits forever
+        @return
+            int: slot index, None when no slot was released in time
+        """
+        try:
+            return self._free.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def array(self, slot: int, shape: Tuple[int, ...], dtype=np.uint8) -> np.ndarray:
+        """
+        Array of the given shape backed by the memory of a slot, no data is copied.
+
+        @param
+            slot (int): slot index
+            shape (Tuple[int, ...]): array shape
+            dtype (np.dtype): array dtype
+        @return
+            np.ndarray: array view of the slot
+        """
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        if nbytes > self.slot_bytes:
+            raise ValueError(
+                f"Array of shape {tuple(shape)} and dtype {dtype} needs {nbytes} bytes, "
+                f"the slots hold {self.slot_bytes}"
+            )
+        return np.ndarray(
+            shape, dtype=dtype, buffer=self._block.buf, offset=slot * self.slot_bytes
+        )
+
+    def put(
+        self,
+        array: np.ndarray,
+        metadata: Optional[Dict] = None,
+        timeout: Optional[float] = None,
+    ) -> Optional[SlotRef]:
+        """
+        Copy an array into a free slot.
+
+        @param
+            array (np.ndarray): array to share
+            metadata (Dict): metadata sent along with the slot index
+            timeout (float): seconds to wait for a free slot, None waits forever
+        @return
+            SlotRef: reference to send to the consumer, None when no slot was free
+        """
+        slot = self.acquire(timeout)
+        if slot is None:
+            return None
+        self.array(slot, array.shape, array.dtype)[...] = array
+        return SlotRef(slot, array.shape, array.dtype.str, metadata)
+
+    def get(self, ref: SlotRef) -> np.ndarray:
+        """
+        Array a SlotRef points to, valid until the slot is released.
+
+        @param
+            ref (SlotRef): reference received from the producer
+        @return
+            np.ndarray: array view of the slot
+        """
+        return self.array(ref.slot, ref.shape, ref.dtype)
+
+    def release(self, ref: SlotRef) -> None:
+        """
+        Return the slot of a SlotRef to the ring once its array is no longer used.
+
+        @param
+            ref (SlotRef): reference received from the producer
+        """
+        self.free(ref.slot)
+
+    def free(self, slot: int) -> None:
+        """
+        Return an acquired slot to the ring.
+
+        @param
+            slot (int): slot index returned by acquire
+        """
+        self._free.put(slot)
+
+    def close(self) -> None:
+        """
+        Detach this process from the ring, the creating process also frees the memory.
+        Arrays returned by the ring must not be used afterwards.
+        """
+        try:
+            self._block.close()
+        except BufferError:
+            # arrays still reference the memory, it is unmapped when they are freed
+            pass
+        if self._block.owner_pid == os.getpid():
+            self._block.unlink()
+
+    def __enter__(self) -> "SharedRing":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
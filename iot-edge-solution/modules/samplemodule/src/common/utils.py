@@ -1,3 +1,4 @@
+import hashlib
 import os
 
 
@@ -10,9 +11,170 @@ def get_parent_dir_path():
     return cwd
 
 
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    SHA-256 of a file, read in chunks.
+
+    @param
+        path (str): file path
+        chunk_size (int): read size in bytes
+    @return
+        str: hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as model_file:
+        for chunk in iter(lambda: model_file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
 def get_camera_path():
     value = os.environ.get("CAMERA_PATH")
     if value is None:
         raise ValueError("Config environment variable CAMERA_PATH is not set.")
     print(f"Camera path: {value}")
     return value
+
+
+def get_capture_mode():
+    value = os.environ.get("CAPTURE_MODE", "serial")
+    print(f"Capture mode: {value}")
+    return value
+
+
+def get_pipeline_queue_depth():
+    value = int(os.environ.get("PIPELINE_QUEUE_DEPTH", "2"))
+    print(f"Pipeline queue depth: {value}")
+    return value
+
+
+def get_pipeline_backpressure():
+    value = os.environ.get("PIPELINE_BACKPRESSURE", "block")
+    print(f"Pipeline backpressure: {value}")
+    return value
+
+
+def get_camera_paths():
+    value = get_camera_path()
+    return [path.strip() for path in value.split(";") if path.strip()]
+
+
+def get_camera_weights():
+    value = os.environ.get("CAMERA_WEIGHTS")
+    if not value:
+        return None
+    print(f"Camera weights: {value}")
+    return [int(weight) for weight in value.split(",")]
+
+
+def get_batch_size():
+    value = int(os.environ.get("BATCH_SIZE", "1"))
+    print(f"Batch size: {value}")
+    return value
+
+
+def get_change_gate():
+    value = os.environ.get("CHANGE_GATE", "false").lower() in ["1", "true", "yes"]
+    print(f"Change gate: {value}")
+    return value
+
+
+def get_change_threshold():
+    value = float(os.environ.get("CHANGE_THRESHOLD", "6.0"))
+    print(f"Change threshold: {value}")
+    return value
+
+
+def get_change_refresh_interval():
+    value = int(os.environ.get("CHANGE_REFRESH_INTERVAL", "30"))
+    print(f"Change refresh interval: {value}")
+    return value
+
+
+def get_tiled_inference():
+    value = os.environ.get("TILED_INFERENCE", "false").lower() in ["1", "true", "yes"]
+    print(f"Tiled inference: {value}")
+    return value
+
+
+def get_shape_bucketing():
+    value = os.environ.get("SHAPE_BUCKETING", "false").lower() in ["1", "true", "yes"]
+    print(f"Shape bucketing: {value}")
+    return value
+
+
+def get_warm_up():
+    value = os.environ.get("WARM_UP", "true").lower() in ["1", "true", "yes"]
+    print(f"Warm up: {value}")
+    return value
+
+
+def get_ort_session_config_path():
+    value = os.environ.get("ORT_SESSION_CONFIG")
+    if not value:
+        return None
+    print(f"ONNX Runtime session config: {value}")
+    return value
+
+
+def get_ort_model_cache():
+    value = os.environ.get("ORT_MODEL_CACHE", "true").lower() in ["1", "true", "yes"]
+    print(f"ONNX Runtime model cache: {value}")
+    return value
+
+
+def get_inference_backend():
+    value = os.environ.get("INFERENCE_BACKEND")
+    if not value:
+        # USE_TENSOR_RT selected the runtime before the backend registry existed
+        use_tensor_rt = os.environ.get("USE_TENSOR_RT", "False") == "True"
+        value = "tensorrt" if use_tensor_rt else "onnxruntime"
+    print(f"Inference backend: {value}")
+    return value
+
+
+def get_metrics_interval():
+    value = float(os.environ.get("METRICS_INTERVAL", "60"))
+    print(f"Metrics interval: {value}")
+    return value
+
+
+def get_metrics_port():
+    value = os.environ.get("METRICS_PORT")
+    if not value:
+        return None
+    print(f"Metrics port: {value}")
+    return int(value)
+
+
+def get_frame_log_every():
+    value = int(os.environ.get("FRAME_LOG_EVERY", "0"))
+    print(f"Frame log every: {value}")
+    return value
+
+
+def get_post_process_workers():
+    value = int(os.environ.get("POST_PROCESS_WORKERS", "0"))
+    print(f"Post-process workers: {value}")
+    return value
+
+
+def get_post_process_cpu_affinity():
+    value = os.environ.get("POST_PROCESS_CPU_AFFINITY")
+    if not value:
+        return None
+    print(f"Post-process CPU affinity: {value}")
+    return [int(cpu) for cpu in value.split(",")]
+
+
+def get_shared_frame_slots():
+    value = int(os.environ.get("SHARED_FRAME_SLOTS", "4"))
+    print(f"Shared frame slots: {value}")
+    return value
+
+
+def get_shared_frame_shape():
+    value = os.environ.get("SHARED_FRAME_SHAPE", "1080,1920")
+    print(f"Shared frame shape: {value}")
+    height, width = [int(size) for size in value.split(",")]
+    return height, width, 3
@@ -0,0 +1,114 @@
+"""This module is used to provide a dynamic batcher that groups frames from several producers into one inference call."""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional
+
+import numpy as np
+
+_STOP = object()
+
+
+class DynamicBatcher:
+    """
+    Collects frames submitted from any number of threads (e.g. one per camera) and
+    runs them through TextDetection.run_batch once max_batch_size frames are waiting
+    or the oldest frame has waited max_wait_ms.
+    """
+
+    def __init__(
+        self, text_detection, max_batch_size: int = 4, max_wait_ms: float = 10.0
+    ) -> None:
+        """
+        Initialize the DynamicBatcher.
+
+        @param
+            text_detection (TextDetection): initialized text detection model
+            max_batch_size (int): maximum number of frames per inference call
+            max_wait_ms (float): maximum time the first frame of a batch waits for others
+        """
+        if max_batch_size < 1:
+            raise ValueError(f"Batch size must be at least 1 but got: {max_batch_size}")
+        self.text_detection = text_detection
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches_processed = 0
+        self.frames_processed = 0
+        self._queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """
+        Start the batching thread.
+        """
+        self._thread = threading.Thread(target=self._worker, name="batcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Process the frames already submitted and stop the batching thread.
+        """
+        self._queue.put(_STOP)
+        if self._thread is not None:
+            self._thread.join()
+
+    def submit(self, image: np.ndarray) -> Future:
+        """
+        Queue a frame for batched inference.
+
+        @param
+            image (np.ndarray): raw frame
+        @return
+            Future: resolves to the list of bounding boxes of the frame
+        """
+        future = Future()
+        self._queue.put((image, future))
+        return future
+
+    @property
+    def average_batch_size(self) -> float:
+        """
+        Average number of frames per inference call.
+
+        @return
+            float: average batch size
+        """
+        if self.batches_processed == 0:
+            return 0.0
+        return self.frames_processed / self.batches_processed
+
+    def _collect(self, first) -> List:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _worker(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch = self._collect(first)
+            futures = [future for _, future in batch]
+            try:
+                results = self.text_detection.run_batch([image for image, _ in batch])
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            self.batches_processed += 1
+            self.frames_processed += len(batch)
+            for future, boxes in zip(futures, results):
+                future.set_result(boxes)
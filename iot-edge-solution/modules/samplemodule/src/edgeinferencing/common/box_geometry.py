@@ -0,0 +1,160 @@
+"""
+Vectorized versions of the per-box geometry used by DBPostProcess. Every function
+works on all candidate boxes of a frame at once and reproduces the float32
+arithmetic of cv2.boxPoints and DBPostProcess.get_mini_boxes, so results match the
+per-contour path.
+"""
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+
+def rects_to_arrays(rects: List) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Convert cv2.minAreaRect results into arrays.
+
+    @param
+        rects (List): ((cx, cy), (w, h), angle) tuples
+    @return
+        centers (np.ndarray): float32 array with shape (K, 2)
+        sizes (np.ndarray): float32 array with shape (K, 2)
+        angles (np.ndarray): float32 array with shape (K,)
+    """
+    if not rects:
+        empty = np.zeros((0, 2), dtype=np.float32)
+        return empty, empty.copy(), np.zeros((0,), dtype=np.float32)
+    centers = np.array([rect[0] for rect in rects], dtype=np.float32)
+    sizes = np.array([rect[1] for rect in rects], dtype=np.float32)
+    angles = np.array([rect[2] for rect in rects], dtype=np.float32)
+    return centers, sizes, angles
+
+
+def box_points_batch(
+    centers: np.ndarray, sizes: np.ndarray, angles: np.ndarray
+) -> np.ndarray:
+    """
+    cv2.boxPoints for many rotated rectangles at once.
+
+    @param
+        centers (np.ndarray): rectangle centers with shape (K, 2)
+        sizes (np.ndarray): rectangle sizes (width, height) with shape (K, 2)
+        angles (np.ndarray): rectangle angles in degrees with shape (K,)
+    @return
+        np.ndarray: float32 corners with shape (K, 4, 2)
+    """
+    radians = angles.astype(np.float64) * np.pi / 180.0
+    b = np.cos(radians).astype(np.float32) * np.float32(0.5)
+    a = np.sin(radians).astype(np.float32) * np.float32(0.5)
+    cx, cy = centers[:, 0], centers[:, 1]
+    width, height = sizes[:, 0], sizes[:, 1]
+    points = np.empty((len(centers), 4, 2), dtype=np.float32)
+    points[:, 0, 0] = cx - a * height - b * width
+    points[:, 0, 1] = cy + b * height - a * width
+    points[:, 1, 0] = cx + a * height - b * width
+    points[:, 1, 1] = cy - b * height - a * width
+    points[:, 2, 0] = np.float32(2) * cx - points[:, 0, 0]
+    points[:, 2, 1] = np.float32(2) * cy - points[:, 0, 1]
+    points[:, 3, 0] = np.float32(2) * cx - points[:, 1, 0]
+    points[:, 3, 1] = np.float32(2) * cy - points[:, 1, 1]
+    return points
+
+
+def order_points_batch(points: np.ndarray) -> np.ndarray:
+    """
+    Order the corners of every box the way DBPostProcess.get_mini_boxes does:
+    top-left, top-right, bottom-right, bottom-left.
+
+    @param
+        points (np.ndarray): corners with shape (K, 4, 2)
+    @return
+        np.ndarray: ordered corners with shape (K, 4, 2)
+    """
+    order = np.argsort(points[:, :, 0], axis=1, kind="stable")
+    points = np.take_along_axis(points, order[:, :, np.newaxis], axis=1)
+    left_down = points[:, 1, 1] > points[:, 0, 1]
+    right_down = points[:, 3, 1] > points[:, 2, 1]
+    index_1 = np.where(left_down, 0, 1)
+    index_4 = np.where(left_down, 1, 0)
+    index_2 = np.where(right_down, 2, 3)
+    index_3 = np.where(right_down, 3, 2)
+    index = np.stack([index_1, index_2, index_3, index_4], axis=1)
+    return np.take_along_axis(points, index[:, :, np.newaxis], axis=1)
+
+
+def mini_boxes_batch(contours: List) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    DBPostProcess.get_mini_boxes for a list of contours.
+
+    @param
+        contours (List): point arrays accepted by cv2.minAreaRect
+    @return
+        boxes (np.ndarray): ordered float32 corners with shape (K, 4, 2)
+        ssides (np.ndarray): shorter side of every rectangle with shape (K,)
+    """
+    centers, sizes, angles = rects_to_arrays(
+        [cv2.minAreaRect(contour) for contour in contours]
+    )
+    boxes = order_points_batch(box_points_batch(centers, sizes, angles))
+    return boxes, sizes.min(axis=1) if len(sizes) else np.zeros((0,), np.float32)
+
+
+def polygon_area_length_batch(points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Area and perimeter of many closed polygons with the same number of corners.
+
+    @param
+        points (np.ndarray): corners with shape (K, N, 2)
+    @return
+        area (np.ndarray): polygon areas with shape (K,)
+        length (np.ndarray): polygon perimeters with shape (K,)
+    """
+    points = points.astype(np.float64)
+    x, y = points[:, :, 0], points[:, :, 1]
+    next_x, next_y = np.roll(x, -1, axis=1), np.roll(y, -1, axis=1)
+    area = np.abs(np.sum(x * next_y - next_x * y, axis=1)) / 2.0
+    length = np.sum(np.hypot(next_x - x, next_y - y), axis=1)
+    return area, length
+
+
+def box_bounds_batch(boxes: np.ndarray, height: int, width: int) -> np.ndarray:
+    """
+    Clipped integer bounding boxes as computed by DBPostProcess.box_score_fast.
+
+    @param
+        boxes (np.ndarray): corners with shape (K, 4, 2)
+        height (int): height of the probability map
+        width (int): width of the probability map
+    @return
+        np.ndarray: int array with shape (K, 4) holding xmin, xmax, ymin, ymax
+    """
+    xmin = np.clip(np.floor(boxes[:, :, 0].min(axis=1)).astype(np.int64), 0, width - 1)
+    xmax = np.clip(np.ceil(boxes[:, :, 0].max(axis=1)).astype(np.int64), 0, width - 1)
+    ymin = np.clip(np.floor(boxes[:, :, 1].min(axis=1)).astype(np.int64), 0, height - 1)
+    ymax = np.clip(np.ceil(boxes[:, :, 1].max(axis=1)).astype(np.int64), 0, height - 1)
+    return np.stack([xmin, xmax, ymin, ymax], axis=1)
+
+
+def axis_aligned_boxes(polys: np.ndarray) -> np.ndarray:
+    """
+    Find the integer quadrilaterals that are axis-aligned rectangles, for which the
+    pixels filled by cv2.fillPoly are exactly the inclusive corner range.
+
+    @param
+        polys (np.ndarray): integer corners with shape (K, 4, 2)
+    @return
+        np.ndarray: boolean mask with shape (K,)
+    """
+    x, y = polys[:, :, 0], polys[:, :, 1]
+    x_lo, x_hi = x.min(axis=1, keepdims=True), x.max(axis=1, keepdims=True)
+    y_lo, y_hi = y.min(axis=1, keepdims=True), y.max(axis=1, keepdims=True)
+    on_x = (x == x_lo) | (x == x_hi)
+    on_y = (y == y_lo) | (y == y_hi)
+    corner = (x == x_hi).astype(np.int64) * 2 + (y == y_hi)
+    has_all_corners = np.all(np.sort(corner, axis=1) == np.arange(4), axis=1)
+    return (
+        np.all(on_x & on_y, axis=1)
+        & has_all_corners
+        & (x_lo[:, 0] < x_hi[:, 0])
+        & (y_lo[:, 0] < y_hi[:, 0])
+    )
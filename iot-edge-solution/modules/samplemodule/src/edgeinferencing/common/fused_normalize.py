@@ -0,0 +1,66 @@
+"""
+This module provides a fused replacement for NormalizeImage followed by ToCHWImage
+and the batch dimension added before inference. It writes straight into reusable,
+contiguous (1, 3, H, W) float32 buffers, so the steady state allocates no per-frame
+arrays. When FusedResizeForTest selected a bucket shape the image is written to the
+top-left corner of a bucket sized buffer and the rest is zero padded.
+"""
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+class NormalizeToCHWImage(object):
+    """normalize a hwc image into a reusable nchw float32 buffer"""
+
+    def __init__(self, scale=None, mean=None, std=None, num_buffers=1, **kwargs):
+        scale = np.float32(scale if scale is not None else 1.0 / 255.0)
+        mean = np.array(mean if mean is not None else [0.485, 0.456, 0.406])
+        std = np.array(std if std is not None else [0.229, 0.224, 0.225])
+        # (x * scale - mean) / std folded into x * alpha + beta
+        self.alpha = (scale / std).astype("float32")
+        self.beta = (-mean / std).astype("float32")
+        self.num_buffers = max(1, num_buffers)
+        self._buffers: Dict[Tuple[int, int], List[np.ndarray]] = {}
+        self._next_index: Dict[Tuple[int, int], int] = {}
+
+    def reserve(self, num_buffers: int) -> None:
+        """
+        Make sure at least num_buffers inputs of the same shape can be alive at once,
+        e.g. frames waiting in a pipeline queue or a batch.
+
+        @param
+            num_buffers (int): number of buffers kept per shape
+        """
+        self.num_buffers = max(self.num_buffers, num_buffers)
+
+    def _next_buffer(self, height: int, width: int) -> np.ndarray:
+        key = (height, width)
+        buffers = self._buffers.setdefault(key, [])
+        index = self._next_index.get(key, 0) % self.num_buffers
+        if index == len(buffers):
+            buffers.append(np.empty((1, 3, height, width), dtype=np.float32))
+        self._next_index[key] = index + 1
+        return buffers[index]
+
+    def __call__(self, data):
+        img = data["image"]
+        if not isinstance(img, np.ndarray):
+            img = np.array(img)
+        height, width = img.shape[:2]
+        bucket_h, bucket_w = data.get("bucket", (height, width))
+        out = self._next_buffer(bucket_h, bucket_w)
+        for channel in range(3):
+            np.multiply(
+                img[:, :, channel],
+                self.alpha[channel],
+                out=out[0, channel, :height, :width],
+                dtype=np.float32,
+            )
+            out[0, channel, :height, :width] += self.beta[channel]
+        if (bucket_h, bucket_w) != (height, width):
+            # the buffer may hold a larger image from an earlier frame
+            out[0, :, height:, :] = 0
+            out[0, :, :height, width:] = 0
+        data["image"] = out
+        return data
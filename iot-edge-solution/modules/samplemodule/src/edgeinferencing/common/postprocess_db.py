@@ -18,8 +18,60 @@ from __future__ import unicode_literals
 
 import numpy as np
 import cv2
-from shapely.geometry import Polygon
-import pyclipper
+from src.edgeinferencing.common.box_geometry import (
+    axis_aligned_boxes,
+    box_bounds_batch,
+    mini_boxes_batch,
+    polygon_area_length_batch,
+)
+
+# pyclipper and shapely are imported when the first box is unclipped, so importing
+# this module stays cheap and the components score mode never loads them
+pyclipper = None
+Polygon = None
+
+
+def _import_pyclipper():
+    global pyclipper
+    if pyclipper is None:
+        import pyclipper as pyclipper_module
+
+        pyclipper = pyclipper_module
+    return pyclipper
+
+
+def _import_polygon():
+    global Polygon
+    if Polygon is None:
+        from shapely.geometry import Polygon as polygon_class
+
+        Polygon = polygon_class
+    return Polygon
+
+
+class EarlyExitStats(object):
+    """
+    Counters for the frames DBPostProcess handled without a full-map contour pass.
+    """
+
+    def __init__(self):
+        self.frames = 0
+        self.frames_empty = 0
+        self.frames_below_box_thresh = 0
+        self.frames_roi = 0
+
+    def summary(self):
+        """
+        One line summary of the counters.
+
+        @return
+            str: summary
+        """
+        return (
+            f"frames: {self.frames}, empty: {self.frames_empty}, "
+            f"below box threshold: {self.frames_below_box_thresh}, "
+            f"roi only: {self.frames_roi}"
+        )
 
 
 class DBPostProcess(object):
@@ -35,6 +87,7 @@ class DBPostProcess(object):
         unclip_ratio=2.0,
         use_dilation=False,
         score_mode="fast",
+        vectorized=False,
         **kwargs,
     ):
         self.thresh = thresh
@@ -43,9 +96,11 @@ class DBPostProcess(object):
         self.unclip_ratio = unclip_ratio
         self.min_size = 3
         self.score_mode = score_mode
-        if score_mode not in ["fast", "slow"]:
+        self.vectorized = vectorized
+        self.stats = EarlyExitStats()
+        if score_mode not in ["fast", "slow", "components"]:
             raise ValueError(
-                f"Score mode must be in [slow, fast] but got: {score_mode}"
+                f"Score mode must be in [slow, fast, components] but got: {score_mode}"
             )
 
         self.dilation_kernel = None if not use_dilation else np.array([[1, 1], [1, 1]])
@@ -59,15 +114,7 @@ class DBPostProcess(object):
         bitmap = _bitmap
         height, width = bitmap.shape
 
-        outs = cv2.findContours(
-            (bitmap * 255).astype(np.uint8),
-            cv2.RETR_LIST,
-            cv2.CHAIN_APPROX_SIMPLE,
-        )
-        if len(outs) == 3:
-            _, contours, _ = outs[0], outs[1], outs[2]
-        elif len(outs) == 2:
-            contours, _ = outs[0], outs[1]
+        contours = self._find_contours(bitmap)
 
         num_contours = min(len(contours), self.max_candidates)
 
@@ -100,10 +147,204 @@ class DBPostProcess(object):
             scores.append(score)
         return np.array(boxes, dtype=np.int16), scores
 
+    def _active_roi(self, mask):
+        """
+        Bounding rectangle (x, y, w, h) of the non-zero pixels of a uint8 mask.
+        """
+        x, y, w, h = cv2.boundingRect(mask)
+        if (w, h) != (mask.shape[1], mask.shape[0]):
+            self.stats.frames_roi += 1
+        return x, y, w, h
+
+    def _find_contours(self, bitmap):
+        mask = (bitmap * 255).astype(np.uint8)
+        x, y, w, h = self._active_roi(mask)
+        if w == 0 or h == 0:
+            return []
+        # contours are found inside the active region and shifted back, which gives
+        # the same contours in the same order as a full-map search
+        outs = cv2.findContours(
+            mask[y : y + h, x : x + w],  # noqa E203
+            cv2.RETR_LIST,
+            cv2.CHAIN_APPROX_SIMPLE,
+            offset=(x, y),
+        )
+        if len(outs) == 3:
+            _, contours, _ = outs[0], outs[1], outs[2]
+        elif len(outs) == 2:
+            contours, _ = outs[0], outs[1]
+        return contours
+
+    def boxes_from_bitmap_vectorized(self, pred, _bitmap, dest_width, dest_height):
+        """
+        Same result as boxes_from_bitmap, but every step that does not need a C call
+        per contour (point ordering, bbox mean scores, unclip distances, scaling) runs
+        on all candidates at once. cv2.minAreaRect and the pyclipper offset still run
+        per contour.
+        """
+        bitmap = _bitmap
+        height, width = bitmap.shape
+
+        contours = self._find_contours(bitmap)
+        contours = contours[: self.max_candidates]
+
+        points, ssides = mini_boxes_batch(contours)
+        keep = np.flatnonzero(ssides >= self.min_size)
+        points = points[keep]
+        if self.score_mode == "fast":
+            scores = self.box_scores_fast_batch(pred, points)
+        else:
+            scores = np.array(
+                [self.box_score_slow(pred, contours[index]) for index in keep]
+            )
+        keep = scores >= self.box_thresh
+        points, scores = points[keep], scores[keep]
+
+        area, length = polygon_area_length_batch(points)
+        distances = area * self.unclip_ratio / length
+        expanded = [
+            self.unclip_distance(box, distance).reshape(-1, 1, 2)
+            for box, distance in zip(points, distances)
+        ]
+        boxes, ssides = mini_boxes_batch(expanded)
+        keep = ssides >= self.min_size + 2
+        boxes, scores = boxes[keep], scores[keep]
+
+        boxes[:, :, 0] = np.clip(
+            np.round(boxes[:, :, 0] / width * dest_width), 0, dest_width
+        )
+        boxes[:, :, 1] = np.clip(
+            np.round(boxes[:, :, 1] / height * dest_height), 0, dest_height
+        )
+        if len(boxes) == 0:
+            return np.array([], dtype=np.int16), []
+        return boxes.astype(np.int16), scores.tolist()
+
+    def boxes_from_components(self, pred, _bitmap, dest_width, dest_height):
+        """
+        Label the binarized map once and take candidates, their mean probabilities and
+        their boxes from the connected components, so the cost does not depend on the
+        number of candidates times their area. Boxes are axis-aligned rectangles,
+        expanded by the same unclip distance as the contour based modes.
+        """
+        height, width = _bitmap.shape
+        mask = np.asarray(_bitmap).astype(np.uint8)
+        x, y, w, h = self._active_roi(mask)
+        if w == 0 or h == 0:
+            return np.array([], dtype=np.int16), []
+        num_labels, labels, stats, _ = cv2.connectedComponentsWithStats(
+            mask[y : y + h, x : x + w], connectivity=8  # noqa E203
+        )
+        stats[:, cv2.CC_STAT_LEFT] += x
+        stats[:, cv2.CC_STAT_TOP] += y
+        # only foreground pixels contribute, which keeps the bincount small
+        foreground = labels > 0
+        sums = np.bincount(
+            labels[foreground],
+            weights=pred[y : y + h, x : x + w][foreground],  # noqa E203
+            minlength=num_labels,
+        )
+        # label 0 is the background
+        stats = stats[1 : self.max_candidates + 1]  # noqa E203
+        scores = sums[1 : self.max_candidates + 1] / stats[:, cv2.CC_STAT_AREA]  # noqa E203
+
+        # corners through the outermost pixel centers, as a contour would have them
+        xmin = stats[:, cv2.CC_STAT_LEFT].astype(np.float64)
+        ymin = stats[:, cv2.CC_STAT_TOP].astype(np.float64)
+        box_w = stats[:, cv2.CC_STAT_WIDTH] - 1.0
+        box_h = stats[:, cv2.CC_STAT_HEIGHT] - 1.0
+        keep = (np.minimum(box_w, box_h) >= self.min_size) & (
+            scores >= self.box_thresh
+        )
+        xmin, ymin, box_w, box_h, scores = [
+            v[keep] for v in (xmin, ymin, box_w, box_h, scores)
+        ]
+
+        distance = box_w * box_h * self.unclip_ratio / (2 * (box_w + box_h))
+        keep = np.minimum(box_w, box_h) + 2 * distance >= self.min_size + 2
+        xmin, ymin, box_w, box_h, scores, distance = [
+            v[keep] for v in (xmin, ymin, box_w, box_h, scores, distance)
+        ]
+        if len(scores) == 0:
+            return np.array([], dtype=np.int16), []
+
+        x0 = np.clip(np.round((xmin - distance) / width * dest_width), 0, dest_width)
+        x1 = np.clip(
+            np.round((xmin + box_w + distance) / width * dest_width), 0, dest_width
+        )
+        y0 = np.clip(
+            np.round((ymin - distance) / height * dest_height), 0, dest_height
+        )
+        y1 = np.clip(
+            np.round((ymin + box_h + distance) / height * dest_height), 0, dest_height
+        )
+        boxes = np.stack(
+            [
+                np.stack([x0, y0], axis=1),
+                np.stack([x1, y0], axis=1),
+                np.stack([x1, y1], axis=1),
+                np.stack([x0, y1], axis=1),
+            ],
+            axis=1,
+        )
+        return boxes.astype(np.int16), scores.tolist()
+
+    def box_scores_fast_batch(self, bitmap, boxes):
+        """
+        box_score_fast for many boxes at once, axis-aligned boxes are scored from an
+        integral image and the remaining boxes reuse the precomputed bounds
+        """
+        h, w = bitmap.shape[:2]
+        scores = np.zeros((len(boxes),), dtype=np.float64)
+        if len(boxes) == 0:
+            return scores
+        bounds = box_bounds_batch(boxes, h, w)
+        # same float32 arithmetic and truncation as box_score_fast
+        polys = (boxes - bounds[:, [0, 2]].astype(np.float32)[:, None, :]).astype(
+            np.int32
+        )
+        aligned = axis_aligned_boxes(polys)
+
+        if aligned.any():
+            integral = cv2.integral(bitmap.astype(np.float32), sdepth=cv2.CV_64F)
+            xmin, xmax, ymin, ymax = [bounds[aligned, i] for i in range(4)]
+            # the filled rectangle, clipped to the bbox mask like cv2.fillPoly does
+            x0 = xmin + np.maximum(polys[aligned, :, 0].min(axis=1), 0)
+            x1 = xmin + np.minimum(polys[aligned, :, 0].max(axis=1), xmax - xmin)
+            y0 = ymin + np.maximum(polys[aligned, :, 1].min(axis=1), 0)
+            y1 = ymin + np.minimum(polys[aligned, :, 1].max(axis=1), ymax - ymin)
+            valid = (x0 <= x1) & (y0 <= y1)
+            x0, x1, y0, y1 = [np.where(valid, v, 0) for v in (x0, x1, y0, y1)]
+            sums = (
+                integral[y1 + 1, x1 + 1]
+                - integral[y0, x1 + 1]
+                - integral[y1 + 1, x0]
+                + integral[y0, x0]
+            )
+            counts = (x1 - x0 + 1) * (y1 - y0 + 1)
+            scores[aligned] = np.where(valid, sums / counts, 0.0)
+
+        for index in np.flatnonzero(~aligned):
+            xmin, xmax, ymin, ymax = bounds[index].tolist()
+            mask = np.zeros((ymax - ymin + 1, xmax - xmin + 1), dtype=np.uint8)
+            cv2.fillPoly(mask, polys[index : index + 1], 1)  # noqa E203
+            scores[index] = cv2.mean(
+                bitmap[ymin : ymax + 1, xmin : xmax + 1], mask  # noqa E203
+            )[0]
+        return scores
+
+    def unclip_distance(self, box, distance):
+        pyclipper = _import_pyclipper()
+        offset = pyclipper.PyclipperOffset()
+        offset.AddPath(box, pyclipper.JT_ROUND, pyclipper.ET_CLOSEDPOLYGON)
+        expanded = np.array(offset.Execute(distance))
+        return expanded
+
     def unclip(self, box):
         unclip_ratio = self.unclip_ratio
-        poly = Polygon(box)
+        poly = _import_polygon()(box)
         distance = poly.area * unclip_ratio / poly.length
+        pyclipper = _import_pyclipper()
         offset = pyclipper.PyclipperOffset()
         offset.AddPath(box, pyclipper.JT_ROUND, pyclipper.ET_CLOSEDPOLYGON)
         expanded = np.array(offset.Execute(distance))
@@ -176,23 +417,50 @@ class DBPostProcess(object):
     def __call__(self, pred, shape_list):
         # pred = outs_dict["maps"]
         # if isinstance(pred, paddle.Tensor):
-        pred = np.array(pred)
+        # no copy, the map can live in shared memory of a post-processing pool
+        pred = np.asarray(pred)
         pred = pred[:, 0, :, :]
-        segmentation = pred > self.thresh
 
         boxes_batch = []
         for batch_index in range(pred.shape[0]):
-            src_h, src_w, ratio_h, ratio_w = shape_list[batch_index]
+            src_h, src_w, ratio_h, ratio_w = shape_list[batch_index][:4]
+            item_pred = pred[batch_index]
+            if len(shape_list[batch_index]) > 4:
+                # the input was padded to a bucket shape, keep the valid region only
+                valid_h, valid_w = shape_list[batch_index][4:6]
+                item_pred = item_pred[: int(valid_h), : int(valid_w)]
+            self.stats.frames += 1
+            # a box score is a mean of probabilities, so it can not exceed the maximum
+            pred_max = item_pred.max()
+            if pred_max <= self.thresh:
+                self.stats.frames_empty += 1
+                boxes_batch.append({"points": np.array([], dtype=np.int16)})
+                continue
+            if pred_max < self.box_thresh:
+                self.stats.frames_below_box_thresh += 1
+                boxes_batch.append({"points": np.array([], dtype=np.int16)})
+                continue
+
+            segmentation = item_pred > self.thresh
             if self.dilation_kernel is not None:
                 mask = cv2.dilate(
-                    np.array(segmentation[batch_index]).astype(np.uint8),
+                    np.array(segmentation).astype(np.uint8),
                     self.dilation_kernel,
                 )
             else:
-                mask = segmentation[batch_index]
-            boxes, scores = self.boxes_from_bitmap(
-                pred[batch_index], mask, src_w, src_h
-            )
+                mask = segmentation
+            if self.score_mode == "components":
+                boxes, scores = self.boxes_from_components(
+                    item_pred, mask, src_w, src_h
+                )
+            elif self.vectorized:
+                boxes, scores = self.boxes_from_bitmap_vectorized(
+                    item_pred, mask, src_w, src_h
+                )
+            else:
+                boxes, scores = self.boxes_from_bitmap(
+                    item_pred, mask, src_w, src_h
+                )
 
             boxes_batch.append({"points": boxes})
         return boxes_batch
@@ -0,0 +1,310 @@
+"""
+This module is used to run the DB post-processing on a pool of worker processes.
+
+The contour pass, shapely and pyclipper hold the GIL, so post-processing on a thread
+caps the frame rate of text heavy scenes at what one core can do. A PostProcessPool
+sends the probability maps to worker processes through a SharedRing, only the slot
+index and the resize information are pickled, and every worker runs its own
+DBPostProcess. Maps larger than a slot are sent through the task queue instead.
+
+Results of the same stream resolve in submission order, so the futures of a stream
+can be consumed first in, first out.
+"""
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from src.common.metrics import METRICS, STAGE_POSTPROCESS
+from src.common.shared_ring import SharedRing, SlotRef
+from src.edgeinferencing.common.postprocess_db import DBPostProcess, EarlyExitStats
+
+# seconds between two checks whether the workers are still alive
+WORKER_POLL_INTERVAL_S = 0.5
+# seconds close waits for a worker to finish its maps before terminating it
+CLOSE_TIMEOUT_S = 30.0
+
+
+def _post_process_worker(
+    op_kwargs: Dict,
+    cpus: Optional[List[int]],
+    ring: SharedRing,
+    tasks,
+    results,
+) -> None:
+    """
+    Worker process: run DBPostProcess on the maps of the tasks until a None task.
+
+    @param
+        op_kwargs (Dict): keyword arguments of DBPostProcess
+        cpus (List[int]): CPUs the worker may run on, None for all
+        ring (SharedRing): ring of probability map slots
+        tasks (multiprocessing.Queue): (task_id, SlotRef or map, shape_list)
+        results (multiprocessing.Queue): (task_id, boxes, stats, elapsed_ns, error)
+    """
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    op = DBPostProcess(**op_kwargs)
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        task_id, pred, shape_list = task
+        ref = pred if isinstance(pred, SlotRef) else None
+        try:
+            if ref is not None:
+                pred = ring.get(ref)
+            before = dict(vars(op.stats))
+            start_time = time.perf_counter_ns()
+            boxes = [item["points"] for item in op(pred, shape_list)]
+            elapsed_ns = time.perf_counter_ns() - start_time
+            stats = {name: value - before[name] for name, value in vars(op.stats).items()}
+            results.put((task_id, boxes, stats, elapsed_ns, None))
+        except Exception as e:
+            results.put((task_id, None, None, 0, RuntimeError(f"Post-processing failed: {e!r}")))
+        finally:
+            # the boxes are new arrays, the map is not used after this point
+            pred = None
+            if ref is not None:
+                ring.release(ref)
+    ring.close()
+
+
+class PostProcessPool:
+    """
+    Pool of worker processes running DBPostProcess.
+    """
+
+    def __init__(
+        self,
+        op_kwargs: Dict,
+        workers: int = 2,
+        cpu_affinity: Optional[List[int]] = None,
+        max_map_shape: Tuple[int, ...] = (1, 1, 960, 960),
+        num_slots: Optional[int] = None,
+        stats: Optional[EarlyExitStats] = None,
+    ) -> None:
+        """
+        Initialize the PostProcessPool and start its worker processes.
+
+        @param
+            op_kwargs (Dict): keyword arguments of DBPostProcess
+            workers (int): number of worker processes
+            cpu_affinity (List[int]): CPUs to pin the workers to, worker i runs on
+                cpu_affinity[i % len(cpu_affinity)], None leaves scheduling to the OS
+            max_map_shape (Tuple[int, ...]): largest probability map sent through
+                shared memory, larger maps are pickled
+            num_slots (int): number of maps in flight, defaults to workers + 2
+            stats (EarlyExitStats): counters the early exits of the workers are added
+                to, defaults to new counters
+        """
+        if workers < 1:
+            raise ValueError(f"A post-processing pool needs at least one worker, got {workers}")
+        self.workers = workers
+        self.stats = stats if stats is not None else EarlyExitStats()
+        self.metrics = METRICS
+        # spawned, the workers do not inherit CUDA or runtime state
+        context = multiprocessing.get_context("spawn")
+        self.ring = SharedRing.for_arrays(
+            num_slots or workers + 2, max_map_shape, np.float32, context
+        )
+        self._tasks = context.Queue()
+        self._results = context.Queue()
+        self._lock = threading.Lock()
+        self._next_task_id = 0
+        # task id -> (stream, sequence number, future)
+        self._pending: Dict[int, Tuple[str, int, Future]] = {}
+        # stream -> next sequence number to submit and to resolve, finished tasks
+        # waiting for an earlier task of their stream
+        self._submitted: Dict[str, int] = {}
+        self._resolved: Dict[str, int] = {}
+        self._finished: Dict[str, Dict[int, Tuple[Future, List, Optional[Exception]]]] = {}
+        # set when a worker died, fails the pending and later submitted maps
+        self._error: Optional[Exception] = None
+        self._worker_died = False
+        self._closing = False
+        self._processes = []
+        for index in range(workers):
+            cpus = [cpu_affinity[index % len(cpu_affinity)]] if cpu_affinity else None
+            process = context.Process(
+                target=_post_process_worker,
+                args=(op_kwargs, cpus, self.ring, self._tasks, self._results),
+                name=f"postprocess-{index}",
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+        self._collector = threading.Thread(
+            target=self._collect, name="postprocess-collector", daemon=True
+        )
+        self._collector.start()
+
+    def submit(
+        self, pred: np.ndarray, shape_list: np.ndarray, stream: str = "default"
+    ) -> Future:
+        """
+        Post-process a probability map on a worker. The map is copied into shared
+        memory, it can be reused as soon as submit returns.
+
+        @param
+            pred (np.ndarray): probability map with shape (N, 1, H, W)
+            shape_list (np.ndarray): resize information with shape (N, 4)
+            stream (str): stream the map belongs to, futures of a stream resolve in
+                submission order
+        @return
+            Future: resolves to the list of boxes of every map in the batch
+        """
+        pred = np.ascontiguousarray(pred, dtype=np.float32)
+        payload = pred
+        if pred.nbytes <= self.ring.slot_bytes:
+            # waits for a worker to release a slot when all maps are in flight, a
+            # dead worker never releases its slot
+            payload = None
+            while payload is None:
+                if self._error is not None:
+                    raise self._error
+                payload = self.ring.put(pred, timeout=WORKER_POLL_INTERVAL_S)
+        ref = payload if isinstance(payload, SlotRef) else None
+        future = Future()
+        with self._lock:
+            error = self._error
+            if error is None:
+                task_id = self._next_task_id
+                self._next_task_id += 1
+                sequence = self._submitted.get(stream, 0)
+                self._submitted[stream] = sequence + 1
+                self._pending[task_id] = (stream, sequence, future)
+        if error is not None:
+            if ref is not None:
+                self.ring.release(ref)
+            raise error
+        try:
+            self._tasks.put((task_id, payload, np.asarray(shape_list)))
+        except Exception as e:
+            if ref is not None:
+                self.ring.release(ref)
+            # resolved in order, so the later maps of the stream still resolve
+            self._resolve((task_id, None, None, 0, e))
+        return future
+
+    def _collect(self) -> None:
+        while True:
+            try:
+                result = self._results.get(timeout=WORKER_POLL_INTERVAL_S)
+            except queue.Empty:
+                error = self._worker_error()
+                if error is None:
+                    continue
+                print(f"ERROR: {error}")
+                self._worker_died = True
+                # resolve what the workers sent before one of them exited
+                while True:
+                    try:
+                        result = self._results.get(timeout=WORKER_POLL_INTERVAL_S)
+                    except queue.Empty:
+                        break
+                    if result is not None:
+                        self._resolve(result)
+                self._fail_pending(error)
+                return
+            if result is None:
+                break
+            self._resolve(result)
+
+    def _worker_error(self) -> Optional[Exception]:
+        """
+        Error for the first worker that exited unexpectedly.
+
+        @return
+            Exception: error, None while every worker runs or exited after close
+        """
+        for process in self._processes:
+            if process.exitcode is not None and (process.exitcode != 0 or not self._closing):
+                return RuntimeError(
+                    f"Post-processing worker {process.name} exited with code "
+                    f"{process.exitcode}"
+                )
+        return None
+
+    def _resolve(self, result: Tuple) -> None:
+        """
+        Resolve the future of a finished task once the earlier tasks of its stream
+        are resolved.
+
+        @param
+            result (Tuple): (task_id, boxes, stats, elapsed_ns, error) from a worker
+        """
+        task_id, boxes, stats, elapsed_ns, error = result
+        if stats:
+            for name, value in stats.items():
+                setattr(self.stats, name, getattr(self.stats, name) + value)
+        if elapsed_ns:
+            self.metrics.record(STAGE_POSTPROCESS, elapsed_ns)
+        with self._lock:
+            if task_id not in self._pending:
+                # already failed after a worker died
+                return
+            stream, sequence, future = self._pending.pop(task_id)
+            finished = self._finished.setdefault(stream, {})
+            finished[sequence] = (future, boxes, error)
+            ready = []
+            next_sequence = self._resolved.get(stream, 0)
+            while next_sequence in finished:
+                ready.append(finished.pop(next_sequence))
+                next_sequence += 1
+            self._resolved[stream] = next_sequence
+        for future, boxes, error in ready:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(boxes)
+
+    def _fail_pending(self, error: Exception) -> None:
+        """
+        Fail every unresolved future. The maps of a dead worker are lost, and the
+        later maps of their streams can not resolve in order.
+
+        @param
+            error (Exception): exception the futures and later submits raise
+        """
+        with self._lock:
+            self._error = self._error or error
+            futures = [future for _, _, future in self._pending.values()]
+            for finished in self._finished.values():
+                futures += [future for future, _, _ in finished.values()]
+            self._pending.clear()
+            self._finished.clear()
+        for future in futures:
+            future.set_exception(error)
+
+    def close(self) -> None:
+        """
+        Finish the submitted maps, stop the workers and free the shared memory.
+        Workers that do not finish within CLOSE_TIMEOUT_S are terminated, and the
+        futures still pending fail.
+        """
+        self._closing = True
+        # a dead worker never reads its stop marker
+        for process in self._processes:
+            if process.is_alive():
+                self._tasks.put(None)
+        for process in self._processes:
+            process.join(CLOSE_TIMEOUT_S)
+            if process.is_alive():
+                print(f"WARN: Terminating post-processing worker {process.name}")
+                process.terminate()
+                process.join()
+                self._worker_died = True
+        if self._worker_died or self._worker_error() is not None:
+            # nobody reads the data still queued for a dead worker, do not wait at
+            # exit for it to be written
+            self._tasks.cancel_join_thread()
+            self._results.cancel_join_thread()
+        self._results.put(None)
+        self._collector.join(CLOSE_TIMEOUT_S)
+        self._fail_pending(RuntimeError("Post-processing pool closed"))
+        self.ring.close()
@@ -9,9 +9,29 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import sys
+
 import cv2
 import numpy as np
 from src.edgeinferencing.config import EdgeInferencingPreProcessConfig
+from src.edgeinferencing.common.resize_planner import FusedResizeForTest
+from src.edgeinferencing.common.fused_normalize import NormalizeToCHWImage
+
+
+def _pil_to_array(img):
+    """
+    Convert PIL images to arrays without importing PIL on every frame. An image can
+    only be a PIL image if PIL was imported already, so sys.modules is checked.
+
+    @param
+        img (np.ndarray or PIL.Image.Image): image
+    @return
+        np.ndarray: image as array
+    """
+    pil_image = sys.modules.get("PIL.Image")
+    if pil_image is not None and isinstance(img, pil_image.Image):
+        return np.array(img)
+    return img
 
 
 class NormalizeImage(object):
@@ -27,11 +47,7 @@ class NormalizeImage(object):
         self.std = np.array(std).reshape(shape).astype("float32")
 
     def __call__(self, data):
-        img = data["image"]
-        from PIL import Image
-
-        if isinstance(img, Image.Image):
-            img = np.array(img)
+        img = _pil_to_array(data["image"])
 
         # assert isinstance(img, np.ndarray), "invalid input 'img' in NormalizeImage"
         data["image"] = (img.astype("float32") * self.scale - self.mean) / self.std
@@ -45,11 +61,7 @@ class ToCHWImage(object):
         pass
 
     def __call__(self, data):
-        img = data["image"]
-        from PIL import Image
-
-        if isinstance(img, Image.Image):
-            img = np.array(img)
+        img = _pil_to_array(data["image"])
         data["image"] = img.transpose((2, 0, 1))
         return data
 
@@ -194,11 +206,21 @@ def transform(data, ops=None):
 def create_operators(op_param_list: EdgeInferencingPreProcessConfig):
     """ """
     ops = []
-    ops.append(DetResizeForTest(**op_param_list.det_resize_for_test))
-    ops.append(NormalizeImage(**op_param_list.normalize_image))
-    if op_param_list.to_chw_image is None:
-        ops.append(ToCHWImage())
+    if op_param_list.fused_resize is None:
+        ops.append(DetResizeForTest(**op_param_list.det_resize_for_test))
     else:
-        ops.append(ToCHWImage(**op_param_list.to_chw_image))
+        ops.append(FusedResizeForTest(**op_param_list.fused_resize))
+    if op_param_list.fused_normalize is not None:
+        ops.append(
+            NormalizeToCHWImage(
+                **op_param_list.normalize_image, **op_param_list.fused_normalize
+            )
+        )
+    else:
+        ops.append(NormalizeImage(**op_param_list.normalize_image))
+        if op_param_list.to_chw_image is None:
+            ops.append(ToCHWImage())
+        else:
+            ops.append(ToCHWImage(**op_param_list.to_chw_image))
     ops.append(KeepKeys(**op_param_list.keep_keys))
     return ops
@@ -0,0 +1,233 @@
+"""
+This module plans the model input size once from the source resolution and the
+model configuration, so that a frame is interpolated a single time instead of
+being resized to the model image size and then resized again by DetResizeForTest.
+
+Optionally the resized frame is padded to one of a few canonical bucket shapes, so
+that the runtimes see a small, stable set of input shapes.
+"""
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class ResizePlan(object):
+    """
+    Target shape of a frame and the ratios DBPostProcess needs to map boxes back.
+    """
+
+    __slots__ = [
+        "src_h",
+        "src_w",
+        "resize_h",
+        "resize_w",
+        "ratio_h",
+        "ratio_w",
+        "bucket_h",
+        "bucket_w",
+        "dest_h",
+        "dest_w",
+    ]
+
+    def __init__(self, src_h: int, src_w: int, resize_h: int, resize_w: int) -> None:
+        """
+        Initialize the ResizePlan.
+
+        @param
+            src_h (int): source frame height
+            src_w (int): source frame width
+            resize_h (int): model input height
+            resize_w (int): model input width
+        """
+        self.src_h = src_h
+        self.src_w = src_w
+        self.resize_h = resize_h
+        self.resize_w = resize_w
+        self.ratio_h = resize_h / float(src_h)
+        self.ratio_w = resize_w / float(src_w)
+        self.bucket_h = None
+        self.bucket_w = None
+        # size of the space the boxes are mapped back to, the source frame by default
+        self.dest_h = src_h
+        self.dest_w = src_w
+
+    def shape(self) -> np.ndarray:
+        """
+        Shape entry in the layout produced by DetResizeForTest. When the input is
+        padded to a bucket the valid height and width are appended, DBPostProcess
+        crops the probability map to them.
+
+        @return
+            np.ndarray: [dest_h, dest_w, ratio_h, ratio_w(, valid_h, valid_w)]
+        """
+        ratio_h = self.resize_h / float(self.dest_h)
+        ratio_w = self.resize_w / float(self.dest_w)
+        if self.bucket_h is None:
+            return np.array([self.dest_h, self.dest_w, ratio_h, ratio_w])
+        return np.array(
+            [
+                self.dest_h,
+                self.dest_w,
+                ratio_h,
+                ratio_w,
+                self.resize_h,
+                self.resize_w,
+            ]
+        )
+
+
+def _align(value: float, stride: int) -> int:
+    return max(int(round(value / stride) * stride), stride)
+
+
+def _align_down(value: float, stride: int) -> int:
+    return max(int(value // stride) * stride, stride)
+
+
+def buckets_from_profile_config(profile_config: List[Dict]) -> List[Tuple[int, int]]:
+    """
+    Use the min, opt and max input shapes of the TensorRT optimization profiles as
+    bucket shapes.
+
+    @param
+        profile_config (List[Dict]): EdgeModelConfig.profile_config
+    @return
+        List[Tuple[int, int]]: distinct (height, width) buckets, smallest first
+    """
+    buckets = set()
+    for profile in profile_config:
+        for shapes in profile.values():
+            for shape in shapes:
+                buckets.add((int(shape[-2]), int(shape[-1])))
+    return sorted(buckets, key=lambda bucket: (bucket[0] * bucket[1], bucket))
+
+
+def select_bucket(
+    height: int, width: int, buckets: List[Tuple[int, int]]
+) -> Optional[Tuple[int, int]]:
+    """
+    Smallest bucket an input of the given size fits in.
+
+    @param
+        height (int): input height
+        width (int): input width
+        buckets (List[Tuple[int, int]]): (height, width) buckets
+    @return
+        Tuple[int, int]: selected bucket, None if the input fits in no bucket
+    """
+    fitting = [bucket for bucket in buckets if bucket[0] >= height and bucket[1] >= width]
+    if not fitting:
+        return None
+    return min(fitting, key=lambda bucket: (bucket[0] * bucket[1], bucket))
+
+
+def plan_resize(
+    src_h: int,
+    src_w: int,
+    image_size: Tuple[int, int],
+    keep_aspect_ratio: bool = True,
+    stride: int = 32,
+) -> ResizePlan:
+    """
+    Compute the single resize that takes a source frame to the model input.
+
+    @param
+        src_h (int): source frame height
+        src_w (int): source frame width
+        image_size (Tuple[int, int]): model image size as (width, height)
+        keep_aspect_ratio (bool): fit the frame inside image_size keeping its aspect
+            ratio instead of stretching it to image_size
+        stride (int): both sides are rounded to a multiple of the network stride
+    @return
+        ResizePlan: planned resize
+    """
+    target_w, target_h = image_size
+    if keep_aspect_ratio:
+        ratio = min(float(target_w) / src_w, float(target_h) / src_h)
+        resize_h = _align(src_h * ratio, stride)
+        resize_w = _align(src_w * ratio, stride)
+    else:
+        resize_h = _align(target_h, stride)
+        resize_w = _align(target_w, stride)
+    return ResizePlan(src_h, src_w, resize_h, resize_w)
+
+
+class FusedResizeForTest(object):
+    """
+    Drop-in replacement for the model image size resize followed by
+    DetResizeForTest, doing one cv2.resize per frame.
+    """
+
+    def __init__(
+        self,
+        image_size=(960, 960),
+        keep_aspect_ratio=True,
+        stride=32,
+        interpolation=cv2.INTER_LINEAR,
+        buckets=None,
+        source_coordinates=True,
+        **kwargs,
+    ):
+        self.image_size = tuple(image_size)
+        # False reports the shape of image_size, so the boxes come back in the space
+        # of the frame stretched to image_size like with the unfused resize
+        self.source_coordinates = source_coordinates
+        self.buckets = [tuple(bucket) for bucket in buckets] if buckets else None
+        self.keep_aspect_ratio = keep_aspect_ratio
+        self.stride = stride
+        self.interpolation = interpolation
+        self._plans: Dict[Tuple[int, int], ResizePlan] = {}
+
+    def plan(self, src_h: int, src_w: int) -> ResizePlan:
+        """
+        Get the resize plan for a source resolution, plans are cached per resolution.
+
+        @param
+            src_h (int): source frame height
+            src_w (int): source frame width
+        @return
+            ResizePlan: planned resize
+        """
+        plan = self._plans.get((src_h, src_w))
+        if plan is None:
+            plan = plan_resize(
+                src_h, src_w, self.image_size, self.keep_aspect_ratio, self.stride
+            )
+            if self.buckets:
+                plan = self._fit_bucket(plan)
+            if not self.source_coordinates:
+                plan.dest_w, plan.dest_h = self.image_size
+            self._plans[(src_h, src_w)] = plan
+        return plan
+
+    def _fit_bucket(self, plan: ResizePlan) -> ResizePlan:
+        bucket = select_bucket(plan.resize_h, plan.resize_w, self.buckets)
+        if bucket is None:
+            # too large for every bucket, shrink it into the largest one
+            bucket = max(self.buckets, key=lambda item: (item[0] * item[1], item))
+            ratio = min(
+                bucket[0] / float(plan.resize_h), bucket[1] / float(plan.resize_w)
+            )
+            plan = ResizePlan(
+                plan.src_h,
+                plan.src_w,
+                min(_align_down(plan.resize_h * ratio, self.stride), bucket[0]),
+                min(_align_down(plan.resize_w * ratio, self.stride), bucket[1]),
+            )
+        plan.bucket_h, plan.bucket_w = bucket
+        return plan
+
+    def __call__(self, data):
+        img = data["image"]
+        src_h, src_w = img.shape[:2]
+        plan = self.plan(src_h, src_w)
+        if (plan.resize_h, plan.resize_w) != (src_h, src_w):
+            img = cv2.resize(
+                img, (plan.resize_w, plan.resize_h), interpolation=self.interpolation
+            )
+        data["image"] = img
+        data["shape"] = plan.shape()
+        if plan.bucket_h is not None:
+            data["bucket"] = (plan.bucket_h, plan.bucket_w)
+        return data
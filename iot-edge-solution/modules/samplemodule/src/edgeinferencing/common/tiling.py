@@ -0,0 +1,246 @@
+"""
+This module splits high resolution frames into overlapping tiles, keeps track of the
+tiles that changed since they were last inferred and merges the boxes found in
+different tiles into boxes of the whole frame.
+"""
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+from src.edgeinferencing.common.box_geometry import order_points_batch
+
+
+def _tile_starts(length: int, tile_size: int, overlap: int) -> List[int]:
+    if length <= tile_size:
+        return [0]
+    stride = max(tile_size - overlap, 1)
+    # the last tile is aligned with the frame edge instead of being cut short
+    return list(range(0, length - tile_size, stride)) + [length - tile_size]
+
+
+def plan_tiles(
+    height: int, width: int, tile_size: int = 1280, overlap: int = 128
+) -> List[Tuple[int, int, int, int]]:
+    """
+    Cover a frame with overlapping tiles of equal size.
+
+    @param
+        height (int): frame height
+        width (int): frame width
+        tile_size (int): side of the square tiles, smaller frames give smaller tiles
+        overlap (int): minimum overlap of neighbouring tiles, should exceed the
+            largest expected text height so every text is whole in one tile
+    @return
+        List[Tuple[int, int, int, int]]: tiles as (x, y, w, h), row by row
+    """
+    tile_w, tile_h = min(tile_size, width), min(tile_size, height)
+    return [
+        (x, y, tile_w, tile_h)
+        for y in _tile_starts(height, tile_size, overlap)
+        for x in _tile_starts(width, tile_size, overlap)
+    ]
+
+
+def merge_tile_boxes(
+    boxes: np.ndarray, tile_ids: np.ndarray, min_overlap: float = 0.5
+) -> np.ndarray:
+    """
+    Merge boxes of different tiles that describe the same text. Two boxes are the
+    same text when the intersection of their bounding rectangles covers at least
+    min_overlap of the smaller one, which is the case for a text found in the overlap
+    of two tiles and for the part of a text cut by a tile seam. A merged box is the
+    minimum area rectangle around all of its boxes.
+
+    @param
+        boxes (np.ndarray): boxes in frame coordinates with shape (K, 4, 2)
+        tile_ids (np.ndarray): tile index of every box with shape (K,)
+        min_overlap (float): minimum intersection over the smaller box area
+    @return
+        np.ndarray: merged int16 boxes with shape (M, 4, 2)
+    """
+    if len(boxes) < 2:
+        return boxes.astype(np.int16).reshape(-1, 4, 2)
+    boxes = boxes.reshape(-1, 4, 2).astype(np.float32)
+    lo, hi = boxes.min(axis=1), boxes.max(axis=1)
+    area = np.prod(np.maximum(hi - lo, 1), axis=1)
+
+    # sweep along x: only pairs whose x ranges overlap are compared, instead of
+    # every pair of the up to thousands of candidates of a frame
+    count = len(boxes)
+    order = np.argsort(lo[:, 0], kind="stable")
+    ends = np.searchsorted(lo[order, 0], hi[order, 0], side="left")
+    pairs = np.maximum(ends - np.arange(count) - 1, 0)
+    first = np.repeat(np.arange(count), pairs)
+    offsets = np.arange(first.size) - np.repeat(np.cumsum(pairs) - pairs, pairs)
+    a, b = order[first], order[first + 1 + offsets]
+    other_tile = tile_ids[a] != tile_ids[b]
+    a, b = a[other_tile], b[other_tile]
+    inter_wh = np.clip(np.minimum(hi[a], hi[b]) - np.maximum(lo[a], lo[b]), 0, None)
+    inter = inter_wh[:, 0] * inter_wh[:, 1]
+    same = inter >= min_overlap * np.minimum(area[a], area[b])
+    a, b = a[same], b[same]
+
+    # connected groups of boxes, by repeated min-label propagation along the pairs
+    labels = np.arange(count)
+    while True:
+        merged = labels.copy()
+        np.minimum.at(merged, a, labels[b])
+        np.minimum.at(merged, b, labels[a])
+        if np.array_equal(merged, labels):
+            break
+        labels = merged
+
+    merged_boxes = []
+    for label in np.unique(labels):
+        group = boxes[labels == label]
+        if len(group) == 1:
+            merged_boxes.append(group[0])
+            continue
+        rect = cv2.minAreaRect(group.reshape(-1, 2))
+        merged_boxes.append(order_points_batch(cv2.boxPoints(rect)[None])[0])
+    return np.round(np.array(merged_boxes)).astype(np.int16)
+
+
+class TileTracker:
+    """
+    Keeps the boxes of every tile of a frame and finds the tiles whose content
+    changed since they were inferred. Changes are measured on a grid of block means
+    of the grayscale frame, computed once per frame.
+    """
+
+    def __init__(
+        self,
+        tile_size: int = 1280,
+        overlap: int = 128,
+        threshold: float = 6.0,
+        cell_size: int = 32,
+        refresh_interval: int = 30,
+    ) -> None:
+        """
+        Initialize the TileTracker.
+
+        @param
+            tile_size (int): side of the square tiles
+            overlap (int): minimum overlap of neighbouring tiles
+            threshold (float): largest change of a block mean, in gray levels, for
+                which a tile is still considered unchanged
+            cell_size (int): side of the blocks changes are measured on
+            refresh_interval (int): every tile is inferred at least once in this
+                many frames
+        """
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.threshold = threshold
+        self.cell_size = cell_size
+        self.refresh_interval = max(1, refresh_interval)
+        self.tiles: List[Tuple[int, int, int, int]] = []
+        self.frames = 0
+        self.tiles_inferred = 0
+        self.tiles_skipped = 0
+        self._frame_shape: Optional[Tuple[int, int]] = None
+        self._cells: List[Tuple[slice, slice]] = []
+        self._grid: Optional[np.ndarray] = None
+        self._references: List[Optional[np.ndarray]] = []
+        self._tile_boxes: List[np.ndarray] = []
+        self._merged: Optional[np.ndarray] = None
+        self._frames_since_refresh = 0
+
+    def _plan(self, height: int, width: int) -> None:
+        self.tiles = plan_tiles(height, width, self.tile_size, self.overlap)
+        grid_w = max(1, -(-width // self.cell_size))
+        grid_h = max(1, -(-height // self.cell_size))
+        self._cells = [
+            (
+                slice(y * grid_h // height, -(-(y + h) * grid_h // height)),
+                slice(x * grid_w // width, -(-(x + w) * grid_w // width)),
+            )
+            for x, y, w, h in self.tiles
+        ]
+        self._references = [None] * len(self.tiles)
+        self._tile_boxes = [np.zeros((0, 4, 2), dtype=np.int16)] * len(self.tiles)
+        self._merged = None
+        self._frame_shape = (height, width)
+
+    def dirty_tiles(self, frame: np.ndarray) -> List[int]:
+        """
+        Find the tiles of the frame that need inference.
+
+        @param
+            frame (np.ndarray): raw frame
+        @return
+            List[int]: indices into tiles
+        """
+        height, width = frame.shape[:2]
+        if self._frame_shape != (height, width):
+            self._plan(height, width)
+        self.frames += 1
+        self._frames_since_refresh += 1
+        refresh = self._frames_since_refresh >= self.refresh_interval
+        if refresh:
+            self._frames_since_refresh = 0
+
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        grid_h, grid_w = -(-height // self.cell_size), -(-width // self.cell_size)
+        self._grid = cv2.resize(
+            gray, (grid_w, grid_h), interpolation=cv2.INTER_AREA
+        ).astype(np.float32)
+
+        dirty = []
+        for index, (rows, cols) in enumerate(self._cells):
+            reference = self._references[index]
+            if (
+                refresh
+                or reference is None
+                or float(cv2.absdiff(self._grid[rows, cols], reference).max())
+                > self.threshold
+            ):
+                dirty.append(index)
+        self.tiles_inferred += len(dirty)
+        self.tiles_skipped += len(self.tiles) - len(dirty)
+        return dirty
+
+    def update(self, index: int, boxes: np.ndarray) -> None:
+        """
+        Store the boxes inferred for a tile of the last frame passed to dirty_tiles.
+
+        @param
+            index (int): index into tiles
+            boxes (np.ndarray): boxes in tile coordinates with shape (K, 4, 2)
+        """
+        x, y, _, _ = self.tiles[index]
+        rows, cols = self._cells[index]
+        self._references[index] = self._grid[rows, cols].copy()
+        boxes = np.asarray(boxes, dtype=np.int16).reshape(-1, 4, 2)
+        self._tile_boxes[index] = boxes + np.array([x, y], dtype=np.int16)
+        self._merged = None
+
+    def boxes(self) -> np.ndarray:
+        """
+        Boxes of the whole frame, merged across tile seams.
+
+        @return
+            np.ndarray: int16 boxes in frame coordinates with shape (K, 4, 2)
+        """
+        if self._merged is None:
+            tile_ids = np.concatenate(
+                [
+                    np.full(len(boxes), index)
+                    for index, boxes in enumerate(self._tile_boxes)
+                ]
+            )
+            self._merged = merge_tile_boxes(
+                np.concatenate(self._tile_boxes, axis=0), tile_ids
+            )
+        return self._merged
+
+    def summary(self) -> str:
+        """
+        One line summary of the tracker counters.
+
+        @return
+            str: summary
+        """
+        return (
+            f"frames: {self.frames}, tiles: {len(self.tiles)}, "
+            f"inferred: {self.tiles_inferred}, skipped: {self.tiles_skipped}"
+        )
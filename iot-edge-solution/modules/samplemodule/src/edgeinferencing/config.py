@@ -1,4 +1,6 @@
 """This module is used to provide the configurations for edge text detection."""
+import json
+from typing import Dict
 
 
 class EdgeInferencingPreProcessConfig:
@@ -11,6 +13,7 @@ class EdgeInferencingPreProcessConfig:
         Initialize the configuration.
         """
         self.det_resize_for_test = {}
+        self.fused_resize = None
         self.normalize_image = {
             "std": [0.229, 0.224, 0.225],
             "mean": [0.485, 0.456, 0.406],
@@ -18,9 +21,81 @@ class EdgeInferencingPreProcessConfig:
             "order": "hwc",
         }
         self.to_chw_image = None
+        self.fused_normalize = None
         self.keep_keys = {"keep_keys": ["image", "shape"]}
 
 
+class OrtSessionConfig:
+    """
+    Configurations class for the ONNX Runtime inference session.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize the configuration with the ONNX Runtime defaults.
+        """
+        # 0 lets ONNX Runtime pick the number of threads
+        self.intra_op_num_threads = 0
+        self.inter_op_num_threads = 0
+        # "sequential" or "parallel"
+        self.execution_mode = "sequential"
+        # "disable", "basic", "extended" or "all"
+        self.graph_optimization_level = "all"
+        self.enable_cpu_mem_arena = True
+        self.enable_mem_pattern = True
+        self.providers = ["CPUExecutionProvider"]
+        self.enable_profiling = False
+
+    def to_dict(self) -> Dict:
+        """
+        Dictionary representation of the configuration.
+
+        @return
+            Dict: configuration values
+        """
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, values: Dict) -> "OrtSessionConfig":
+        """
+        Create a configuration from a dictionary, unknown keys are rejected.
+
+        @param
+            values (Dict): configuration values
+        @return
+            OrtSessionConfig: configuration
+        """
+        config = cls()
+        for key, value in values.items():
+            if not hasattr(config, key):
+                raise ValueError(f"Unknown ONNX Runtime session option: {key}")
+            setattr(config, key, value)
+        return config
+
+    @classmethod
+    def load(cls, path: str) -> "OrtSessionConfig":
+        """
+        Load a configuration written by the autotune command.
+
+        @param
+            path (str): path to the JSON file
+        @return
+            OrtSessionConfig: configuration
+        """
+        with open(path) as config_file:
+            return cls.from_dict(json.load(config_file))
+
+    def save(self, path: str) -> None:
+        """
+        Write the configuration as JSON.
+
+        @param
+            path (str): path to the JSON file
+        """
+        with open(path, "w") as config_file:
+            json.dump(self.to_dict(), config_file, indent=4)
+
+
 class EdgeModelConfig:
     """
     Class for edge model configurations.
@@ -36,9 +111,90 @@ class EdgeModelConfig:
         """
         self.original_model_path = original_model_path
         self.engine_path = engine_path
+        # name of the inference backend in the runtime registry, None reads the
+        # INFERENCE_BACKEND and USE_TENSOR_RT environment variables
+        self.backend = None
         self.image_size = (960, 960)
+        # (height, width) of the camera frames, the warm-up runs the model input
+        # shapes these frames are resized to
+        self.warm_up_frame_sizes = [(1080, 1920)]
+        self.fused_resize = True
+        # False stretches every frame to image_size, the shape the TensorRT profiles
+        # are built around. True fits the frame inside image_size, 960x544 for 16:9
+        # cameras, which is below the minimum profile shape unless shape_bucketing
+        # pads it
+        self.keep_aspect_ratio = False
+        # boxes are in the coordinates of the frame resized to image_size, True maps
+        # them back to the source frame
+        self.boxes_in_source_frame = False
+        self.fused_normalize = True
+        # pad the resized frame to the smallest fitting (height, width) bucket so
+        # the runtimes only see a few input shapes, requires the fused resize and
+        # normalize, None uses the min/opt/max shapes of profile_config
+        self.shape_bucketing = False
+        self.shape_buckets = None
+        self.ort_session = OrtSessionConfig()
+        # keep the graph-optimized ONNX model on disk for faster starts, None stores
+        # it next to original_model_path
+        self.ort_model_cache = True
+        self.ort_model_cache_dir = None
         self.fp16 = True
+        # TensorRT plans are cached keyed by model, profiles, precision, TensorRT
+        # version and GPU, None stores them next to engine_path, the least recently
+        # used plans beyond trt_plan_cache_size are evicted
+        self.trt_plan_cache_dir = None
+        self.trt_plan_cache_size = 2
         self.dynamic_shape = True
+        # number of inputs the backend runs at once for TextDetection.submit, ONNX
+        # Runtime sessions on a thread pool, TensorRT with an execution context,
+        # optimization profiles and CUDA stream each
+        self.max_in_flight = 2
+        # upper bound for TextDetection.run_batch, the TensorRT engine lowers it to
+        # the largest batch dimension of profile_config, 1 with the default profiles
+        self.max_batch_size = 4
+        # run the DB post-processing of TextDetection.submit and the pipeline on this
+        # many worker processes, 0 runs it on the calling thread, the workers are
+        # pinned to post_process_cpu_affinity round robin when it is set
+        self.post_process_workers = 0
+        self.post_process_cpu_affinity = None
+        # split high resolution frames into overlapping tiles and only re-infer the
+        # tiles that changed, tile_size should be the optimal profile_config shape
+        # and must lie inside its min and max shapes for TensorRT
+        self.tiled = False
+        self.tile_size = 1280
+        self.tile_overlap = 128
+        self.tile_change_threshold = 6.0
+        self.tile_refresh_interval = 30
         self.profile_config = [
             {"x": [(1, 3, 960, 960), (1, 3, 1280, 1280), (1, 3, 1536, 1536)]}
         ]
+
+    def max_profile_batch_size(self) -> int:
+        """
+        Largest batch the TensorRT optimization profiles accept for every input.
+
+        @return
+            int: smallest maximum batch dimension of the profiles
+        """
+        return min(
+            int(shapes[-1][0])
+            for profile in self.profile_config
+            for shapes in profile.values()
+        )
+
+    def profile_accepts(self, height: int, width: int) -> bool:
+        """
+        Whether an input of the given size lies inside the min and max shapes of one
+        of the TensorRT optimization profiles.
+
+        @param
+            height (int): input height
+            width (int): input width
+        @return
+            bool: True if a profile accepts the input
+        """
+        for profile in self.profile_config:
+            min_shape, _, max_shape = list(profile.values())[0]
+            if min_shape[-2] <= height <= max_shape[-2] and min_shape[-1] <= width <= max_shape[-1]:
+                return True
+        return False
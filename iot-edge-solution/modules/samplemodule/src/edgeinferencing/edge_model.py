@@ -1,12 +1,28 @@
 """This module is used to provide the edge model for text detection."""
-from typing import List
+import asyncio
+from collections import deque
+from concurrent.futures import Future, wait
+from typing import List, Optional, Tuple
 import numpy as np
 import cv2
-import time
-from src.edgeinferencing.runtime import Engine
+from src.common.metrics import (
+    METRICS,
+    STAGE_EMIT,
+    STAGE_POSTPROCESS,
+    STAGE_RESIZE,
+    STAGE_TRANSFORM,
+)
+from src.common.utils import get_inference_backend
 from src.edgeinferencing.config import EdgeModelConfig, EdgeInferencingPreProcessConfig
 from src.edgeinferencing.common.preprocess_operator import create_operators, transform
 from src.edgeinferencing.common.postprocess_db import DBPostProcess
+from src.edgeinferencing.common.postprocess_pool import PostProcessPool
+from src.edgeinferencing.common.tiling import TileTracker, plan_tiles
+from src.edgeinferencing.common.resize_planner import (
+    FusedResizeForTest,
+    buckets_from_profile_config,
+)
+from src.edgeinferencing.warmup import latencies_stable, warm_up
 
 EDGE_MODEL_DB_THRESHOLD = 0.3
 EDGE_MODEL_DB_BOX_THRESHOLD = 0.5
@@ -14,6 +30,37 @@ EDGE_MODEL_DB_MAX_CANDIDATE = 1000
 EDGE_MODEL_DB_UNCLIP_RATIO = 2
 EDGE_MODEL_DB_USE_DILATION = 0
 EDGE_MODEL_DB_SCORE_MODE = "fast"
+EDGE_MODEL_DB_VECTORIZED = True
+
+
+def _copy_future(source: Future, target: Future, convert=None) -> None:
+    """
+    Resolve target with the outcome of the finished source future.
+
+    @param
+        source (Future): finished future
+        target (Future): future to resolve
+        convert (Callable): applied to the result of source, None keeps it
+    """
+    error = source.exception()
+    if error is not None:
+        target.set_exception(error)
+    else:
+        result = source.result()
+        target.set_result(convert(result) if convert is not None else result)
+
+
+# backend class of every TextDetection, None selects EdgeModelConfig.backend from
+# the registry, which imports the runtime when the first TextDetection is created
+Engine = None
+
+
+def _backend_class(model_config: EdgeModelConfig) -> type:
+    if Engine is not None:
+        return Engine
+    from src.edgeinferencing.runtime.registry import get_backend
+
+    return get_backend(model_config.backend or get_inference_backend())
 
 
 class TextDetection:
@@ -30,17 +77,65 @@ class TextDetection:
 
         @param
         """
-        self.pre_processors = create_operators(EdgeInferencingPreProcessConfig())
-        self.post_process_op = DBPostProcess(
-            thresh=EDGE_MODEL_DB_THRESHOLD,
-            box_thresh=EDGE_MODEL_DB_BOX_THRESHOLD,
-            max_candidates=EDGE_MODEL_DB_MAX_CANDIDATE,
-            score_mode=EDGE_MODEL_DB_SCORE_MODE,
-            unclip_ratio=EDGE_MODEL_DB_UNCLIP_RATIO,
-            use_dilation=EDGE_MODEL_DB_USE_DILATION,
-        )
-        self.engine = Engine(model_config)
+        pre_process_config = EdgeInferencingPreProcessConfig()
+        if model_config.fused_resize:
+            pre_process_config.fused_resize = {
+                "image_size": model_config.image_size,
+                "keep_aspect_ratio": model_config.keep_aspect_ratio,
+                "source_coordinates": model_config.boxes_in_source_frame,
+            }
+            if model_config.shape_bucketing:
+                pre_process_config.fused_resize["buckets"] = (
+                    model_config.shape_buckets
+                    or buckets_from_profile_config(model_config.profile_config)
+                )
+        if model_config.fused_normalize:
+            pre_process_config.fused_normalize = {
+                "num_buffers": model_config.max_batch_size + 1
+            }
+        self.pre_processors = create_operators(pre_process_config)
+        self.tile_pre_processors = None
+        self.tile_tracker = None
+        if model_config.tiled:
+            # tiles are cut from the full resolution frame and go to the model as is
+            tile_pre_process_config = EdgeInferencingPreProcessConfig()
+            # tiles of frames smaller than a tile are padded, so every tile reaches
+            # the engine as tile_size x tile_size
+            tile_pre_process_config.fused_resize = {
+                "image_size": (model_config.tile_size, model_config.tile_size),
+                "keep_aspect_ratio": True,
+                "buckets": [(model_config.tile_size, model_config.tile_size)],
+            }
+            tile_pre_process_config.fused_normalize = {
+                "num_buffers": model_config.max_batch_size + 1
+            }
+            self.tile_pre_processors = create_operators(tile_pre_process_config)
+            self.tile_tracker = TileTracker(
+                tile_size=model_config.tile_size,
+                overlap=model_config.tile_overlap,
+                threshold=model_config.tile_change_threshold,
+                refresh_interval=model_config.tile_refresh_interval,
+            )
+        self.post_process_kwargs = {
+            "thresh": EDGE_MODEL_DB_THRESHOLD,
+            "box_thresh": EDGE_MODEL_DB_BOX_THRESHOLD,
+            "max_candidates": EDGE_MODEL_DB_MAX_CANDIDATE,
+            "score_mode": EDGE_MODEL_DB_SCORE_MODE,
+            "unclip_ratio": EDGE_MODEL_DB_UNCLIP_RATIO,
+            "use_dilation": EDGE_MODEL_DB_USE_DILATION,
+            "vectorized": EDGE_MODEL_DB_VECTORIZED,
+        }
+        self.post_process_op = DBPostProcess(**self.post_process_kwargs)
+        # started by initialize when model_config.post_process_workers is set
+        self.post_process_pool: Optional[PostProcessPool] = None
+        self.engine = _backend_class(model_config)(model_config)
         self.model_config = model_config
+        self.metrics = METRICS
+        # True once warm_up stabilised the latencies, set by the caller when the
+        # warm-up is skipped
+        self.ready = False
+        # futures of submit in submission order, None until the first submit
+        self._in_flight: Optional[deque] = None
 
     def initialize(self):
         """
@@ -49,6 +144,125 @@ class TextDetection:
         print("Initializing Engine")
         self.engine.initialize()
         print("Finished Initializing Engine")
+        if self.model_config.post_process_workers > 0 and self.post_process_pool is None:
+            print(
+                f"Starting {self.model_config.post_process_workers} post-processing "
+                f"workers, CPU affinity: {self.model_config.post_process_cpu_affinity}"
+            )
+            self.post_process_pool = PostProcessPool(
+                self.post_process_kwargs,
+                workers=self.model_config.post_process_workers,
+                cpu_affinity=self.model_config.post_process_cpu_affinity,
+                max_map_shape=(1, 1) + self._max_map_size(),
+                stats=self.post_process_op.stats,
+            )
+
+    def _max_map_size(self) -> Tuple[int, int]:
+        """
+        Largest (height, width) of a single-frame probability map.
+
+        @return
+            Tuple[int, int]: height and width
+        """
+        sizes = [tuple(self.model_config.image_size)]
+        if self.model_config.shape_bucketing or self.model_config.tiled:
+            sizes += [shape[-2:] for shape in self.warm_up_shapes()]
+        return max(size[0] for size in sizes), max(size[1] for size in sizes)
+
+    def close(self) -> None:
+        """
+        Wait for the submitted frames and stop the engine threads and the
+        post-processing workers.
+        """
+        self.engine.close()
+        if self.post_process_pool is not None:
+            self.post_process_pool.close()
+            self.post_process_pool = None
+
+    def warm_up_shapes(self, batch_size: int = 1) -> List[Tuple[int, int, int]]:
+        """
+        Input shapes the engine will see: the shapes the pre-processing resizes
+        frames of model_config.warm_up_frame_sizes to and every shape bucket when
+        bucketing is on, or the shapes the tile pre-processing gives the tiles of
+        those frames in tiled mode. Each shape is listed for a single input and for
+        the batches _run_batched stacks.
+
+        @param
+            batch_size (int): largest number of frames given to run_batch at once,
+                ignored in tiled mode where the batches follow from the tiles
+        @return
+            List[Tuple[int, int, int]]: (batch, height, width) input shapes
+        """
+        shapes = []
+        max_batch_size = self.batch_size()
+        if self.tile_tracker is None:
+            resize = self.pre_processors[0]
+            sizes = []
+            for height, width in self.model_config.warm_up_frame_sizes:
+                if isinstance(resize, FusedResizeForTest):
+                    plan = resize.plan(height, width)
+                    if plan.bucket_h is not None:
+                        sizes.append((plan.bucket_h, plan.bucket_w))
+                    else:
+                        sizes.append((plan.resize_h, plan.resize_w))
+                else:
+                    frame = np.zeros((height, width, 3), dtype=np.uint8)
+                    img, _ = self.preprocess(frame)
+                    sizes.append(tuple(img.shape[2:]))
+            # the buckets are only used by the fused resize
+            sizes += [tuple(bucket) for bucket in getattr(resize, "buckets", None) or []]
+            batches = [1, min(max(1, batch_size), max_batch_size)]
+            shapes = [(batch,) + size for size in sizes for batch in batches]
+        else:
+            tile_resize = self.tile_pre_processors[0]
+            tile_size, overlap = self.model_config.tile_size, self.model_config.tile_overlap
+            for height, width in self.model_config.warm_up_frame_sizes:
+                tiles = plan_tiles(height, width, tile_size, overlap)
+                plan = tile_resize.plan(tiles[0][3], tiles[0][2])
+                size = (plan.bucket_h, plan.bucket_w)
+                # the first frame runs every tile: full batches and the remainder,
+                # later frames only run the few tiles that changed
+                batches = [1, min(max_batch_size, len(tiles)), len(tiles) % max_batch_size]
+                shapes += [(batch,) + size for batch in batches if batch > 0]
+        # distinct shapes in the order they were found
+        return list(dict.fromkeys(shapes))
+
+    def warm_up(
+        self,
+        shapes: Optional[List[Tuple[int, int, int]]] = None,
+        max_runs: int = 20,
+        tolerance: float = 0.2,
+        batch_size: int = 1,
+    ) -> bool:
+        """
+        Run synthetic inputs of every input shape through the engine so arenas are
+        allocated and kernels selected before the first frame, and mark the model
+        ready once the latency of every shape has stabilised.
+
+        @param
+            shapes (List[Tuple[int, int, int]]): (batch, height, width) input shapes,
+                defaults to warm_up_shapes(batch_size)
+            max_runs (int): maximum number of runs per shape
+            tolerance (float): allowed spread of the last runs relative to their median
+            batch_size (int): largest number of frames given to run_batch at once
+        @return
+            bool: whether the model is ready
+        """
+        shapes = shapes if shapes is not None else self.warm_up_shapes(batch_size)
+        print(f"Warming up engine for input shapes: {shapes}")
+        report = warm_up(self.infer, shapes, max_runs=max_runs, tolerance=tolerance)
+        ready = True
+        for shape, latencies in report.items():
+            stable = latencies_stable(latencies, tolerance=tolerance)
+            ready = ready and stable
+            print(
+                f"Warm-up {'x'.join(str(side) for side in shape)}: first run "
+                f"{latencies[0]:.1f} ms, last run {latencies[-1]:.1f} ms after "
+                f"{len(latencies)} runs" + ("" if stable else ", not stabilised")
+            )
+        self.ready = ready
+        print(f"Model ready: {self.ready}")
+        return self.ready
 
     def _pre_process(self, image: np.ndarray) -> np.ndarray:
         """
@@ -59,33 +273,204 @@ class TextDetection:
         @return
             image (np.ndarray): pre-processed image
         """
-        return cv2.resize(image, self.model_config.image_size)
+        if self.model_config.fused_resize:
+            # the fused resize operator takes the frame to the model size in one step
+            return image
+        with self.metrics.timer(STAGE_RESIZE):
+            return cv2.resize(image, self.model_config.image_size)
 
-    def _process(self, image: np.ndarray) -> List:
+    def _transform(self, image: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Run inference on image.
+        Transform a resized image into a batch of one model input.
 
         @param
-            image (np.ndarray): image to be processed
+            image (np.ndarray): image returned by _pre_process
         @return
-            boxes (List): list of bounding boxes
+            img (np.ndarray): model input with shape (1, 3, H, W)
+            shape_list (np.ndarray): resize information with shape (1, 4)
         """
         data = {"image": image}
-        data = transform(data, self.pre_processors)
+        with self.metrics.timer(STAGE_TRANSFORM):
+            data = transform(data, self.pre_processors)
         img, shape_list = data
-        img = np.expand_dims(img, axis=0)
         shape_list = np.expand_dims(shape_list, axis=0)
-        test_in = img.copy()
-        start_time = time.time()
-        output_buffer = self.engine.inference_single(test_in, profiling=False)
-        time_taken = time.time() - start_time
-        output_shape = list(test_in.shape)
+        if img.ndim == 4:
+            # already a contiguous (1, 3, H, W) buffer from NormalizeToCHWImage
+            return img, shape_list
+        img = np.expand_dims(img, axis=0)
+        return img.copy(), shape_list
+
+    def reserve_input_buffers(self, count: int) -> None:
+        """
+        Make sure count pre-processed inputs of the same shape can be alive at once.
+
+        The fused pre-processing writes into reusable buffers, callers that keep
+        several inputs in flight (pipeline queues, batches) must reserve them.
+
+        @param
+            count (int): number of inputs alive at once
+        """
+        for op in self.pre_processors + (self.tile_pre_processors or []):
+            if hasattr(op, "reserve"):
+                op.reserve(count)
+
+    def post_process_summary(self) -> str:
+        """
+        Summary of the frames post-processing skipped or restricted to an ROI.
+
+        @return
+            str: summary
+        """
+        return self.post_process_op.stats.summary()
+
+    def preprocess(self, image: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pre-process a raw frame into a model input.
+
+        @param
+            image (np.ndarray): raw frame
+        @return
+            img (np.ndarray): model input with shape (1, 3, H, W)
+            shape_list (np.ndarray): resize information with shape (1, 4)
+        """
+        return self._transform(self._pre_process(image))
+
+    def infer(self, img: np.ndarray) -> np.ndarray:
+        """
+        Run the engine on a pre-processed model input.
+
+        @param
+            img (np.ndarray): model input with shape (N, 3, H, W)
+        @return
+            results (np.ndarray): probability map with shape (N, 1, H, W)
+        """
+        return self._probability_map(self.engine.infer(img), img.shape)
+
+    def _probability_map(self, output_buffer: List, input_shape: Tuple) -> np.ndarray:
+        output_shape = list(input_shape)
         output_shape[1] = 1
-        results = np.reshape(output_buffer[0], output_shape)
-        post_proc_results = self.post_process_op(results, shape_list)
-        dt_boxes = post_proc_results[0]["points"]
+        return np.reshape(output_buffer[0], output_shape)
+
+    def submit(self, image: np.ndarray) -> Future:
+        """
+        Pre-process a raw frame on the calling thread and run inference and
+        post-processing in the background, so the next frame can be pre-processed
+        while the engine works. At most model_config.max_in_flight frames are in
+        flight, submit waits for the oldest one beyond that.
 
-        print(f"Bounding boxes detected: {len(dt_boxes)}, time taken: {time_taken}")
+        @param
+            image (np.ndarray): raw frame
+        @return
+            Future: resolves to the bounding boxes
+        """
+        if self.tile_tracker is not None:
+            # the tile tracker keeps per-frame state, tiled frames run in order
+            future = Future()
+            future.set_result(self.run_tiled(image))
+            return future
+        max_in_flight = self.engine.max_in_flight
+        if self._in_flight is None:
+            self._in_flight = deque()
+            self.reserve_input_buffers(max_in_flight)
+        # only the oldest futures are released, so the reusable input buffers of
+        # the frames still in flight are never overwritten
+        while self._in_flight and (
+            self._in_flight[0].done() or len(self._in_flight) >= max_in_flight
+        ):
+            wait([self._in_flight.popleft()])
+
+        img, shape_list = self.preprocess(image)
+        result = Future()
+
+        def post_process(inference: Future) -> None:
+            try:
+                results = self._probability_map(inference.result(), img.shape)
+                boxes = self.postprocess_async(results, shape_list)
+                self.metrics.increment("frames_inferred")
+            except Exception as e:
+                result.set_exception(e)
+                return
+            boxes.add_done_callback(lambda done: _copy_future(done, result))
+
+        self.engine.submit(img).add_done_callback(post_process)
+        self._in_flight.append(result)
+        return result
+
+    async def run_async(self, image: np.ndarray) -> np.ndarray:
+        """
+        Await the boxes of a raw frame, inference and post-processing run off the
+        event loop, pre-processing runs in it like in submit.
+
+        @param
+            image (np.ndarray): raw frame
+        @return
+            boxes (np.ndarray): bounding boxes
+        """
+        return await asyncio.wrap_future(self.submit(image))
+
+    def postprocess(self, results: np.ndarray, shape_list: np.ndarray) -> List:
+        """
+        Extract bounding boxes from the probability map.
+
+        @param
+            results (np.ndarray): probability map with shape (1, 1, H, W)
+            shape_list (np.ndarray): resize information with shape (1, 4)
+        @return
+            boxes (List): list of bounding boxes
+        """
+        with self.metrics.timer(STAGE_POSTPROCESS):
+            post_proc_results = self.post_process_op(results, shape_list)
+        return post_proc_results[0]["points"]
+
+    def postprocess_async(
+        self, results: np.ndarray, shape_list: np.ndarray, stream: str = "default"
+    ) -> Future:
+        """
+        Extract bounding boxes from the probability map on the post-processing
+        workers, or right away when there are none. Futures of a stream resolve in
+        submission order.
+
+        @param
+            results (np.ndarray): probability map with shape (1, 1, H, W)
+            shape_list (np.ndarray): resize information with shape (1, 4)
+            stream (str): stream the frame belongs to
+        @return
+            Future: resolves to the list of bounding boxes
+        """
+        boxes = Future()
+        if self.post_process_pool is None:
+            boxes.set_result(self.postprocess(results, shape_list))
+            return boxes
+        batch = self.post_process_pool.submit(results, shape_list, stream)
+        batch.add_done_callback(lambda done: _copy_future(done, boxes, lambda value: value[0]))
+        return boxes
+
+    def _emit(self, message) -> None:
+        """
+        Log a per-frame message for the sampled frames only, printing every frame
+        is a noticeable cost under load.
+
+        @param
+            message (Callable): returns the message, only called when logging
+        """
+        with self.metrics.timer(STAGE_EMIT):
+            if self.metrics.sample_frame():
+                print(message())
+
+    def _process(self, image: np.ndarray) -> List:
+        """
+        Run inference on image.
+
+        @param
+            image (np.ndarray): image to be processed
+        @return
+            boxes (List): list of bounding boxes
+        """
+        img, shape_list = self._transform(image)
+        results = self.infer(img)
+        dt_boxes = self.postprocess(results, shape_list)
+        self.metrics.increment("frames_inferred")
+        self._emit(lambda: f"Bounding boxes detected: {len(dt_boxes)}")
 
         return dt_boxes
 
@@ -98,6 +483,132 @@ class TextDetection:
         @return
             result (TextDetectionResult): result output
         """
+        if self.tile_tracker is not None:
+            return self.run_tiled(image)
         image = self._pre_process(image)
         boxes = self._process(image)
         return boxes
+
+    def run_tiled(self, image: np.ndarray) -> np.ndarray:
+        """
+        Run inference on the tiles of the image that changed since they were last
+        inferred, in batches, and merge the boxes of all tiles.
+
+        @param
+            image (np.ndarray): raw frame
+        @return
+            boxes (np.ndarray): bounding boxes in frame coordinates
+        """
+        dirty = self.tile_tracker.dirty_tiles(image)
+        if dirty:
+            tiles = [self.tile_tracker.tiles[index] for index in dirty]
+            crops = [image[y : y + h, x : x + w] for x, y, w, h in tiles]  # noqa E203
+            boxes_per_tile = self._run_batched(crops, self._preprocess_tile)
+            for index, boxes in zip(dirty, boxes_per_tile):
+                self.tile_tracker.update(index, boxes)
+        dt_boxes = self.tile_tracker.boxes()
+        if not self.model_config.boxes_in_source_frame:
+            dt_boxes = self._scale_to_image_size(dt_boxes, image.shape)
+        self._emit(
+            lambda: f"Bounding boxes detected: {len(dt_boxes)}, "
+            f"tiles inferred: {len(dirty)}/{len(self.tile_tracker.tiles)}"
+        )
+        return dt_boxes
+
+    def _scale_to_image_size(self, boxes: np.ndarray, frame_shape: Tuple) -> np.ndarray:
+        """
+        Map boxes in frame coordinates to the frame resized to image_size, the box
+        space of the full-frame path.
+
+        @param
+            boxes (np.ndarray): boxes with shape (K, 4, 2)
+            frame_shape (Tuple): shape of the frame
+        @return
+            np.ndarray: int16 boxes with shape (K, 4, 2)
+        """
+        width, height = self.model_config.image_size
+        scale = np.array([width / frame_shape[1], height / frame_shape[0]])
+        return np.round(boxes * scale).astype(np.int16)
+
+    def _preprocess_tile(self, tile: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        with self.metrics.timer(STAGE_TRANSFORM):
+            data = transform({"image": tile}, self.tile_pre_processors)
+        img, shape_list = data
+        return img, np.expand_dims(shape_list, axis=0)
+
+    def batch_size(self) -> int:
+        """
+        Number of frames stacked into one engine call: model_config.max_batch_size,
+        lowered to the largest batch the engine accepts.
+
+        @return
+            int: batch size
+        """
+        max_batch_size = max(1, self.model_config.max_batch_size)
+        engine_max_batch_size = getattr(self.engine, "max_batch_size", None)
+        if engine_max_batch_size is not None:
+            max_batch_size = min(max_batch_size, engine_max_batch_size)
+        return max_batch_size
+
+    def run_batch(self, images: List[np.ndarray]) -> List:
+        """
+        Run inference on several images with as few engine calls as possible.
+
+        Frames whose model inputs share a shape are stacked into one tensor of at most
+        batch_size() frames, and the results are split back per frame.
+
+        @param
+            images (List[np.ndarray]): raw frames
+        @return
+            boxes (List): list of bounding boxes for every frame, in input order
+        """
+        return self._run_batched(images, self.preprocess)
+
+    def _run_batched(self, images: List[np.ndarray], preprocess) -> List:
+        """
+        Pre-process images and run them grouped by input shape.
+
+        @param
+            images (List[np.ndarray]): raw frames or tiles
+            preprocess (Callable): returns (img, shape_list) for an image
+        @return
+            boxes (List): list of bounding boxes for every image, in input order
+        """
+        groups = {}
+        boxes_per_image = [None] * len(images)
+        max_batch_size = self.batch_size()
+        for index, image in enumerate(images):
+            img, shape_list = preprocess(image)
+            group = groups.setdefault(img.shape, [])
+            group.append((index, img, shape_list))
+            if len(group) == max_batch_size:
+                # run full batches right away so that at most max_batch_size
+                # inputs of a shape are alive in the reusable buffers
+                self._run_chunk(group, boxes_per_image)
+                group.clear()
+        for group in groups.values():
+            if group:
+                self._run_chunk(group, boxes_per_image)
+
+        return boxes_per_image
+
+    def _run_chunk(self, chunk: List, boxes_per_image: List) -> None:
+        """
+        Run one stacked engine call and store the boxes per frame.
+
+        @param
+            chunk (List): (index, img, shape_list) tuples sharing an input shape
+            boxes_per_image (List): output list indexed by frame index
+        """
+        if len(chunk) == 1:
+            img, shape_list = chunk[0][1], chunk[0][2]
+        else:
+            img = np.concatenate([item[1] for item in chunk], axis=0)
+            shape_list = np.concatenate([item[2] for item in chunk], axis=0)
+        results = self.infer(img)
+        with self.metrics.timer(STAGE_POSTPROCESS):
+            post_proc_results = self.post_process_op(results, shape_list)
+        for (index, _, _), post_proc_result in zip(chunk, post_proc_results):
+            boxes_per_image[index] = post_proc_result["points"]
+        self.metrics.increment("frames_inferred", len(chunk))
+        self._emit(lambda: f"Batch of {len(chunk)} frames")
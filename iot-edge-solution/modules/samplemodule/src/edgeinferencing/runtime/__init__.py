@@ -2,9 +2,17 @@
 from os import getenv
 
 USE_TENSOR_RT = getenv("USE_TENSOR_RT", "False") == "True"
-if USE_TENSOR_RT:
-    from src.edgeinferencing.runtime.trtruntime.engine import Engine
-else:
-    from src.edgeinferencing.runtime.onnxruntime.engine import Engine
 
-print(f"USE_TENSOR_RT: {USE_TENSOR_RT}. Imported engine file: {Engine.__module__}")
+
+def __getattr__(name):
+    # the backend is imported on first access of Engine, importing onnxruntime or
+    # TensorRT and CUDA takes a noticeable part of the start up time
+    if name != "Engine":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from src.common.utils import get_inference_backend
+    from src.edgeinferencing.runtime.registry import get_backend
+
+    Engine = get_backend(get_inference_backend())
+    print(f"USE_TENSOR_RT: {USE_TENSOR_RT}. Imported engine file: {Engine.__module__}")
+    globals()["Engine"] = Engine
+    return Engine
@@ -0,0 +1,171 @@
+"""This module is used to provide the interface every inference backend implements."""
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from src.common.metrics import METRICS, STAGE_INFERENCE
+from src.edgeinferencing.config import EdgeModelConfig
+from src.edgeinferencing.warmup import warm_up
+
+
+class InferenceBackend:
+    """
+    Base class of the inference backends. A backend implements initialize and
+    _run, the base class times the runs and provides warm-up, batching, stats and
+    asynchronous submission. Up to max_in_flight submitted inputs run at once on a
+    thread pool, so _run must be thread safe.
+    """
+
+    # name the backend is registered under
+    name = "base"
+    # largest batch a single run accepts, None when the backend has no limit
+    max_batch_size: Optional[int] = None
+
+    def __init__(self, config: EdgeModelConfig) -> None:
+        """
+        Initialize the backend.
+
+        @param
+            config (EdgeModelConfig): configuration for the backend
+        """
+        self.max_in_flight = max(1, config.max_in_flight)
+        self.inferences = 0
+        self.images = 0
+        self.total_ms = 0.0
+        self.metrics = METRICS
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def initialize(self) -> None:
+        """
+        Load the model, called once before the first inference.
+        """
+        raise NotImplementedError
+
+    def _run(self, input_data: np.ndarray) -> List:
+        """
+        Run the model on one model input.
+
+        @param
+            input_data (np.ndarray): model input with shape (N, 3, H, W)
+        @return
+            List: model outputs, the first with shape (N, 1, H, W)
+        """
+        raise NotImplementedError
+
+    def infer(self, input_data: np.ndarray) -> List:
+        """
+        Run the model on one model input.
+
+        @param
+            input_data (np.ndarray): model input with shape (N, 3, H, W)
+        @return
+            List: model outputs, the first with shape (N, 1, H, W)
+        """
+        start_time = time.perf_counter_ns()
+        outputs = self._run(input_data)
+        elapsed_ns = time.perf_counter_ns() - start_time
+        self.metrics.record(STAGE_INFERENCE, elapsed_ns)
+        with self._lock:
+            self.total_ms += elapsed_ns / 1e6
+            self.inferences += 1
+            self.images += input_data.shape[0]
+        return outputs
+
+    def submit(self, input_data: np.ndarray) -> Future:
+        """
+        Run the model on one model input in the background. The input must not be
+        modified until the future is done.
+
+        @param
+            input_data (np.ndarray): model input with shape (N, 3, H, W)
+        @return
+            Future: resolves to the model outputs
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_in_flight, thread_name_prefix=self.name
+                )
+        return self._executor.submit(self.infer, input_data)
+
+    async def infer_async(self, input_data: np.ndarray) -> List:
+        """
+        Run the model on one model input without blocking the event loop.
+
+        @param
+            input_data (np.ndarray): model input with shape (N, 3, H, W)
+        @return
+            List: model outputs
+        """
+        return await asyncio.wrap_future(self.submit(input_data))
+
+    def close(self) -> None:
+        """
+        Wait for the submitted inputs and stop the submission threads.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def infer_batch(self, inputs: List[np.ndarray]) -> List[List]:
+        """
+        Run the model on several model inputs of the same shape in one call.
+
+        @param
+            inputs (List[np.ndarray]): model inputs with shape (1, 3, H, W)
+        @return
+            List[List]: model outputs of every input
+        """
+        outputs = self.infer(np.concatenate(inputs, axis=0))
+        return [
+            [output[index : index + 1] for output in outputs]  # noqa E203
+            for index in range(len(inputs))
+        ]
+
+    def inference_single(self, input_data: np.ndarray, profiling: bool = False) -> List:
+        """
+        Alias of infer for callers of the former engine classes.
+
+        @param
+            input_data (np.ndarray): model input with shape (N, 3, H, W)
+            profiling (bool): ignored
+        @return
+            List: model outputs
+        """
+        return self.infer(input_data)
+
+    def warm_up(
+        self,
+        shapes: List[Tuple[int, int]],
+        max_runs: int = 20,
+        tolerance: float = 0.2,
+    ) -> Dict[Tuple[int, int], List[float]]:
+        """
+        Run synthetic inputs of every shape until the latency stops changing.
+
+        @param
+            shapes (List[Tuple[int, int]]): (height, width) input shapes
+            max_runs (int): maximum number of runs per shape
+            tolerance (float): allowed spread of the last runs relative to their median
+        @return
+            Dict[Tuple[int, int], List[float]]: latencies in milliseconds per shape
+        """
+        return warm_up(self.infer, shapes, max_runs=max_runs, tolerance=tolerance)
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        """
+        Counters of the runs since the backend was created.
+
+        @return
+            Dict: backend name, number of runs and images and the mean run latency
+        """
+        return {
+            "backend": self.name,
+            "inferences": self.inferences,
+            "images": self.images,
+            "mean_ms": self.total_ms / self.inferences if self.inferences else None,
+        }
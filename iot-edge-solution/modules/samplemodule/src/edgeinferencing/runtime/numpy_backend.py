@@ -0,0 +1,80 @@
+"""
+This module is used to provide a deterministic NumPy stand-in for the text detection
+model, so the whole pipeline can be tested and benchmarked without onnxruntime,
+TensorRT or an accelerator.
+
+The probability map marks strong local contrast, which is where text strokes are:
+the gradient magnitude of the channel mean, smoothed with a box filter and squashed
+into [0, 1). It is not a text detector, but it produces boxes around high contrast
+regions with a cost proportional to the number of pixels.
+"""
+from typing import List
+
+import numpy as np
+from src.edgeinferencing.config import EdgeModelConfig
+from src.edgeinferencing.runtime.backend import InferenceBackend
+
+
+def _box_filter(image: np.ndarray, radius: int) -> np.ndarray:
+    """
+    Mean over a (2 * radius + 1) square window along the last two axes.
+
+    @param
+        image (np.ndarray): images with shape (N, H, W)
+        radius (int): window radius in pixels
+    @return
+        np.ndarray: filtered images with the same shape
+    """
+    size = 2 * radius + 1
+    padded = np.pad(image, ((0, 0), (radius + 1, radius), (radius + 1, radius)), "edge")
+    integral = padded.cumsum(axis=1).cumsum(axis=2)
+    window = (
+        integral[:, size:, size:]
+        - integral[:, :-size, size:]
+        - integral[:, size:, :-size]
+        + integral[:, :-size, :-size]
+    )
+    return window / (size * size)
+
+
+class NumpyBackend(InferenceBackend):
+    """
+    Deterministic CPU reference backend.
+    """
+
+    name = "numpy"
+
+    def __init__(self, config: EdgeModelConfig, radius: int = 2, gain: float = 2.0) -> None:
+        """
+        Initialize the NumpyBackend.
+
+        @param
+            config (EdgeModelConfig): configuration for the backend
+            radius (int): radius of the smoothing window in pixels
+            gain (float): scale of the smoothed gradient before squashing
+        """
+        super().__init__(config)
+        self.radius = radius
+        self.gain = gain
+
+    def initialize(self) -> None:
+        """
+        Nothing to load.
+        """
+
+    def _run(self, input_data: np.ndarray) -> List:
+        """
+        Compute the probability map of a model input.
+
+        @param
+            input_data (np.ndarray): model input with shape (N, 3, H, W)
+        @return
+            List: probability map with shape (N, 1, H, W)
+        """
+        gray = input_data.mean(axis=1, dtype=np.float32)
+        gradient = np.zeros_like(gray)
+        gradient[:, :, 1:] += np.abs(np.diff(gray, axis=2))
+        gradient[:, 1:, :] += np.abs(np.diff(gray, axis=1))
+        smoothed = _box_filter(gradient, self.radius)
+        prob = 1.0 - np.exp(-self.gain * smoothed)
+        return [prob[:, None].astype(np.float32)]
@@ -0,0 +1,174 @@
+"""
+This module sweeps the ONNX Runtime session options on a model and writes the
+fastest configuration as JSON, which can be loaded with OrtSessionConfig.load or
+through the ORT_SESSION_CONFIG environment variable.
+
+Run it from the samplemodule directory:
+
+    python -m src.edgeinferencing.runtime.onnxruntime.autotune \\
+        --model local_data/ch_pp_inf_dynamic.onnx \\
+        --output local_data/ort_session_config.json
+
+The options are tuned one at a time (coordinate descent) starting from the ONNX
+Runtime defaults, which needs far fewer sessions than the full grid.
+"""
+import argparse
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import onnxruntime
+from onnxruntime import InferenceSession
+from src.edgeinferencing.config import EdgeModelConfig, OrtSessionConfig
+from src.edgeinferencing.runtime.onnxruntime.engine import build_session_options
+
+# a candidate has to beat the current best by this much to replace it, so timing
+# noise does not flip options back and forth
+MIN_IMPROVEMENT = 0.03
+
+# options that only take effect when another option has a given value, they are not
+# swept otherwise as every candidate would build the same session
+REQUIRED_OPTIONS = {"inter_op_num_threads": ("execution_mode", "parallel")}
+
+
+def search_space(
+    cpu_count: int, available_providers: List[str]
+) -> List[Tuple[str, List]]:
+    """
+    Candidate values for every tuned session option.
+
+    @param
+        cpu_count (int): number of CPU cores
+        available_providers (List[str]): execution providers of the installed runtime
+    @return
+        List[Tuple[str, List]]: (option name, candidate values) in tuning order
+    """
+    provider_lists = [["CPUExecutionProvider"]]
+    for accelerated in [
+        ["CUDAExecutionProvider"],
+        ["TensorrtExecutionProvider", "CUDAExecutionProvider"],
+    ]:
+        if all(provider in available_providers for provider in accelerated):
+            provider_lists.append(accelerated + ["CPUExecutionProvider"])
+    # 0 is the ONNX Runtime default
+    threads = [count for count in sorted({0, 1, 2, 4, cpu_count}) if count <= cpu_count]
+    return [
+        ("providers", provider_lists),
+        ("graph_optimization_level", ["all", "extended", "basic"]),
+        ("intra_op_num_threads", threads),
+        ("execution_mode", ["sequential", "parallel"]),
+        ("inter_op_num_threads", threads),
+        ("enable_cpu_mem_arena", [True, False]),
+        ("enable_mem_pattern", [True, False]),
+    ]
+
+
+def measure_latency(
+    model_path: str,
+    session_config: OrtSessionConfig,
+    input_shape: Tuple[int, ...],
+    runs: int = 10,
+    warm_up_runs: int = 2,
+) -> float:
+    """
+    Median latency of a session built with the given configuration.
+
+    @param
+        model_path (str): path to the ONNX model
+        session_config (OrtSessionConfig): session configuration
+        input_shape (Tuple[int, ...]): model input shape
+        runs (int): number of timed runs
+        warm_up_runs (int): number of untimed runs before timing
+    @return
+        float: median latency in milliseconds
+    """
+    sess = InferenceSession(
+        model_path,
+        sess_options=build_session_options(session_config),
+        providers=session_config.providers,
+    )
+    input_name = sess.get_inputs()[0].name
+    output_names = [output.name for output in sess.get_outputs()]
+    img = np.random.RandomState(0).standard_normal(input_shape).astype(np.float32)
+    for _ in range(warm_up_runs):
+        sess.run(output_names, {input_name: img})
+    latencies = []
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        sess.run(output_names, {input_name: img})
+        latencies.append((time.perf_counter() - start_time) * 1000.0)
+    return float(np.median(latencies))
+
+
+def autotune(
+    measure: Callable[[OrtSessionConfig], float],
+    space: List[Tuple[str, List]],
+    base: Optional[OrtSessionConfig] = None,
+) -> Tuple[OrtSessionConfig, List[Dict]]:
+    """
+    Tune one option at a time, keeping the fastest value before moving on.
+
+    @param
+        measure (Callable): returns the latency of a configuration
+        space (List[Tuple[str, List]]): (option name, candidate values)
+        base (OrtSessionConfig): starting configuration, defaults to OrtSessionConfig()
+    @return
+        best (OrtSessionConfig): fastest configuration found
+        results (List[Dict]): every measured configuration with its latency
+    """
+    best = base if base is not None else OrtSessionConfig()
+    best_latency = measure(best)
+    results = [dict(best.to_dict(), latency_ms=best_latency)]
+    print(f"Baseline: {best_latency:.1f} ms")
+    for name, candidates in space:
+        required = REQUIRED_OPTIONS.get(name)
+        if required is not None and getattr(best, required[0]) != required[1]:
+            print(f"{name}: skipped, only used with {required[0]}={required[1]}")
+            continue
+        for value in candidates:
+            if value == getattr(best, name):
+                continue
+            candidate = OrtSessionConfig.from_dict(dict(best.to_dict(), **{name: value}))
+            try:
+                latency = measure(candidate)
+            except Exception as e:
+                print(f"{name}={value}: failed with {e}")
+                continue
+            results.append(dict(candidate.to_dict(), latency_ms=latency))
+            print(f"{name}={value}: {latency:.1f} ms")
+            if latency < best_latency * (1.0 - MIN_IMPROVEMENT):
+                best, best_latency = candidate, latency
+    print(f"Best: {best_latency:.1f} ms with {best.to_dict()}")
+    return best, results
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Tune ONNX Runtime session options")
+    image_width, image_height = EdgeModelConfig("", "").image_size
+    parser.add_argument("--model", default="local_data/ch_pp_inf_dynamic.onnx")
+    parser.add_argument("--output", default="local_data/ort_session_config.json")
+    parser.add_argument(
+        "--shape",
+        type=int,
+        nargs=2,
+        default=[image_height, image_width],
+        metavar=("HEIGHT", "WIDTH"),
+        help="model input height and width, defaults to the image_size of "
+        "EdgeModelConfig",
+    )
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    space = search_space(os.cpu_count() or 1, onnxruntime.get_available_providers())
+    input_shape = (1, 3, args.shape[0], args.shape[1])
+    best, _ = autotune(
+        lambda config: measure_latency(args.model, config, input_shape, args.runs),
+        space,
+    )
+    best.save(args.output)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
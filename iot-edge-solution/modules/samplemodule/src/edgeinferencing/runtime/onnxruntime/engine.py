@@ -1,17 +1,72 @@
 """This module is used to provide the local text detection engine without CUDA and TensorRT and it can run on AMD."""
 from pathlib import Path
 from typing import List
-from src.edgeinferencing.config import EdgeModelConfig
-from onnxruntime import InferenceSession, SessionOptions
+from src.edgeinferencing.config import EdgeModelConfig, OrtSessionConfig
+from src.edgeinferencing.runtime.backend import InferenceBackend
+from src.edgeinferencing.runtime.onnxruntime.model_cache import OptimizedModelCache
+from onnxruntime import (
+    ExecutionMode,
+    GraphOptimizationLevel,
+    InferenceSession,
+    SessionOptions,
+)
 
 import numpy as np
 
+EXECUTION_MODES = {
+    "sequential": ExecutionMode.ORT_SEQUENTIAL,
+    "parallel": ExecutionMode.ORT_PARALLEL,
+}
+GRAPH_OPTIMIZATION_LEVELS = {
+    "disable": GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "basic": GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
 
-class Engine:
+
+def build_session_options(
+    session_config: OrtSessionConfig, profiling: bool = False
+) -> SessionOptions:
+    """
+    Translate the session configuration into ONNX Runtime SessionOptions.
+
+    @param
+        session_config (OrtSessionConfig): session configuration
+        profiling (bool): turn profiling on regardless of the configuration
+    @return
+        SessionOptions: session options
+    """
+    if session_config.execution_mode not in EXECUTION_MODES:
+        raise ValueError(
+            f"Execution mode must be in {list(EXECUTION_MODES)} "
+            f"but got: {session_config.execution_mode}"
+        )
+    if session_config.graph_optimization_level not in GRAPH_OPTIMIZATION_LEVELS:
+        raise ValueError(
+            f"Graph optimization level must be in {list(GRAPH_OPTIMIZATION_LEVELS)} "
+            f"but got: {session_config.graph_optimization_level}"
+        )
+    so = SessionOptions()
+    so.intra_op_num_threads = session_config.intra_op_num_threads
+    so.inter_op_num_threads = session_config.inter_op_num_threads
+    so.execution_mode = EXECUTION_MODES[session_config.execution_mode]
+    so.graph_optimization_level = GRAPH_OPTIMIZATION_LEVELS[
+        session_config.graph_optimization_level
+    ]
+    so.enable_cpu_mem_arena = session_config.enable_cpu_mem_arena
+    so.enable_mem_pattern = session_config.enable_mem_pattern
+    so.enable_profiling = session_config.enable_profiling or profiling
+    return so
+
+
+class Engine(InferenceBackend):
     """
     Engine class using ONNX Runtime
     """
 
+    name = "onnxruntime"
+
     def __init__(self, config: EdgeModelConfig) -> None:
         """
         Initialize Engine
@@ -20,7 +75,12 @@ class Engine:
             config (EdgeModelConfig): configuration for the engine
             logger (Logger): logger for the engine
         """
+        super().__init__(config)
         self._original_model_path = config.original_model_path
+        self._session_config = config.ort_session
+        self._model_cache = config.ort_model_cache
+        self._model_cache_dir = config.ort_model_cache_dir
+        self.sess = None
 
     def initialize(self):
         """
@@ -44,11 +104,42 @@ class Engine:
             raise ValueError(f"ONNX file not found at {self._original_model_path}")
         print("Loading ONNX file from path {}...".format(self._original_model_path))
 
-        so = SessionOptions()
-        so.enable_profiling = profiling
-        self.sess = InferenceSession(
-            self._original_model_path, providers=["CPUExecutionProvider"]
-        )
+        cache = None
+        # optimized models of the CPU provider only, graphs partitioned for other
+        # providers are not portable
+        if self._model_cache and self._session_config.providers == [
+            "CPUExecutionProvider"
+        ]:
+            cache = OptimizedModelCache(
+                self._original_model_path, self._session_config, self._model_cache_dir
+            )
+
+        self.sess = None
+        if cache is not None and cache.exists():
+            so = build_session_options(self._session_config, profiling)
+            # the cached graph is already optimized
+            so.graph_optimization_level = GraphOptimizationLevel.ORT_DISABLE_ALL
+            try:
+                self.sess = InferenceSession(
+                    cache.path, sess_options=so, providers=self._session_config.providers
+                )
+                print(f"Loaded optimized model from cache {cache.path}")
+            except Exception as e:
+                print(f"Failed to load cached model {cache.path}, rebuilding: {e}")
+                cache.invalidate()
+
+        if self.sess is None:
+            so = build_session_options(self._session_config, profiling)
+            if cache is not None:
+                so.optimized_model_filepath = cache.temp_path
+            self.sess = InferenceSession(
+                self._original_model_path,
+                sess_options=so,
+                providers=self._session_config.providers,
+            )
+            if cache is not None and cache.commit():
+                print(f"Saved optimized model to cache {cache.path}")
+        print(f"ONNX Runtime session options: {self._session_config.to_dict()}")
 
         self.outputs = self.sess.get_outputs()
         self.output_names = list(map(lambda output: output.name, self.outputs))
@@ -72,3 +163,6 @@ class Engine:
         detections = self.sess.run(self.output_names, {self.input_name: input_data})
 
         return detections
+
+    def _run(self, input_data: np.ndarray) -> List:
+        return self.inference_single(input_data)
@@ -0,0 +1,114 @@
+"""
+This module keeps the graph-optimized model produced by ONNX Runtime on disk, so
+later starts load the optimized graph instead of optimizing the source model again.
+
+The cache file name carries a key derived from the source model hash, the ONNX
+Runtime version, the machine and the session options that shape the optimized
+graph, so a cached model is never used with anything it was not optimized for and
+stale files are replaced.
+"""
+import glob
+import hashlib
+import json
+import os
+import platform
+from pathlib import Path
+from typing import Optional
+
+import onnxruntime
+from src.common.utils import file_sha256
+from src.edgeinferencing.config import OrtSessionConfig
+
+CACHE_SUFFIX = ".optimized.onnx"
+# session options that change the optimized graph, threading, the memory arena and
+# memory patterns or profiling only change how the graph is run
+GRAPH_OPTIONS = ["graph_optimization_level", "providers"]
+
+
+def cache_key(model_path: str, session_config: OrtSessionConfig) -> str:
+    """
+    Key of the optimized model for a source model and session configuration.
+
+    @param
+        model_path (str): path to the source ONNX model
+        session_config (OrtSessionConfig): session configuration
+    @return
+        str: 16 hex characters
+    """
+    options = session_config.to_dict()
+    options = {name: options[name] for name in GRAPH_OPTIONS}
+    key = {
+        "model": file_sha256(model_path),
+        "onnxruntime": onnxruntime.__version__,
+        "machine": platform.machine(),
+        "options": options,
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()[:16]
+
+
+class OptimizedModelCache:
+    """
+    Location and life cycle of the cached optimized model of one source model.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        session_config: OrtSessionConfig,
+        cache_dir: Optional[str] = None,
+    ) -> None:
+        """
+        Initialize the OptimizedModelCache.
+
+        @param
+            model_path (str): path to the source ONNX model
+            session_config (OrtSessionConfig): session configuration
+            cache_dir (str): directory of the cache files, defaults to the model's
+        """
+        model = Path(model_path)
+        self.cache_dir = Path(cache_dir) if cache_dir else model.parent
+        self.stem = model.stem
+        self.key = cache_key(model_path, session_config)
+        self.path = str(self.cache_dir / f"{self.stem}.{self.key}{CACHE_SUFFIX}")
+        # per process, so concurrent starts do not write into the same file
+        self.temp_path = f"{self.path}.{os.getpid()}.tmp"
+
+    def exists(self) -> bool:
+        """
+        Whether an optimized model for the current key is cached.
+
+        @return
+            bool: True if the cache file exists
+        """
+        return os.path.exists(self.path)
+
+    def commit(self) -> bool:
+        """
+        Move the optimized model ONNX Runtime wrote to temp_path into place and
+        remove the files of other keys.
+
+        @return
+            bool: True if a model was committed
+        """
+        if not os.path.exists(self.temp_path):
+            return False
+        os.replace(self.temp_path, self.path)
+        self.evict_stale()
+        return True
+
+    def evict_stale(self) -> None:
+        """
+        Remove cached models of the same source model with a different key.
+        """
+        pattern = str(self.cache_dir / f"{self.stem}.*{CACHE_SUFFIX}")
+        for path in glob.glob(pattern):
+            if path != self.path:
+                os.remove(path)
+
+    def invalidate(self) -> None:
+        """
+        Remove the cached model of the current key, e.g. after it failed to load.
+        """
+        for path in [self.path, self.temp_path]:
+            if os.path.exists(path):
+                os.remove(path)
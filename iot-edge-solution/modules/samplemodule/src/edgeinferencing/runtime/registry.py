@@ -0,0 +1,81 @@
+"""
+This module keeps the inference backends by name. The built-in backends are
+registered as "module:attribute" strings and only imported when they are selected,
+other packages add backends with register_backend or through the
+"edgeinferencing.backends" entry point group, e.g. in setup.cfg:
+
+    [options.entry_points]
+    edgeinferencing.backends =
+        openvino = my_package.openvino_backend:OpenVinoBackend
+"""
+import importlib
+from typing import Dict, List, Union
+
+ENTRY_POINT_GROUP = "edgeinferencing.backends"
+
+_BACKENDS: Dict[str, Union[str, type]] = {
+    "onnxruntime": "src.edgeinferencing.runtime.onnxruntime.engine:Engine",
+    "tensorrt": "src.edgeinferencing.runtime.trtruntime.engine:Engine",
+    "numpy": "src.edgeinferencing.runtime.numpy_backend:NumpyBackend",
+}
+
+
+def _entry_points() -> Dict[str, object]:
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:  # Python 3.7
+        return {}
+    eps = entry_points()
+    if hasattr(eps, "select"):
+        group = eps.select(group=ENTRY_POINT_GROUP)
+    else:
+        group = eps.get(ENTRY_POINT_GROUP, [])
+    return {entry_point.name: entry_point for entry_point in group}
+
+
+def register_backend(name: str, backend: Union[str, type]) -> None:
+    """
+    Register a backend, replacing any backend of the same name.
+
+    @param
+        name (str): backend name, e.g. for INFERENCE_BACKEND
+        backend (Union[str, type]): InferenceBackend subclass or its
+            "module:attribute" path, which is imported when the backend is selected
+    """
+    _BACKENDS[name] = backend
+
+
+def available_backends() -> List[str]:
+    """
+    Names of the registered and entry point backends.
+
+    @return
+        List[str]: backend names
+    """
+    return sorted(set(_BACKENDS) | set(_entry_points()))
+
+
+def get_backend(name: str) -> type:
+    """
+    Import and return the backend class registered under the name.
+
+    @param
+        name (str): backend name
+    @return
+        type: backend class
+    """
+    if name in _BACKENDS:
+        backend = _BACKENDS[name]
+        if isinstance(backend, str):
+            module_name, attribute = backend.split(":")
+            backend = getattr(importlib.import_module(module_name), attribute)
+            _BACKENDS[name] = backend
+        return backend
+    entry_points = _entry_points()
+    if name in entry_points:
+        backend = entry_points[name].load()
+        _BACKENDS[name] = backend
+        return backend
+    raise ValueError(
+        f"Inference backend must be in {available_backends()} but got: {name}"
+    )
@@ -0,0 +1,187 @@
+"""
+This module keeps the pinned host buffers, device buffers and CUDA stream of a
+TensorRT execution context alive across inference calls.
+
+The CUDA and TensorRT modules are passed in instead of imported, so the allocation
+logic can be exercised against fakes on machines without a GPU.
+"""
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+class HostDeviceMem(object):
+    """
+    Helper class for allocating host and device memory.
+    """
+
+    def __init__(self, host_mem, device_mem) -> None:
+        """
+        Initialize the HostDeviceMem
+
+        @param
+            host_mem (np.ndarray): host memory
+            device_mem (cuda.DeviceAllocation): device memory
+        """
+        self.host = host_mem
+        self.device = device_mem
+
+    def __str__(self) -> str:
+        """
+        String representation of the HostDeviceMem
+
+        @return
+            str: string representation of the HostDeviceMem
+        """
+        return "Host:\n" + str(self.host) + "\nDevice:\n" + str(self.device)
+
+    def __repr__(self) -> str:
+        """
+        String representation of the HostDeviceMem
+
+        @return
+            str: string representation of the HostDeviceMem
+        """
+        return self.__str__()
+
+
+class BindingBuffers(object):
+    """
+    Persistent I/O buffers and stream for one TensorRT execution context.
+
+    Buffers are sized for the maximum shape of the optimization profile the first
+    time the profile is used, and only reallocated when a larger shape arrives.
+    """
+
+    def __init__(self, trt_engine, cuda_module, trt_module) -> None:
+        """
+        Initialize the BindingBuffers.
+
+        @param
+            trt_engine (trt.ICudaEngine): deserialized engine
+            cuda_module (module): pycuda.driver or a compatible fake
+            trt_module (module): tensorrt or a compatible fake
+        """
+        self._engine = trt_engine
+        self._cuda = cuda_module
+        self._trt = trt_module
+        self.stream = None
+        self.allocations = 0
+        self._buffers: Dict[int, HostDeviceMem] = {}
+        self._input_binding_idx = 0
+        self._profile_idx = None
+        self._input_shape = None
+        self._sized_profiles = set()
+
+    def _binding_indices(self) -> List[int]:
+        # with several optimization profiles every profile has its own copy of the
+        # bindings, profile k owns the k-th block of bindings_per_profile indices
+        profiles = getattr(self._engine, "num_optimization_profiles", 1)
+        bindings_per_profile = self._engine.num_bindings // profiles
+        start = (self._profile_idx or 0) * bindings_per_profile
+        return list(range(start, start + bindings_per_profile))
+
+    def _allocate(self, binding_idx: int, size: int) -> HostDeviceMem:
+        old = self._buffers.get(binding_idx)
+        if old is not None:
+            old.device.free()
+        dtype = self._trt.nptype(self._engine.get_binding_dtype(binding_idx))
+        host_mem = self._cuda.pagelocked_empty(size, dtype)
+        device_mem = self._cuda.mem_alloc(host_mem.nbytes)
+        self.allocations += 1
+        buffer = HostDeviceMem(host_mem, device_mem)
+        self._buffers[binding_idx] = buffer
+        return buffer
+
+    def _binding_sizes(self, context) -> Dict[int, int]:
+        return {
+            idx: abs(int(self._trt.volume(context.get_binding_shape(idx))))
+            for idx in self._binding_indices()
+        }
+
+    def _ensure_capacity(self, context, profile_idx: int, input_shape: Tuple) -> None:
+        sizes = self._binding_sizes(context)
+        if profile_idx not in self._sized_profiles:
+            # first use of the profile: size everything for its maximum shape
+            _, _, max_shape = self._engine.get_profile_shape(
+                profile_idx, self._input_binding_idx
+            )
+            context.set_binding_shape(self._input_binding_idx, tuple(max_shape))
+            max_sizes = self._binding_sizes(context)
+            context.set_binding_shape(self._input_binding_idx, input_shape)
+            sizes = {idx: max(size, max_sizes[idx]) for idx, size in sizes.items()}
+            self._sized_profiles.add(profile_idx)
+        for idx, size in sizes.items():
+            buffer = self._buffers.get(idx)
+            if buffer is None or buffer.host.size < size:
+                self._allocate(idx, size)
+
+    def prepare(self, context, input_shape: Tuple, profile_idx: int = 0) -> List[int]:
+        """
+        Select the profile and input shape on the context and make sure the buffers
+        are large enough, only touching the context when something changed.
+
+        @param
+            context (trt.IExecutionContext): execution context owning the buffers
+            input_shape (Tuple): shape of the next input
+            profile_idx (int): index of the optimization profile
+        @return
+            List[int]: device pointers of every binding
+        """
+        if self.stream is None:
+            self.stream = self._cuda.Stream()
+        input_shape = tuple(input_shape)
+        if profile_idx != self._profile_idx:
+            context.set_optimization_profile_async(profile_idx, self.stream.handle)
+            self._profile_idx = profile_idx
+            for idx in self._binding_indices():
+                if self._engine.binding_is_input(idx):
+                    self._input_binding_idx = idx
+            self._input_shape = None
+        if input_shape != self._input_shape:
+            context.set_binding_shape(self._input_binding_idx, input_shape)
+            self._ensure_capacity(context, profile_idx, input_shape)
+            self._input_shape = input_shape
+        # bindings of the other profiles are unused
+        bindings = [0] * self._engine.num_bindings
+        for idx in self._binding_indices():
+            bindings[idx] = int(self._buffers[idx].device)
+        return bindings
+
+    def infer(self, context, input_data: np.ndarray, profile_idx: int = 0) -> List:
+        """
+        Copy the input to the device, run the context and copy the outputs back.
+
+        @param
+            context (trt.IExecutionContext): execution context owning the buffers
+            input_data (np.ndarray): model input
+            profile_idx (int): index of the optimization profile
+        @return
+            List: flat output arrays, copied out of the reusable host buffers
+        """
+        bindings = self.prepare(context, input_data.shape, profile_idx)
+        input_buffer = self._buffers[self._input_binding_idx]
+        input_host = input_buffer.host[: input_data.size]
+        np.copyto(input_host.reshape(input_data.shape), input_data, casting="unsafe")
+        self._cuda.memcpy_htod_async(input_buffer.device, input_host, self.stream)
+        context.execute_async_v2(bindings=bindings, stream_handle=self.stream.handle)
+        output_hosts = []
+        for idx in self._binding_indices():
+            if self._engine.binding_is_input(idx):
+                continue
+            size = abs(int(self._trt.volume(context.get_binding_shape(idx))))
+            output_host = self._buffers[idx].host[:size]
+            self._cuda.memcpy_dtoh_async(output_host, self._buffers[idx].device, self.stream)
+            output_hosts.append(output_host)
+        self.stream.synchronize()
+        return [output_host.copy() for output_host in output_hosts]
+
+    def free(self) -> None:
+        """
+        Release the device buffers.
+        """
+        for buffer in self._buffers.values():
+            buffer.device.free()
+        self._buffers = {}
+        self._input_shape = None
+        self._sized_profiles = set()
@@ -1,20 +1,31 @@
 """This module is used to provide the local text detection engine with CUDA and TensorRT and it can run on ARM."""
+import queue
 from pathlib import Path
 import tensorrt as trt
 import pycuda.driver as cuda
 import numpy as np
 from src.edgeinferencing.config import EdgeModelConfig
-from typing import List
+from src.edgeinferencing.runtime.backend import InferenceBackend
+from src.edgeinferencing.runtime.trtruntime.buffers import BindingBuffers
+from src.edgeinferencing.runtime.trtruntime.plan_cache import (
+    PlanCache,
+    plan_cache_key,
+    plan_metadata,
+)
+from typing import Dict, List, Optional
 
 TRT_LOGGER = trt.Logger()
 EXPLICIT_BATCH = 1 << (int)(trt.NetworkDefinitionCreationFlag.EXPLICIT_BATCH)
+MAX_WORKSPACE_SIZE = 1 << 28  # 256MiB
 
 
-class Engine:
+class Engine(InferenceBackend):
     """
     Engine class using TensorRT and CUDA
     """
 
+    name = "tensorrt"
+
     def __init__(self, config: EdgeModelConfig) -> None:
         """
         Initialize the engine
@@ -22,22 +33,77 @@ class Engine:
         @param
             logger (Logger): logger for the engine
         """
+        super().__init__(config)
         self._original_model_path = config.original_model_path
         self._engine_path = config.engine_path
         self._profile_config = config.profile_config
+        self._fp16 = config.fp16
+        # batches run with one of the profiles, larger batches are split
+        self.max_batch_size = config.max_profile_batch_size()
+        if config.max_batch_size > self.max_batch_size:
+            print(
+                f"WARN: max_batch_size {config.max_batch_size} is larger than the batch "
+                f"dimension of profile_config, batches are limited to {self.max_batch_size}"
+            )
+        if config.tiled and not config.profile_accepts(config.tile_size, config.tile_size):
+            raise ValueError(
+                f"tile_size {config.tile_size} is outside the input shapes of "
+                f"profile_config {config.profile_config}"
+            )
+        # plans are cached next to engine_path as <engine stem>.<key>.engine
+        engine_path = Path(config.engine_path)
+        self._plan_cache = PlanCache(
+            config.trt_plan_cache_dir or str(engine_path.parent),
+            engine_path.stem,
+            config.trt_plan_cache_size,
+        )
         self._trt_engine = None
         self._trt_context = None
+        self._buffers = None
+        # one execution context, set of optimization profiles and CUDA stream per
+        # input in flight, a profile can only be used by one context at a time
+        self._slots: "queue.Queue" = queue.Queue()
 
         self.ctx = None
 
-    def _build_engine(self):
+    def _plan_metadata(self) -> Dict:
+        """
+        Metadata of the plan this engine needs, for the plan cache.
+
+        @return
+            Dict: plan metadata
+        """
+        device = cuda.Device(0)
+        major, minor = device.compute_capability()
+        return plan_metadata(
+            self._original_model_path,
+            self._profile_config,
+            "fp16" if self._fp16 else "fp32",
+            trt.__version__,
+            device.name(),
+            f"{major}.{minor}",
+            builder={
+                "max_workspace_size": MAX_WORKSPACE_SIZE,
+                "contexts": self.max_in_flight,
+            },
+        )
+
+    def _load_plan(self, plan_path: str) -> Optional[object]:
+        print("Reading engine from file {}".format(plan_path))
+        try:
+            with open(plan_path, "rb") as f, trt.Runtime(TRT_LOGGER) as runtime:
+                return runtime.deserialize_cuda_engine(f.read())
+        except Exception as e:
+            print(f"WARN: Failed to deserialize {plan_path}: {e}")
+            return None
+
+    def _build_plan(self) -> Optional[bytes]:
         # https://github.com/NVIDIA/TensorRT/blob/main/samples/python/engine_refit_onnx_bidaf/build_and_refit_engine.py
 
         builder = trt.Builder(TRT_LOGGER)
         builder.max_batch_size = 1
         network = builder.create_network(EXPLICIT_BATCH)
         parser = trt.OnnxParser(network, TRT_LOGGER)
-        runtime = trt.Runtime(TRT_LOGGER)
 
         print("Loading ONNX file from path {}...".format(self._original_model_path))
         with open(self._original_model_path, "rb") as model:
@@ -52,10 +118,12 @@ class Engine:
         # network.get_input(0).shape = [10, 1]
 
         config = builder.create_builder_config()
-        config.set_flag(trt.BuilderFlag.FP16)
-        config.max_workspace_size = 1 << 28  # 256MiB
+        if self._fp16:
+            config.set_flag(trt.BuilderFlag.FP16)
+        config.max_workspace_size = MAX_WORKSPACE_SIZE
 
-        for profile_config in self._profile_config:
+        # the profiles are repeated for every execution context
+        for profile_config in self._profile_config * self.max_in_flight:
             profile = builder.create_optimization_profile()
             for layer_name, shape_list in profile_config.items():
                 min_shape, opt_shape, max_shape = shape_list
@@ -69,12 +137,8 @@ class Engine:
         )
 
         plan = builder.build_serialized_network(network, config)
-        engine = runtime.deserialize_cuda_engine(plan)
         print("Completed creating Engine")
-
-        with open(self._engine_path, "wb") as f:
-            f.write(plan)
-        return engine
+        return bytes(plan) if plan is not None else None
 
     def initialize(self):
         """
@@ -90,18 +154,39 @@ class Engine:
         """
         get inference engine and execution context
         """
-        if Path(self._engine_path).exists():
-            # If a serialized engine exists, use it instead of building an engine.
-            print("Reading engine from file {}".format(self._engine_path))
-            with open(self._engine_path, "rb") as f, trt.Runtime(TRT_LOGGER) as runtime:
-                self._trt_engine = runtime.deserialize_cuda_engine(f.read())
+        metadata = self._plan_metadata()
+        plan_path = self._plan_cache.lookup(metadata)
+        if plan_path is not None:
+            # If a plan was built for this model, GPU and TensorRT, use it instead
+            # of building an engine.
+            self._trt_engine = self._load_plan(plan_path)
+            if self._trt_engine is None:
+                self._plan_cache.invalidate(plan_cache_key(metadata))
 
         if self._trt_engine is None:
             print(
                 "WARN: Failed to load engine, creating new engine, it may take a while..."
             )
-            self._trt_engine = self._build_engine()
-        self._trt_context = self._trt_engine.create_execution_context()
+            plan = self._build_plan()
+            if plan is None:
+                raise RuntimeError(
+                    f"Failed to build an engine from {self._original_model_path}"
+                )
+            plan_path = self._plan_cache.store(metadata, plan)
+            self._trt_engine = self._load_plan(plan_path)
+            if self._trt_engine is None:
+                self._plan_cache.invalidate(plan_cache_key(metadata))
+                raise RuntimeError(
+                    f"Failed to deserialize the engine built from "
+                    f"{self._original_model_path}"
+                )
+        for slot in range(self.max_in_flight):
+            context = self._trt_engine.create_execution_context()
+            buffers = BindingBuffers(self._trt_engine, cuda, trt)
+            self._slots.put((slot, context, buffers))
+            if slot == 0:
+                self._trt_context = context
+                self._buffers = buffers
 
     def inference_single(
         self, input_data: np.ndarray, profile_idx: int = 0, profiling: bool = False
@@ -117,75 +202,23 @@ class Engine:
         @return
             List: list of prediction output data
         """
-        input_shape = input_data.shape
-        dim_mul = input_shape[-1] * input_shape[-2]
         if not self._trt_engine:
             self.get_engine()
-        # with self._trt_engine.create_execution_context() as trt_context:
-        inputs = []
-        outputs = []
-        bindings = []
-        input_binding_idx = 0
-        if profiling:
-            profiler = trt.tensorrt.Profiler()
-            self._trt_context.profiler = profiler
-        for idx, binding in enumerate(self._trt_engine):
-            size = abs(trt.volume(self._trt_engine.get_binding_shape(binding)))
-            size *= self._trt_engine.max_batch_size * dim_mul
-            dtype = trt.nptype(self._trt_engine.get_binding_dtype(binding))
-            host_mem = cuda.pagelocked_empty(size, dtype)
-            device_mem = cuda.mem_alloc(host_mem.nbytes)
-            bindings.append(int(device_mem))
-            if self._trt_engine.binding_is_input(binding):
-                input_binding_idx = idx
-                inputs.append(HostDeviceMem(host_mem, device_mem))
-            else:
-                outputs.append(HostDeviceMem(host_mem, device_mem))
-        stream = cuda.Stream()
-        self._trt_context.set_optimization_profile_async(profile_idx, stream.handle)
-        self._trt_context.set_binding_shape(input_binding_idx, input_shape)
-        inputs[0].host = np.ascontiguousarray(input_data)
-        [cuda.memcpy_htod_async(inp.device, inp.host, stream) for inp in inputs]
-        # # Run inference
-        self._trt_context.execute_async_v2(
-            bindings=bindings, stream_handle=stream.handle
-        )
-        [cuda.memcpy_dtoh_async(out.host, out.device, stream) for out in outputs]
-        stream.synchronize()
-        output_buffer = [out.host for out in outputs]
-        return output_buffer
-
-
-class HostDeviceMem(object):
-    """
-    Helper class for allocating host and device memory.
-    """
-
-    def __init__(self, host_mem, device_mem) -> None:
-        """
-        Initialize the HostDeviceMem
-
-        @param
-            host_mem (np.ndarray): host memory
-            device_mem (cuda.DeviceAllocation): device memory
-        """
-        self.host = host_mem
-        self.device = device_mem
-
-    def __str__(self) -> str:
-        """
-        String representation of the HostDeviceMem
-
-        @return
-            str: string representation of the HostDeviceMem
-        """
-        return "Host:\n" + str(self.host) + "\nDevice:\n" + str(self.device)
-
-    def __repr__(self) -> str:
-        """
-        String representation of the HostDeviceMem
-
-        @return
-            str: string representation of the HostDeviceMem
-        """
-        return self.__str__()
+        # wait for a free execution context, any thread may call this
+        slot, context, buffers = self._slots.get()
+        # the CUDA context has to be current on the calling thread
+        if self.ctx is not None:
+            self.ctx.push()
+        try:
+            if profiling:
+                profiler = trt.tensorrt.Profiler()
+                context.profiler = profiler
+            engine_profile_idx = slot * len(self._profile_config) + profile_idx
+            return buffers.infer(context, input_data, engine_profile_idx)
+        finally:
+            if self.ctx is not None:
+                self.ctx.pop()
+            self._slots.put((slot, context, buffers))
+
+    def _run(self, input_data: np.ndarray) -> List:
+        return self.inference_single(input_data)
@@ -0,0 +1,226 @@
+"""
+This module keeps serialized TensorRT plans on disk, keyed by everything a plan
+depends on: the ONNX model hash, the optimization profiles, the precision, the
+builder settings and the TensorRT version and GPU the plan was built with.
+
+Every plan has a JSON metadata sidecar. Plans and sidecars are written atomically,
+the least recently used plans are evicted when there are more than max_entries, and
+a plan whose sidecar does not match is never loaded. Nothing in this module needs
+TensorRT, so the key and metadata logic can be tested anywhere.
+"""
+import glob
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.common.utils import file_sha256
+
+PLAN_SUFFIX = ".engine"
+METADATA_SUFFIX = ".engine.json"
+# metadata fields that make up the key, anything else is informational
+KEY_FIELDS = [
+    "model_sha256",
+    "profile_config",
+    "precision",
+    "builder",
+    "tensorrt_version",
+    "gpu_name",
+    "compute_capability",
+]
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def plan_metadata(
+    model_path: str,
+    profile_config: List[Dict],
+    precision: str,
+    tensorrt_version: str,
+    gpu_name: str,
+    compute_capability: str,
+    builder: Optional[Dict] = None,
+) -> Dict:
+    """
+    Describe the plan that a build with these inputs produces.
+
+    @param
+        model_path (str): path to the ONNX model
+        profile_config (List[Dict]): EdgeModelConfig.profile_config
+        precision (str): "fp16" or "fp32"
+        tensorrt_version (str): tensorrt.__version__
+        gpu_name (str): name of the GPU
+        compute_capability (str): compute capability of the GPU, e.g. "8.7"
+        builder (Dict): other builder settings, e.g. the workspace size
+    @return
+        Dict: metadata with the key fields
+    """
+    # tuples and lists serialize the same way, normalize through JSON
+    profiles = json.loads(json.dumps(profile_config))
+    return {
+        "model_sha256": file_sha256(model_path),
+        "profile_config": profiles,
+        "precision": precision,
+        "builder": builder or {},
+        "tensorrt_version": tensorrt_version,
+        "gpu_name": gpu_name,
+        "compute_capability": compute_capability,
+    }
+
+
+def plan_cache_key(metadata: Dict) -> str:
+    """
+    Key of a plan, derived from the key fields of its metadata only.
+
+    @param
+        metadata (Dict): plan metadata
+    @return
+        str: 16 hex characters
+    """
+    key_fields = {field: metadata.get(field) for field in KEY_FIELDS}
+    return _sha256(json.dumps(key_fields, sort_keys=True).encode())[:16]
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as temp_file:
+        temp_file.write(data)
+        temp_file.flush()
+        os.fsync(temp_file.fileno())
+    os.replace(temp_path, path)
+
+
+class PlanCache:
+    """
+    Directory of plans named <stem>.<key>.engine with <stem>.<key>.engine.json sidecars.
+    """
+
+    def __init__(self, cache_dir: str, stem: str, max_entries: int = 2) -> None:
+        """
+        Initialize the PlanCache.
+
+        @param
+            cache_dir (str): directory of the plans
+            stem (str): file name prefix of the plans
+            max_entries (int): number of plans kept, least recently used go first
+        """
+        self.cache_dir = Path(cache_dir)
+        self.stem = stem
+        self.max_entries = max(1, max_entries)
+
+    def plan_path(self, key: str) -> str:
+        return str(self.cache_dir / f"{self.stem}.{key}{PLAN_SUFFIX}")
+
+    def metadata_path(self, key: str) -> str:
+        return str(self.cache_dir / f"{self.stem}.{key}{METADATA_SUFFIX}")
+
+    def _read_metadata(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self.metadata_path(key)) as metadata_file:
+                return json.load(metadata_file)
+        except (OSError, ValueError):
+            return None
+
+    def _write_metadata(self, key: str, metadata: Dict) -> None:
+        _write_atomic(
+            self.metadata_path(key), json.dumps(metadata, indent=4).encode()
+        )
+
+    def lookup(self, metadata: Dict) -> Optional[str]:
+        """
+        Find the plan built for the metadata and mark it as used.
+
+        @param
+            metadata (Dict): metadata of the wanted plan
+        @return
+            str: plan path, None if there is no valid plan
+        """
+        key = plan_cache_key(metadata)
+        stored = self._read_metadata(key)
+        plan_path = self.plan_path(key)
+        if stored is None or not os.path.exists(plan_path):
+            return None
+        # the size rules out truncated plans without reading them, the hash catches
+        # plans that were corrupted in place
+        if (
+            plan_cache_key(stored) != key
+            or os.path.getsize(plan_path) != stored.get("plan_size")
+            or file_sha256(plan_path) != stored.get("plan_sha256")
+        ):
+            print(f"Plan cache entry {key} does not match its metadata, ignoring it")
+            return None
+        stored["last_used"] = time.time()
+        self._write_metadata(key, stored)
+        return plan_path
+
+    def store(self, metadata: Dict, plan: bytes) -> str:
+        """
+        Write a plan and its metadata, then evict least recently used plans.
+
+        @param
+            metadata (Dict): metadata of the plan
+            plan (bytes): serialized plan
+        @return
+            str: plan path
+        """
+        key = plan_cache_key(metadata)
+        plan_path = self.plan_path(key)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # plan first, a sidecar without a complete plan is never written
+        _write_atomic(plan_path, plan)
+        stored = dict(
+            metadata,
+            key=key,
+            plan_sha256=_sha256(plan),
+            plan_size=len(plan),
+            created=time.time(),
+            last_used=time.time(),
+        )
+        self._write_metadata(key, stored)
+        self.evict(keep=key)
+        return plan_path
+
+    def entries(self) -> List[Dict]:
+        """
+        Metadata of every cached plan, most recently used first.
+
+        @return
+            List[Dict]: metadata
+        """
+        entries = []
+        pattern = str(self.cache_dir / f"{self.stem}.*{METADATA_SUFFIX}")
+        for path in glob.glob(pattern):
+            key = Path(path).name[len(self.stem) + 1 : -len(METADATA_SUFFIX)]  # noqa E203
+            metadata = self._read_metadata(key)
+            if metadata is not None:
+                metadata["key"] = key
+                entries.append(metadata)
+        return sorted(entries, key=lambda entry: entry.get("last_used", 0), reverse=True)
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        """
+        Remove the least recently used plans beyond max_entries.
+
+        @param
+            keep (str): key that is never evicted
+        """
+        entries = [entry for entry in self.entries() if entry["key"] != keep]
+        budget = self.max_entries - (1 if keep is not None else 0)
+        for entry in entries[budget:]:
+            print(f"Evicting plan cache entry {entry['key']}")
+            self.invalidate(entry["key"])
+
+    def invalidate(self, key: str) -> None:
+        """
+        Remove a plan and its metadata, e.g. after the plan failed to deserialize.
+
+        @param
+            key (str): plan key
+        """
+        for path in [self.plan_path(key), self.metadata_path(key)]:
+            if os.path.exists(path):
+                os.remove(path)
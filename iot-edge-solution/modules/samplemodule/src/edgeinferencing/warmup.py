@@ -0,0 +1,71 @@
+"""This module is used to warm up the inference engine with synthetic inputs before the first frame arrives."""
+import time
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+from src.common.metrics import METRICS
+
+
+def latencies_stable(
+    latencies: List[float], window: int = 3, tolerance: float = 0.2
+) -> bool:
+    """
+    Check whether the last latencies have settled.
+
+    @param
+        latencies (List[float]): latencies in run order
+        window (int): number of most recent runs that have to agree
+        tolerance (float): allowed spread of the window relative to its median
+    @return
+        bool: True if the spread of the last window runs is within tolerance
+    """
+    if len(latencies) < window:
+        return False
+    recent = latencies[-window:]
+    median = float(np.median(recent))
+    if median <= 0:
+        return True
+    return (max(recent) - min(recent)) / median <= tolerance
+
+
+def warm_up(
+    infer: Callable[[np.ndarray], object],
+    shapes: List[Tuple[int, ...]],
+    min_runs: int = 3,
+    max_runs: int = 20,
+    window: int = 3,
+    tolerance: float = 0.2,
+) -> Dict[Tuple[int, ...], List[float]]:
+    """
+    Run synthetic inputs of every shape until the latency stops changing. The
+    metrics are reset afterwards, so the slow first runs do not end up in the
+    latency percentiles of the frames.
+
+    @param
+        infer (Callable): runs one (N, 3, H, W) float32 model input
+        shapes (List[Tuple[int, ...]]): (height, width) or (batch, height, width)
+            input shapes to warm up
+        min_runs (int): minimum number of runs per shape
+        max_runs (int): maximum number of runs per shape
+        window (int): number of most recent runs that have to agree
+        tolerance (float): allowed spread of the window relative to its median
+    @return
+        Dict[Tuple[int, ...], List[float]]: latencies in milliseconds per shape
+    """
+    rng = np.random.RandomState(0)
+    report = {}
+    for shape in shapes:
+        batch, height, width = (1,) * (3 - len(shape)) + tuple(shape)
+        img = rng.standard_normal((batch, 3, height, width)).astype(np.float32)
+        latencies = []
+        while len(latencies) < max_runs:
+            start_time = time.perf_counter()
+            infer(img)
+            latencies.append((time.perf_counter() - start_time) * 1000.0)
+            if len(latencies) >= min_runs and latencies_stable(
+                latencies, window, tolerance
+            ):
+                break
+        report[tuple(shape)] = latencies
+    METRICS.reset()
+    return report
@@ -0,0 +1,125 @@
+"""This module is used to skip inference on frames that did not change since the last inferred frame."""
+from typing import Callable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class FrameChangeGate:
+    """
+    Compares a downsampled grayscale copy of every frame, where each cell is the mean
+    of one block of the frame, with the one of the last inferred frame. When no block
+    changed by more than the threshold the previous boxes are reused. Inference is
+    forced every refresh_interval frames so slow changes are not missed.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 6.0,
+        grid_size: Tuple[int, int] = (32, 18),
+        refresh_interval: int = 30,
+    ) -> None:
+        """
+        Initialize the FrameChangeGate.
+
+        @param
+            threshold (float): largest change of a block mean, in gray levels, that
+                still counts as the same scene
+            grid_size (Tuple[int, int]): number of blocks as (columns, rows)
+            refresh_interval (int): maximum number of frames between two inferences
+        """
+        if refresh_interval < 1:
+            raise ValueError(
+                f"Refresh interval must be at least 1 but got: {refresh_interval}"
+            )
+        self.threshold = threshold
+        self.grid_size = tuple(grid_size)
+        self.refresh_interval = refresh_interval
+        self.boxes: List = []
+        self.frames = 0
+        self.frames_skipped = 0
+        self._reference: Optional[np.ndarray] = None
+        self._candidate: Optional[np.ndarray] = None
+        self._frames_since_inference = 0
+
+    def _signature(self, frame: np.ndarray) -> np.ndarray:
+        if frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(frame, self.grid_size, interpolation=cv2.INTER_AREA).astype(
+            np.float32
+        )
+
+    def changed(self, frame: np.ndarray) -> bool:
+        """
+        Check whether the frame needs inference. Call update with the new boxes when
+        it does.
+
+        @param
+            frame (np.ndarray): raw frame
+        @return
+            bool: True if the frame has to be inferred
+        """
+        self.frames += 1
+        self._frames_since_inference += 1
+        signature = self._signature(frame)
+        if (
+            self._reference is None
+            or self._frames_since_inference >= self.refresh_interval
+            or float(cv2.absdiff(signature, self._reference).max()) > self.threshold
+        ):
+            self._candidate = signature
+            return True
+        self.frames_skipped += 1
+        return False
+
+    def update(self, boxes: List) -> None:
+        """
+        Make the last frame that changed returned True for the new reference.
+
+        @param
+            boxes (List): boxes detected on that frame
+        """
+        self._reference = self._candidate
+        self._frames_since_inference = 0
+        self.boxes = boxes
+
+    def run(self, frame: np.ndarray, detect: Callable) -> List:
+        """
+        Run detect on the frame if it changed, otherwise return the previous boxes.
+
+        @param
+            frame (np.ndarray): raw frame
+            detect (Callable): detection function, e.g. TextDetection.run
+        @return
+            List: boxes of the frame
+        """
+        if self.changed(frame):
+            self.update(detect(frame))
+        return self.boxes
+
+    def summary(self) -> str:
+        """
+        One line summary of the gate counters.
+
+        @return
+            str: summary
+        """
+        return f"frames: {self.frames}, skipped: {self.frames_skipped}"
+
+
+def create_change_gate(config):
+    """
+    Create the change gate described by the configuration.
+
+    @param
+        config (FrameProviderConfig): frame provider configuration
+    @return
+        FrameChangeGate: gate, None when the gate is disabled
+    """
+    if not config.change_gate:
+        return None
+    return FrameChangeGate(
+        config.change_threshold,
+        config.change_grid_size,
+        config.change_refresh_interval,
+    )
@@ -0,0 +1,32 @@
+"""This module is used to provide the configurations for the frame provider."""
+
+CAPTURE_MODE_SERIAL = "serial"
+CAPTURE_MODE_PIPELINE = "pipeline"
+CAPTURE_MODE_LATEST = "latest"
+CAPTURE_MODE_PROCESS = "process"
+
+
+class FrameProviderConfig:
+    """
+    Configurations class for the frame provider.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize the configuration.
+        """
+        self.capture_mode = CAPTURE_MODE_SERIAL
+        self.queue_depth = 2
+        self.backpressure = "block"
+        self.stats_interval = 100
+        self.batch_size = 1
+        # skip inference on frames that did not change since the last inferred frame
+        self.change_gate = False
+        self.change_threshold = 6.0
+        self.change_grid_size = (32, 18)
+        self.change_refresh_interval = 30
+        # frames decoded ahead by the capture process and the largest frame shape,
+        # the shared memory takes shared_frame_slots frames of shared_max_frame_shape,
+        # larger camera frames stop the capture with an error
+        self.shared_frame_slots = 4
+        self.shared_max_frame_shape = (1080, 1920, 3)
@@ -1,15 +1,124 @@
 import cv2
+from src.common.metrics import METRICS, STAGE_CAPTURE
+from src.frameprovider.config import (
+    FrameProviderConfig,
+    CAPTURE_MODE_SERIAL,
+    CAPTURE_MODE_PIPELINE,
+    CAPTURE_MODE_LATEST,
+    CAPTURE_MODE_PROCESS,
+)
+from src.frameprovider.pipeline import FramePipeline
+from src.frameprovider.latest_frame import CaptureStats, LatestFrameReader
+from src.frameprovider.shared_capture import SharedMemoryCapture
+from src.frameprovider.change_gate import create_change_gate
 
 
 class VideoCapture:
-    def __init__(self, camera_path, text_detection):
+    def __init__(self, camera_path, text_detection, config=None):
         print("Initializing video capture")
         self.text_detection = text_detection
+        self.config = config if config is not None else FrameProviderConfig()
+        self.camera_path = camera_path
+        self.gate = create_change_gate(self.config)
+        if self.config.capture_mode == CAPTURE_MODE_PROCESS:
+            # the capture process opens the camera itself
+            self.read_process()
+            return
         self.cap = cv2.VideoCapture(camera_path)
-        self.read()
+        if self.config.capture_mode == CAPTURE_MODE_PIPELINE:
+            self.read_pipelined()
+        elif self.config.capture_mode == CAPTURE_MODE_LATEST:
+            self.read_latest()
+        elif self.config.capture_mode == CAPTURE_MODE_SERIAL:
+            self.read()
+        else:
+            raise ValueError(f"Unsupported capture mode: {self.config.capture_mode}")
 
     def read(self):
         print("Capturing video frames")
         while True:
-            ret, frame = self.cap.read()
-            self.text_detection.run(frame)
+            with METRICS.timer(STAGE_CAPTURE):
+                ret, frame = self.cap.read()
+            if not ret:
+                break
+            METRICS.increment("frames_captured")
+            self.detect(frame)
+        self.cap.release()
+        print("Capture finished, end of stream")
+        print(f"Metrics:\n{METRICS.summary()}")
+
+    def read_pipelined(self):
+        print(
+            f"Capturing video frames with pipeline, queue depth: {self.config.queue_depth}, "
+            f"backpressure: {self.config.backpressure}"
+        )
+        pipeline = FramePipeline(
+            self.cap,
+            self.text_detection,
+            queue_depth=self.config.queue_depth,
+            backpressure=self.config.backpressure,
+        )
+        pipeline.run()
+        print(
+            f"Pipeline finished, captured: {pipeline.frames_captured}, "
+            f"processed: {pipeline.frames_processed}, dropped: {pipeline.dropped}"
+        )
+        print(f"Post-process stats: {self.text_detection.post_process_summary()}")
+        print(f"Metrics:\n{METRICS.summary()}")
+
+    def read_latest(self):
+        print("Capturing video frames, keeping only the latest frame")
+        reader = LatestFrameReader(self.cap)
+        reader.start()
+        while True:
+            ret, frame, timestamp = reader.read()
+            if not ret:
+                break
+            self.detect(frame)
+            reader.stats.record_processed(timestamp)
+            if reader.stats.frames_processed % self.config.stats_interval == 0:
+                print(f"Capture stats: {reader.stats.summary()}")
+                print(
+                    f"Post-process stats: {self.text_detection.post_process_summary()}"
+                )
+                if self.gate is not None:
+                    print(f"Change gate stats: {self.gate.summary()}")
+        reader.stop()
+        print(f"Capture finished, {reader.stats.summary()}")
+        print(f"Post-process stats: {self.text_detection.post_process_summary()}")
+        print(f"Metrics:\n{METRICS.summary()}")
+
+    def read_process(self):
+        print(
+            "Capturing video frames in a separate process, shared frame slots: "
+            f"{self.config.shared_frame_slots}"
+        )
+        capture = SharedMemoryCapture(
+            self.camera_path,
+            num_slots=self.config.shared_frame_slots,
+            max_shape=self.config.shared_max_frame_shape,
+        )
+        capture.start()
+        stats = CaptureStats()
+        try:
+            while True:
+                ret, frame, ref = capture.read()
+                if not ret:
+                    break
+                METRICS.record(STAGE_CAPTURE, ref.metadata["capture_ns"])
+                METRICS.increment("frames_captured")
+                stats.record_captured(False)
+                self.detect(frame)
+                capture.release(ref)
+                stats.record_processed(ref.metadata["timestamp"])
+                if stats.frames_processed % self.config.stats_interval == 0:
+                    print(f"Capture stats: {stats.summary()}")
+        finally:
+            capture.stop()
+        print(f"Capture finished, {stats.summary()}")
+        print(f"Metrics:\n{METRICS.summary()}")
+
+    def detect(self, frame):
+        if self.gate is None:
+            return self.text_detection.run(frame)
+        return self.gate.run(frame, self.text_detection.run)
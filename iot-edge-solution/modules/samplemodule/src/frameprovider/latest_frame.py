@@ -0,0 +1,200 @@
+"""This module is used to provide a latest-frame-wins background reader for live video sources."""
+import threading
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+from src.common.metrics import METRICS, STAGE_CAPTURE
+
+
+class CaptureStats:
+    """
+    Counters for frames captured, dropped and processed, and the end-to-end latency
+    from frame capture to boxes out.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize the CaptureStats.
+        """
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.frames_processed = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self.started_at = time.monotonic()
+        self._total_latency = 0.0
+        self._lock = threading.Lock()
+
+    def record_captured(self, dropped_previous: bool) -> None:
+        """
+        Record a newly captured frame.
+
+        @param
+            dropped_previous (bool): whether the frame replaced one that was never read
+        """
+        with self._lock:
+            self.frames_captured += 1
+            if dropped_previous:
+                self.frames_dropped += 1
+
+    def record_dropped(self) -> None:
+        """
+        Record a frame that was read but superseded before it was processed.
+        """
+        with self._lock:
+            self.frames_dropped += 1
+
+    def record_processed(self, timestamp: float) -> float:
+        """
+        Record a processed frame.
+
+        @param
+            timestamp (float): time.monotonic() at which the frame was captured
+        @return
+            float: end-to-end latency of the frame in seconds
+        """
+        latency = time.monotonic() - timestamp
+        with self._lock:
+            self.frames_processed += 1
+            self.last_latency = latency
+            self.max_latency = max(self.max_latency, latency)
+            self._total_latency += latency
+        return latency
+
+    @property
+    def average_latency(self) -> float:
+        """
+        Average end-to-end latency of the processed frames.
+
+        @return
+            float: latency in seconds
+        """
+        if self.frames_processed == 0:
+            return 0.0
+        return self._total_latency / self.frames_processed
+
+    @property
+    def fps(self) -> float:
+        """
+        Processed frames per second since the stats were created.
+
+        @return
+            float: frames per second
+        """
+        elapsed = time.monotonic() - self.started_at
+        if elapsed <= 0:
+            return 0.0
+        return self.frames_processed / elapsed
+
+    def summary(self) -> str:
+        """
+        Human readable summary of the counters.
+
+        @return
+            str: summary
+        """
+        return (
+            f"captured: {self.frames_captured}, dropped: {self.frames_dropped}, "
+            f"processed: {self.frames_processed}, fps: {self.fps:.2f}, "
+            f"latency last/avg/max: {self.last_latency:.3f}/"
+            f"{self.average_latency:.3f}/{self.max_latency:.3f}s"
+        )
+
+
+class LatestFrameReader:
+    """
+    Continuously drains a cv2.VideoCapture on a background thread and keeps only the
+    newest frame, so that the consumer never works on frames queued up in the
+    capture buffer.
+    """
+
+    def __init__(self, cap, frame_event: Optional[threading.Event] = None) -> None:
+        """
+        Initialize the LatestFrameReader.
+
+        @param
+            cap (cv2.VideoCapture): opened video source
+            frame_event (threading.Event): optional event set whenever a new frame
+                arrives or the source is exhausted, can be shared between readers
+        """
+        self.cap = cap
+        self.frame_event = frame_event
+        self.stats = CaptureStats()
+        self._frame: Optional[np.ndarray] = None
+        self._timestamp = 0.0
+        self._has_new_frame = False
+        self._finished = False
+        self._running = False
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """
+        Start the background reader thread.
+        """
+        self._running = True
+        self._thread = threading.Thread(target=self._update, name="capture", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the background reader thread.
+        """
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+
+    @property
+    def finished(self) -> bool:
+        """
+        Whether the source is exhausted and its last frame has been read.
+
+        @return
+            bool: finished flag
+        """
+        with self._condition:
+            return self._finished and not self._has_new_frame
+
+    def read(self, timeout: Optional[float] = None) -> Tuple[bool, Optional[np.ndarray], float]:
+        """
+        Wait for a frame that has not been returned yet and return it.
+
+        @param
+            timeout (float): maximum time to wait in seconds, None waits forever
+        @return
+            ret (bool): False once the source is exhausted or the timeout expired
+            frame (np.ndarray): newest frame
+            timestamp (float): time.monotonic() at which the frame was captured
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._has_new_frame or self._finished, timeout=timeout
+            )
+            if not self._has_new_frame:
+                return False, None, 0.0
+            self._has_new_frame = False
+            return True, self._frame, self._timestamp
+
+    def _update(self) -> None:
+        while self._running:
+            with METRICS.timer(STAGE_CAPTURE):
+                ret, frame = self.cap.read()
+            if not ret:
+                break
+            METRICS.increment("frames_captured")
+            timestamp = time.monotonic()
+            with self._condition:
+                dropped_previous = self._has_new_frame
+                self._frame = frame
+                self._timestamp = timestamp
+                self._has_new_frame = True
+                self._condition.notify()
+            self.stats.record_captured(dropped_previous)
+            if self.frame_event is not None:
+                self.frame_event.set()
+        with self._condition:
+            self._finished = True
+            self._condition.notify_all()
+        if self.frame_event is not None:
+            self.frame_event.set()
@@ -0,0 +1,193 @@
+"""This module is used to provide multi-camera ingestion sharing a single text detection engine."""
+import threading
+from typing import List, Optional
+
+import cv2
+from src.common.metrics import METRICS
+from src.frameprovider.change_gate import FrameChangeGate, create_change_gate
+from src.frameprovider.config import FrameProviderConfig
+from src.frameprovider.latest_frame import LatestFrameReader
+
+
+class CameraStream:
+    """
+    A camera source with its own latest-frame reader and statistics.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        camera_path: str,
+        weight: int,
+        frame_event: threading.Event,
+        gate: Optional[FrameChangeGate] = None,
+    ) -> None:
+        """
+        Initialize the CameraStream.
+
+        @param
+            name (str): name of the stream used in logs
+            camera_path (str): path, URL or GStreamer pipeline of the camera
+            weight (int): scheduling weight of the stream
+            frame_event (threading.Event): event shared by all streams, set on new frames
+            gate (FrameChangeGate): change gate of the stream, None to infer every frame
+        """
+        if weight < 1:
+            raise ValueError(f"Camera weight must be at least 1 but got: {weight}")
+        self.name = name
+        self.camera_path = camera_path
+        self.weight = weight
+        self.reader = LatestFrameReader(cv2.VideoCapture(camera_path), frame_event)
+        self.current_weight = 0
+        self.gate = gate
+
+    @property
+    def stats(self):
+        """
+        Capture statistics of the stream.
+
+        @return
+            CaptureStats: statistics
+        """
+        return self.reader.stats
+
+
+class WeightedRoundRobinScheduler:
+    """
+    Smooth weighted round robin over the streams that have a frame ready. With equal
+    weights this is a fair round robin, a stream with weight 2 gets twice the
+    inference slots of a stream with weight 1 when both are busy.
+    """
+
+    def __init__(self, streams: List[CameraStream]) -> None:
+        """
+        Initialize the WeightedRoundRobinScheduler.
+
+        @param
+            streams (List[CameraStream]): streams to schedule
+        """
+        self.streams = streams
+
+    def next(self, ready: List[CameraStream]) -> Optional[CameraStream]:
+        """
+        Pick the next stream to run inference for.
+
+        @param
+            ready (List[CameraStream]): streams that currently have a new frame
+        @return
+            CameraStream: selected stream, None if no stream is ready
+        """
+        if not ready:
+            return None
+        total_weight = 0
+        selected = None
+        for stream in ready:
+            stream.current_weight += stream.weight
+            total_weight += stream.weight
+            if selected is None or stream.current_weight > selected.current_weight:
+                selected = stream
+        selected.current_weight -= total_weight
+        return selected
+
+
+class MultiCameraCapture:
+    """
+    Reads several cameras in one process and runs all of them through one shared
+    TextDetection, and therefore one Engine and one copy of the model weights.
+    """
+
+    def __init__(
+        self,
+        camera_paths: List[str],
+        text_detection,
+        weights: Optional[List[int]] = None,
+        config: Optional[FrameProviderConfig] = None,
+    ) -> None:
+        """
+        Initialize the MultiCameraCapture and start reading.
+
+        @param
+            camera_paths (List[str]): camera sources
+            text_detection (TextDetection): initialized text detection model
+            weights (List[int]): scheduling weight per camera, defaults to 1 each
+            config (FrameProviderConfig): frame provider configuration
+        """
+        print(f"Initializing multi camera capture with {len(camera_paths)} cameras")
+        weights = weights if weights else [1] * len(camera_paths)
+        if len(weights) != len(camera_paths):
+            raise ValueError(
+                f"Expected {len(camera_paths)} camera weights but got: {len(weights)}"
+            )
+        self.text_detection = text_detection
+        self.config = config if config is not None else FrameProviderConfig()
+        self.frame_event = threading.Event()
+        self.streams = [
+            CameraStream(
+                f"camera{index}",
+                camera_path,
+                weight,
+                self.frame_event,
+                create_change_gate(self.config),
+            )
+            for index, (camera_path, weight) in enumerate(zip(camera_paths, weights))
+        ]
+        self.scheduler = WeightedRoundRobinScheduler(self.streams)
+        self.read()
+
+    def read(self):
+        print("Capturing video frames from all cameras")
+        for stream in self.streams:
+            stream.reader.start()
+        frames_processed = 0
+        pending = {}
+        while True:
+            for stream in self.streams:
+                ret, frame, timestamp = stream.reader.read(timeout=0)
+                if not ret:
+                    continue
+                if stream.gate is not None and not stream.gate.changed(frame):
+                    # unchanged scene, the previous boxes of the stream still hold
+                    stream.stats.record_processed(timestamp)
+                    continue
+                if stream in pending:
+                    stream.stats.record_dropped()
+                pending[stream] = (frame, timestamp)
+            if not pending:
+                if all(stream.reader.finished for stream in self.streams):
+                    break
+                self.frame_event.wait(timeout=0.1)
+                self.frame_event.clear()
+                continue
+
+            batch = []
+            while pending and len(batch) < self.config.batch_size:
+                stream = self.scheduler.next(list(pending))
+                batch.append((stream,) + pending.pop(stream))
+
+            if len(batch) == 1:
+                boxes_per_frame = [self.text_detection.run(batch[0][1])]
+            else:
+                boxes_per_frame = self.text_detection.run_batch(
+                    [frame for _, frame, _ in batch]
+                )
+
+            for (stream, _, timestamp), boxes in zip(batch, boxes_per_frame):
+                if stream.gate is not None:
+                    stream.gate.update(boxes)
+                stream.stats.record_processed(timestamp)
+                frames_processed += 1
+                if frames_processed % self.config.stats_interval == 0:
+                    self.print_stats()
+
+        for stream in self.streams:
+            stream.reader.stop()
+        print("All cameras finished")
+        self.print_stats()
+        print(f"Metrics:\n{METRICS.summary()}")
+
+    def print_stats(self):
+        for stream in self.streams:
+            print(f"{stream.name} stats: {stream.stats.summary()}")
+            if stream.gate is not None:
+                print(f"{stream.name} change gate stats: {stream.gate.summary()}")
+        print(f"Post-process stats: {self.text_detection.post_process_summary()}")
@@ -0,0 +1,299 @@
+"""This module is used to provide a staged capture/pre-process/inference/post-process pipeline."""
+import queue
+import threading
+from collections import deque
+import time
+from typing import Callable, List, Optional
+
+from src.common.metrics import METRICS, STAGE_CAPTURE, STAGE_EMIT
+
+BACKPRESSURE_BLOCK = "block"
+BACKPRESSURE_DROP_OLDEST = "drop_oldest"
+BACKPRESSURE_POLICIES = [BACKPRESSURE_BLOCK, BACKPRESSURE_DROP_OLDEST]
+
+_STOP = object()
+
+
+class StageQueue:
+    """
+    Bounded queue connecting two pipeline stages.
+    """
+
+    def __init__(self, maxsize: int, backpressure: str = BACKPRESSURE_BLOCK) -> None:
+        """
+        Initialize the StageQueue.
+
+        @param
+            maxsize (int): maximum number of items waiting in the queue
+            backpressure (str): "block" to stall the producer when the queue is full,
+                "drop_oldest" to discard the oldest waiting item instead
+        """
+        if maxsize < 1:
+            raise ValueError(f"Queue depth must be at least 1 but got: {maxsize}")
+        if backpressure not in BACKPRESSURE_POLICIES:
+            raise ValueError(
+                f"Backpressure must be in {BACKPRESSURE_POLICIES} but got: {backpressure}"
+            )
+        self.backpressure = backpressure
+        self.dropped = 0
+        # set once the stop marker was taken out of the queue
+        self.stopped = False
+        self._queue = queue.Queue(maxsize=maxsize)
+
+    def put(self, item) -> None:
+        """
+        Put an item into the queue applying the backpressure policy.
+
+        @param
+            item: item to be queued
+        """
+        if self.backpressure == BACKPRESSURE_BLOCK or item is _STOP:
+            self._queue.put(item)
+            return
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self):
+        """
+        Get the next item from the queue, blocking until one is available.
+
+        @return
+            item: next queued item
+        """
+        item = self._queue.get()
+        if item is _STOP:
+            self.stopped = True
+        return item
+
+    def qsize(self) -> int:
+        """
+        Approximate number of items waiting in the queue.
+
+        @return
+            int: queue size
+        """
+        return self._queue.qsize()
+
+
+class FramePacket:
+    """
+    Frame travelling through the pipeline together with its intermediate results.
+    """
+
+    __slots__ = ["frame_id", "timestamp", "data", "shape_list"]
+
+    def __init__(self, frame_id: int, timestamp: float, data) -> None:
+        """
+        Initialize the FramePacket.
+
+        @param
+            frame_id (int): index of the frame in the stream
+            timestamp (float): time.monotonic() at capture
+            data: payload of the current stage
+        """
+        self.frame_id = frame_id
+        self.timestamp = timestamp
+        self.data = data
+        self.shape_list = None
+
+
+class FramePipeline:
+    """
+    Runs capture, pre-processing, inference and post-processing on separate worker
+    threads connected by bounded queues, so that steady-state throughput is bounded
+    by the slowest stage instead of the sum of all stages.
+    """
+
+    def __init__(
+        self,
+        cap,
+        text_detection,
+        queue_depth: int = 2,
+        backpressure: str = BACKPRESSURE_BLOCK,
+        on_result: Optional[Callable] = None,
+    ) -> None:
+        """
+        Initialize the FramePipeline.
+
+        @param
+            cap (cv2.VideoCapture): opened video source
+            text_detection (TextDetection): initialized text detection model
+            queue_depth (int): capacity of each inter-stage queue
+            backpressure (str): "block" or "drop_oldest"
+            on_result (Callable): called with (frame_id, timestamp, boxes) for every
+                processed frame, defaults to printing the number of boxes of the
+                sampled frames
+        """
+        self.cap = cap
+        self.text_detection = text_detection
+        self.on_result = on_result if on_result is not None else self._print_result
+        self.queues = [StageQueue(queue_depth, backpressure) for _ in range(3)]
+        # one input being pre-processed, queue_depth waiting and one in inference
+        text_detection.reserve_input_buffers(queue_depth + 2)
+        self.frames_captured = 0
+        self.frames_processed = 0
+        self._stop_event = threading.Event()
+        self._threads: List[threading.Thread] = []
+        # first exception raised by a stage, re-raised by join
+        self._error: Optional[Exception] = None
+
+    def start(self) -> None:
+        """
+        Start the worker threads.
+        """
+        pre_queue, infer_queue, post_queue = self.queues
+        workers = [
+            ("capture", self._capture, None, pre_queue),
+            ("preprocess", self._preprocess, pre_queue, infer_queue),
+            ("inference", self._inference, infer_queue, post_queue),
+            ("postprocess", self._postprocess, post_queue, None),
+        ]
+        for name, target, in_queue, out_queue in workers:
+            thread = threading.Thread(
+                target=self._run_stage,
+                args=(name, target, in_queue, out_queue),
+                name=name,
+                daemon=True,
+            )
+            self._threads.append(thread)
+            thread.start()
+
+    def stop(self) -> None:
+        """
+        Ask the capture stage to stop, the remaining frames are drained.
+        """
+        self._stop_event.set()
+
+    def join(self) -> None:
+        """
+        Wait until every stage has finished, and raise the exception of the first
+        stage that failed.
+        """
+        for thread in self._threads:
+            thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def run(self) -> None:
+        """
+        Start the pipeline and block until the video source is exhausted.
+        """
+        self.start()
+        self.join()
+
+    @property
+    def dropped(self) -> int:
+        """
+        Number of frames discarded by the drop_oldest policy.
+
+        @return
+            int: dropped frame count
+        """
+        return sum(stage_queue.dropped for stage_queue in self.queues)
+
+    def _run_stage(
+        self,
+        name: str,
+        stage: Callable,
+        in_queue: Optional[StageQueue],
+        out_queue: Optional[StageQueue],
+    ) -> None:
+        """
+        Run a stage and always pass the stop marker on. A failed stage stops the
+        capture and keeps draining its input queue, so the stages before it do not
+        block on a full queue and the pipeline shuts down.
+
+        @param
+            name (str): name of the stage
+            stage (Callable): stage loop, called with (in_queue, out_queue)
+            in_queue (StageQueue): queue the stage reads from, None for capture
+            out_queue (StageQueue): queue the stage writes to, None for the last stage
+        """
+        try:
+            stage(in_queue, out_queue)
+        except Exception as e:
+            print(f"Pipeline stage {name} failed: {e!r}")
+            if self._error is None:
+                self._error = e
+            self._stop_event.set()
+            while in_queue is not None and not in_queue.stopped:
+                in_queue.get()
+        finally:
+            if out_queue is not None:
+                out_queue.put(_STOP)
+
+    def _capture(self, _, out_queue: StageQueue) -> None:
+        frame_id = 0
+        while not self._stop_event.is_set():
+            with METRICS.timer(STAGE_CAPTURE):
+                ret, frame = self.cap.read()
+            if not ret:
+                break
+            METRICS.increment("frames_captured")
+            out_queue.put(FramePacket(frame_id, time.monotonic(), frame))
+            self.frames_captured += 1
+            frame_id += 1
+
+    def _preprocess(self, in_queue: StageQueue, out_queue: StageQueue) -> None:
+        while True:
+            packet = in_queue.get()
+            if packet is _STOP:
+                break
+            packet.data, packet.shape_list = self.text_detection.preprocess(packet.data)
+            out_queue.put(packet)
+
+    def _inference(self, in_queue: StageQueue, out_queue: StageQueue) -> None:
+        while True:
+            packet = in_queue.get()
+            if packet is _STOP:
+                break
+            packet.data = self.text_detection.infer(packet.data)
+            out_queue.put(packet)
+
+    def _postprocess(self, in_queue: StageQueue, _) -> None:
+        pool = getattr(self.text_detection, "post_process_pool", None)
+        if pool is None:
+            while True:
+                packet = in_queue.get()
+                if packet is _STOP:
+                    break
+                boxes = self.text_detection.postprocess(packet.data, packet.shape_list)
+                self._emit(packet, boxes)
+            return
+        # keep every worker busy, the futures resolve in frame order
+        in_flight = deque()
+        while True:
+            packet = in_queue.get()
+            if packet is _STOP:
+                break
+            boxes = self.text_detection.postprocess_async(packet.data, packet.shape_list)
+            packet.data = None
+            in_flight.append((packet, boxes))
+            while in_flight and (in_flight[0][1].done() or len(in_flight) > pool.workers):
+                packet, boxes = in_flight.popleft()
+                self._emit(packet, boxes.result())
+        while in_flight:
+            packet, boxes = in_flight.popleft()
+            self._emit(packet, boxes.result())
+
+    def _emit(self, packet: FramePacket, boxes: List) -> None:
+        self.frames_processed += 1
+        with METRICS.timer(STAGE_EMIT):
+            self.on_result(packet.frame_id, packet.timestamp, boxes)
+
+    @staticmethod
+    def _print_result(frame_id: int, timestamp: float, boxes: List) -> None:
+        if not METRICS.sample_frame():
+            return
+        latency = time.monotonic() - timestamp
+        print(
+            f"Frame {frame_id}: bounding boxes detected: {len(boxes)}, latency: {latency}"
+        )
@@ -0,0 +1,349 @@
+"""
+This module is used to replay recorded video files and image directories through
+the text detection as fast as possible, for re-processing footage and for capacity
+planning.
+
+Run it from the samplemodule directory:
+
+    python -m src.frameprovider.replay local_data/demo_video.mkv frames/ \\
+        --output replay_results.npz --workers 4
+
+Every source is split into contiguous frame ranges (shards) that worker processes
+pick up as they become free, each worker process has its own TextDetection and
+Engine. The per-frame results are written column by column, to a NumPy .npz file
+or, when pyarrow is installed, to a .parquet file.
+"""
+import argparse
+import copy
+import multiprocessing
+import os
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from src.common.utils import get_parent_dir_path
+from src.edgeinferencing.config import EdgeModelConfig
+from src.edgeinferencing.edge_model import TextDetection
+
+IMAGE_EXTENSIONS = (".bmp", ".jpeg", ".jpg", ".png", ".tif", ".tiff", ".webp")
+# shards shorter than this are not worth the seek and the scheduling
+MIN_SHARD_FRAMES = 50
+
+# TextDetection of the worker process, created by _init_worker
+_text_detection = None
+
+
+class ReplayShard:
+    """
+    Contiguous range of frames of one source.
+    """
+
+    def __init__(self, source: str, start: int = 0, stop: Optional[int] = None) -> None:
+        """
+        Initialize the ReplayShard.
+
+        @param
+            source (str): path to a video file or an image directory
+            start (int): index of the first frame
+            stop (int): index after the last frame, None reads to the end
+        """
+        self.source = source
+        self.start = start
+        self.stop = stop
+
+
+def image_paths(directory: str) -> List[str]:
+    """
+    Images of a directory in name order.
+
+    @param
+        directory (str): image directory
+    @return
+        List[str]: paths to the images
+    """
+    return [
+        os.path.join(directory, name)
+        for name in sorted(os.listdir(directory))
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    ]
+
+
+def frame_count(source: str) -> int:
+    """
+    Number of frames of a source.
+
+    @param
+        source (str): path to a video file or an image directory
+    @return
+        int: number of frames, 0 when the container does not tell
+    """
+    if os.path.isdir(source):
+        return len(image_paths(source))
+    cap = cv2.VideoCapture(source)
+    count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    return max(0, count)
+
+
+def plan_shards(sources: List[str], workers: int) -> List[ReplayShard]:
+    """
+    Split every source into up to workers shards of at least MIN_SHARD_FRAMES frames.
+
+    @param
+        sources (List[str]): paths to video files or image directories
+        workers (int): number of worker processes
+    @return
+        List[ReplayShard]: shards in source and frame order
+    """
+    shards = []
+    for source in sources:
+        count = frame_count(source)
+        if count == 0:
+            # unknown length, the shard reads the source to its end
+            shards.append(ReplayShard(source))
+            continue
+        num_shards = max(1, min(workers, count // MIN_SHARD_FRAMES))
+        bounds = np.linspace(0, count, num_shards + 1).astype(int)
+        shards.extend(
+            ReplayShard(source, int(start), int(stop))
+            for start, stop in zip(bounds[:-1], bounds[1:])
+        )
+    return shards
+
+
+def _open_video(source: str, start: int) -> cv2.VideoCapture:
+    cap = cv2.VideoCapture(source)
+    if start == 0:
+        return cap
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) != start:
+        # the container can not seek to the frame, skip the frames before it
+        cap.release()
+        cap = cv2.VideoCapture(source)
+        for _ in range(start):
+            if not cap.grab():
+                break
+    return cap
+
+
+def read_frames(shard: ReplayShard) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Frames of a shard, up to the end of the source.
+
+    @param
+        shard (ReplayShard): shard to read
+    @return
+        Iterator[Tuple[int, np.ndarray]]: frame index and frame
+    """
+    if os.path.isdir(shard.source):
+        paths = image_paths(shard.source)
+        stop = len(paths) if shard.stop is None else min(shard.stop, len(paths))
+        for index in range(shard.start, stop):
+            frame = cv2.imread(paths[index])
+            if frame is None:
+                print(f"Skipping unreadable image: {paths[index]}")
+                continue
+            yield index, frame
+        return
+    cap = _open_video(shard.source, shard.start)
+    index = shard.start
+    try:
+        while shard.stop is None or index < shard.stop:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield index, frame
+            index += 1
+    finally:
+        cap.release()
+
+
+def _init_worker(model_config: EdgeModelConfig) -> None:
+    global _text_detection
+    _text_detection = TextDetection(model_config)
+    _text_detection.initialize()
+
+
+def _replay_shard(shard_index: int, shard: ReplayShard) -> Dict:
+    """
+    Run the text detection of the worker process on every frame of a shard.
+
+    @param
+        shard_index (int): position of the shard in the plan
+        shard (ReplayShard): shard to process
+    @return
+        Dict: shard index, frame indices, latencies in milliseconds and boxes
+    """
+    frame_indices = []
+    latencies = []
+    boxes = []
+    for index, frame in read_frames(shard):
+        start_time = time.perf_counter()
+        frame_boxes = _text_detection.run(frame)
+        latencies.append((time.perf_counter() - start_time) * 1000.0)
+        frame_indices.append(index)
+        boxes.append(np.asarray(frame_boxes, dtype=np.int32).reshape(-1, 4, 2))
+    return {
+        "shard_index": shard_index,
+        "frame_indices": frame_indices,
+        "latencies": latencies,
+        "boxes": boxes,
+    }
+
+
+def _replay_shard_args(args: Tuple[int, ReplayShard]) -> Dict:
+    return _replay_shard(*args)
+
+
+def to_columns(shards: List[ReplayShard], shard_results: List[Dict]) -> Dict[str, np.ndarray]:
+    """
+    Per-frame results as columns in shard order. The boxes of all frames are stacked,
+    the boxes of frame i are boxes[box_offsets[i] : box_offsets[i + 1]].
+
+    @param
+        shards (List[ReplayShard]): planned shards
+        shard_results (List[Dict]): results of _replay_shard in any order
+    @return
+        Dict[str, np.ndarray]: source, frame_index, num_boxes, latency_ms, boxes
+            with shape (total boxes, 4, 2) and box_offsets
+    """
+    shard_results = sorted(shard_results, key=lambda result: result["shard_index"])
+    sources = []
+    for result in shard_results:
+        sources.extend([shards[result["shard_index"]].source] * len(result["frame_indices"]))
+    boxes = [frame_boxes for result in shard_results for frame_boxes in result["boxes"]]
+    num_boxes = np.array([len(frame_boxes) for frame_boxes in boxes], dtype=np.int32)
+    return {
+        "source": np.array(sources, dtype=str),
+        "frame_index": np.array(
+            [index for result in shard_results for index in result["frame_indices"]],
+            dtype=np.int64,
+        ),
+        "num_boxes": num_boxes,
+        "latency_ms": np.array(
+            [latency for result in shard_results for latency in result["latencies"]],
+            dtype=np.float32,
+        ),
+        "boxes": np.concatenate(boxes) if boxes else np.zeros((0, 4, 2), dtype=np.int32),
+        "box_offsets": np.concatenate([[0], np.cumsum(num_boxes)]).astype(np.int64),
+    }
+
+
+def write_columns(path: str, columns: Dict[str, np.ndarray]) -> None:
+    """
+    Write the columns of to_columns to a .npz file, or a .parquet file with one row
+    per frame and the boxes of a frame as a list of 8 coordinates per box.
+
+    @param
+        path (str): output path, .parquet requires pyarrow
+        columns (Dict[str, np.ndarray]): columns returned by to_columns
+    """
+    if not path.endswith(".parquet"):
+        np.savez(path, **columns)
+        return
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Writing .parquet files requires pyarrow, use a .npz output")
+    flat_boxes = pyarrow.FixedSizeListArray.from_arrays(
+        pyarrow.array(columns["boxes"].reshape(-1)), 8
+    )
+    table = pyarrow.table(
+        {
+            "source": columns["source"],
+            "frame_index": columns["frame_index"],
+            "num_boxes": columns["num_boxes"],
+            "latency_ms": columns["latency_ms"],
+            "boxes": pyarrow.ListArray.from_arrays(
+                pyarrow.array(columns["box_offsets"].astype(np.int32)), flat_boxes
+            ),
+        }
+    )
+    pyarrow.parquet.write_table(table, path)
+
+
+def _worker_config(model_config: EdgeModelConfig, workers: int) -> EdgeModelConfig:
+    """
+    Model configuration of a worker process, the CPU threads of ONNX Runtime are
+    split between the workers unless the session configuration sets them.
+    """
+    config = copy.deepcopy(model_config)
+    if workers > 1 and config.ort_session.intra_op_num_threads == 0:
+        config.ort_session.intra_op_num_threads = max(1, (os.cpu_count() or 1) // workers)
+    return config
+
+
+def replay(
+    sources: List[str],
+    model_config: EdgeModelConfig,
+    output: str,
+    workers: int = 1,
+) -> Dict[str, float]:
+    """
+    Run the text detection on every frame of the sources and write the per-frame
+    results to output.
+
+    @param
+        sources (List[str]): paths to video files or image directories
+        model_config (EdgeModelConfig): configuration of the text detection
+        output (str): path to the .npz or .parquet results file
+        workers (int): number of worker processes, 1 runs in this process
+    @return
+        Dict[str, float]: frames, seconds, frames per second and per-frame latency
+    """
+    workers = max(1, workers)
+    shards = plan_shards(sources, workers)
+    config = _worker_config(model_config, workers)
+    print(f"Replaying {len(sources)} sources in {len(shards)} shards on {workers} workers")
+    start_time = time.perf_counter()
+    if workers == 1:
+        _init_worker(config)
+        shard_results = [_replay_shard(index, shard) for index, shard in enumerate(shards)]
+    else:
+        # spawned workers do not inherit CUDA or ONNX Runtime state of this process
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(workers, initializer=_init_worker, initargs=(config,)) as pool:
+            shard_results = list(
+                pool.imap_unordered(_replay_shard_args, list(enumerate(shards)))
+            )
+    seconds = time.perf_counter() - start_time
+    columns = to_columns(shards, shard_results)
+    write_columns(output, columns)
+    frames = len(columns["frame_index"])
+    latencies = columns["latency_ms"] if frames else np.zeros(1)
+    report = {
+        "frames": frames,
+        "seconds": seconds,
+        "fps": frames / seconds if seconds > 0 else 0.0,
+        "mean_ms": float(latencies.mean()),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "boxes": int(columns["num_boxes"].sum()),
+    }
+    print(
+        f"Replayed {frames} frames in {seconds:.1f} s: {report['fps']:.1f} frames/s, "
+        f"per-frame latency mean: {report['mean_ms']:.1f} ms, p95: {report['p95_ms']:.1f} ms, "
+        f"boxes: {report['boxes']}, results written to {output}"
+    )
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    local_data = get_parent_dir_path() + "/local_data/"
+    parser = argparse.ArgumentParser(description="Replay videos and image directories")
+    parser.add_argument("sources", nargs="+", help="video files or image directories")
+    parser.add_argument("--output", default="replay_results.npz")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--backend", default=None, help="inference backend name")
+    parser.add_argument("--model", default=local_data + "ch_pp_inf_dynamic.onnx")
+    parser.add_argument("--engine", default=local_data + "ch_pp_inf_dynamic_fp16.engine")
+    args = parser.parse_args(argv)
+
+    config = EdgeModelConfig(args.model, args.engine)
+    config.backend = args.backend
+    replay(args.sources, config, args.output, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+This module is used to capture and decode frames in a separate process, so capture
+does not compete with inference and post-processing for the GIL.
+
+The frames are decoded straight into the slots of a SharedRing, once the frame
+shape is known cv2 writes into the slot memory, and only SlotRefs with the frame
+index, capture timestamp and capture duration go through the queue.
+"""
+import multiprocessing
+import queue
+import time
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+from src.common.shared_ring import SharedRing, SlotRef
+
+
+def _capture_frames(camera_path: str, ring: SharedRing, refs, stop_event) -> None:
+    """
+    Capture process: decode frames into free slots until the source ends or the
+    consumer stops it, then send None, or the exception when capturing failed.
+
+    @param
+        camera_path (str): path, URL or GStreamer pipeline of the camera
+        ring (SharedRing): ring of frame slots
+        refs (multiprocessing.Queue): SlotRefs of the captured frames
+        stop_event (multiprocessing.Event): set by the consumer to stop capturing
+    """
+    cap = cv2.VideoCapture(camera_path)
+    shape = None
+    frame_index = 0
+    end = None
+    try:
+        while not stop_event.is_set():
+            slot = ring.acquire(timeout=0.1)
+            if slot is None:
+                continue
+            frame = ring.array(slot, shape) if shape is not None else None
+            start_time = time.perf_counter_ns()
+            ret, decoded = cap.read(frame) if frame is not None else cap.read()
+            capture_ns = time.perf_counter_ns() - start_time
+            if not ret:
+                ring.free(slot)
+                break
+            if decoded is not frame:
+                # first frame or a new resolution, later frames decode in place
+                if decoded.nbytes > ring.slot_bytes:
+                    ring.free(slot)
+                    raise ValueError(
+                        f"Camera frames of shape {decoded.shape} do not fit the shared "
+                        f"frame slots of {ring.slot_bytes} bytes, set SHARED_FRAME_SHAPE "
+                        f"to at least {decoded.shape[0]},{decoded.shape[1]}"
+                    )
+                shape = decoded.shape
+                ring.array(slot, shape)[...] = decoded
+            metadata = {
+                "frame_index": frame_index,
+                "timestamp": time.monotonic(),
+                "capture_ns": capture_ns,
+            }
+            refs.put(SlotRef(slot, shape, np.dtype(np.uint8).str, metadata))
+            frame_index += 1
+    except Exception as e:
+        print(f"Capture process failed: {e}")
+        end = e
+    finally:
+        cap.release()
+        refs.put(end)
+        ring.close()
+
+
+class SharedMemoryCapture:
+    """
+    Captures frames in a child process and hands them over through shared memory.
+    """
+
+    def __init__(
+        self,
+        camera_path: str,
+        num_slots: int = 4,
+        max_shape: Tuple[int, int, int] = (1080, 1920, 3),
+    ) -> None:
+        """
+        Initialize the SharedMemoryCapture.
+
+        @param
+            camera_path (str): path, URL or GStreamer pipeline of the camera
+            num_slots (int): number of frames captured ahead of the consumer
+            max_shape (Tuple[int, int, int]): largest frame shape, the shared memory
+                is num_slots times its size
+        """
+        # spawned, the capture process does not inherit CUDA or runtime state
+        context = multiprocessing.get_context("spawn")
+        self.ring = SharedRing.for_arrays(num_slots, max_shape, np.uint8, context)
+        self._refs = context.Queue()
+        self._stop_event = context.Event()
+        self._process = context.Process(
+            target=_capture_frames,
+            args=(camera_path, self.ring, self._refs, self._stop_event),
+            name="capture",
+            daemon=True,
+        )
+        self._finished = False
+
+    def start(self) -> None:
+        """
+        Start the capture process.
+        """
+        self._process.start()
+
+    def read(
+        self, timeout: Optional[float] = None
+    ) -> Tuple[bool, Optional[np.ndarray], Optional[SlotRef]]:
+        """
+        Wait for the next frame. The frame lives in shared memory and must be given
+        back with release once it is no longer used. Raises the exception the capture
+        process failed with, e.g. for frames larger than the slots.
+
+        @param
+            timeout (float): seconds to wait, None waits for the next frame
+        @return
+            ret (bool): False at the end of the stream
+            frame (np.ndarray): frame, a view of its slot
+            ref (SlotRef): slot of the frame with its frame index, capture timestamp
+                (time.monotonic) and capture duration in nanoseconds
+        """
+        if self._finished:
+            return False, None, None
+        ref = self._refs.get(timeout=timeout)
+        if ref is None or isinstance(ref, Exception):
+            self._finished = True
+            if ref is not None:
+                raise ref
+            return False, None, None
+        return True, self.ring.get(ref), ref
+
+    def release(self, ref: SlotRef) -> None:
+        """
+        Give a frame slot back to the capture process.
+
+        @param
+            ref (SlotRef): slot returned by read
+        """
+        self.ring.release(ref)
+
+    def stop(self) -> None:
+        """
+        Stop the capture process and free the shared memory.
+        """
+        self._stop_event.set()
+        # drain the frames still queued until the process says it is done
+        while not self._finished:
+            try:
+                ok, _, ref = self.read(timeout=0.5)
+            except queue.Empty:
+                if not self._process.is_alive():
+                    break
+                continue
+            except Exception:
+                # the capture process already printed the failure
+                break
+            if ok:
+                self.release(ref)
+        self._process.join()
+        self.ring.close()
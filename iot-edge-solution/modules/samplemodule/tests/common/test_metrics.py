@@ -0,0 +1,105 @@
+import json
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+from src.common.metrics import Metrics, MetricsExporter, RollingHistogram
+
+
+class TestRollingHistogram(unittest.TestCase):
+    def test_percentiles_cover_the_window_only(self):
+        histogram = RollingHistogram(window=100)
+        for value in range(1, 101):
+            histogram.record(1000000 * 1000)
+        for value in range(1, 101):
+            histogram.record(value * 1000000)
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot["count"], 200)
+        self.assertAlmostEqual(snapshot["p50_ms"], 50.5)
+        self.assertAlmostEqual(snapshot["p99_ms"], 99.01)
+        self.assertEqual(snapshot["max_ms"], 1000.0)
+
+    def test_empty_histogram(self):
+        snapshot = RollingHistogram().snapshot()
+        self.assertEqual(snapshot["count"], 0)
+        self.assertEqual(snapshot["p95_ms"], 0.0)
+
+
+class TestMetrics(unittest.TestCase):
+    def test_timer_and_counters(self):
+        metrics = Metrics()
+        for _ in range(3):
+            with metrics.timer("inference"):
+                pass
+        metrics.increment("frames_inferred", 2)
+        metrics.increment("frames_inferred")
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot["stages"]["inference"]["count"], 3)
+        self.assertGreaterEqual(snapshot["stages"]["inference"]["p50_ms"], 0.0)
+        self.assertEqual(snapshot["counters"], {"frames_inferred": 3})
+        self.assertIn("inference: count: 3", metrics.summary())
+        self.assertIn("frames_inferred_total 3", metrics.prometheus())
+        metrics.reset()
+        self.assertEqual(metrics.snapshot()["stages"], {})
+
+    def test_records_from_many_threads(self):
+        metrics = Metrics(window=10)
+
+        def record():
+            for _ in range(1000):
+                metrics.record("capture", 1)
+                metrics.increment("frames_captured")
+
+        threads = [threading.Thread(target=record) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot["stages"]["capture"]["count"], 4000)
+        self.assertEqual(snapshot["counters"]["frames_captured"], 4000)
+
+    def test_frame_sampling(self):
+        self.assertFalse(any(Metrics().sample_frame() for _ in range(100)))
+        metrics = Metrics(log_every=10)
+        self.assertEqual(sum(metrics.sample_frame() for _ in range(100)), 10)
+
+
+class TestMetricsExporter(unittest.TestCase):
+    def test_serves_prometheus_and_json(self):
+        metrics = Metrics()
+        metrics.record("postprocess", 2000000)
+        exporter = MetricsExporter(metrics, 0, host="127.0.0.1")
+        exporter.start()
+        try:
+            url = f"http://127.0.0.1:{exporter.port}"
+            with urllib.request.urlopen(f"{url}/metrics") as response:
+                text = response.read().decode()
+            self.assertIn('stage_latency_seconds{stage="postprocess",quantile="0.5"} 0.002', text)
+            with urllib.request.urlopen(f"{url}/metrics.json") as response:
+                snapshot = json.loads(response.read())
+            self.assertEqual(snapshot["stages"]["postprocess"]["count"], 1)
+        finally:
+            exporter.stop()
+
+    def test_serves_readiness(self):
+        state = {"ready": False}
+        exporter = MetricsExporter(
+            Metrics(), 0, host="127.0.0.1", ready=lambda: state["ready"]
+        )
+        exporter.start()
+        try:
+            url = f"http://127.0.0.1:{exporter.port}/ready"
+            with self.assertRaises(urllib.error.HTTPError) as context:
+                urllib.request.urlopen(url)
+            self.assertEqual(context.exception.code, 503)
+            state["ready"] = True
+            with urllib.request.urlopen(url) as response:
+                self.assertEqual(response.status, 200)
+        finally:
+            exporter.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
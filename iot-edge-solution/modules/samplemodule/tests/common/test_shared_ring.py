@@ -0,0 +1,71 @@
+import multiprocessing
+import unittest
+
+import numpy as np
+
+from src.common.shared_ring import SharedRing, _SharedBlock
+
+
+def _double_in_place(frames, maps, refs_in, refs_out):
+    """Child process: read every frame of frames and write twice it into maps."""
+    while True:
+        ref = refs_in.get()
+        if ref is None:
+            break
+        frame = frames.get(ref)
+        out = maps.put(frame.astype(np.float32) * 2.0, metadata=ref.metadata)
+        frames.release(ref)
+        refs_out.put(out)
+    refs_out.put(None)
+    frames.close()
+    maps.close()
+
+
+class TestSharedRing(unittest.TestCase):
+    def test_put_get_and_release_slots(self):
+        with SharedRing.for_arrays(2, (4, 6, 3)) as ring:
+            first = ring.put(np.full((4, 6, 3), 7, dtype=np.uint8), {"frame_index": 0})
+            second = ring.put(np.arange(8, dtype=np.uint8).reshape(2, 4))
+            self.assertNotEqual(first.slot, second.slot)
+            self.assertIsNone(ring.put(np.zeros((1,), dtype=np.uint8), timeout=0.01))
+            self.assertTrue((ring.get(first) == 7).all())
+            self.assertEqual(ring.get(second).tolist(), [[0, 1, 2, 3], [4, 5, 6, 7]])
+            self.assertEqual(first.metadata, {"frame_index": 0})
+            ring.release(first)
+            third = ring.put(np.ones((3,), dtype=np.float32), timeout=1.0)
+            self.assertEqual(third.slot, first.slot)
+            self.assertEqual(ring.get(third).tolist(), [1.0, 1.0, 1.0])
+
+    def test_array_larger_than_a_slot_is_rejected(self):
+        with SharedRing.for_arrays(1, (4, 4)) as ring:
+            with self.assertRaises(ValueError):
+                ring.array(0, (4, 4), np.float32)
+
+    def test_arrays_cross_processes_without_copies_of_the_data(self):
+        context = multiprocessing.get_context("spawn")
+        frames = SharedRing.for_arrays(2, (32, 48, 3), np.uint8, context)
+        maps = SharedRing.for_arrays(2, (32, 48, 3), np.float32, context)
+        refs_in, refs_out = context.Queue(), context.Queue()
+        process = context.Process(
+            target=_double_in_place, args=(frames, maps, refs_in, refs_out)
+        )
+        process.start()
+        for index in range(5):
+            ref = frames.put(np.full((32, 48, 3), index, dtype=np.uint8), {"frame_index": index})
+            refs_in.put(ref)
+            out = refs_out.get(timeout=30)
+            self.assertEqual(out.metadata["frame_index"], index)
+            self.assertTrue((maps.get(out) == 2.0 * index).all())
+            maps.release(out)
+        refs_in.put(None)
+        self.assertIsNone(refs_out.get(timeout=30))
+        process.join()
+        name = frames._block.name
+        frames.close()
+        maps.close()
+        with self.assertRaises(FileNotFoundError):
+            _SharedBlock(16, name)
+
+
+if __name__ == "__main__":
+    unittest.main()
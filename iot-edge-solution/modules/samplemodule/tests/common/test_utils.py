@@ -1,7 +1,7 @@
 import unittest
 from unittest.mock import patch
 
-from src.common.utils import get_parent_dir_path, get_camera_path
+from src.common.utils import get_parent_dir_path, get_camera_path, get_shared_frame_shape
 
 
 class TestUtils(unittest.TestCase):
@@ -12,3 +12,7 @@ class TestUtils(unittest.TestCase):
     def test_get_camera_path(self):
         with patch("os.environ.get", return_value="test_dir"):
             assert get_camera_path() == "test_dir"
+
+    def test_get_shared_frame_shape(self):
+        with patch.dict("os.environ", {"SHARED_FRAME_SHAPE": "2160,3840"}):
+            assert get_shared_frame_shape() == (2160, 3840, 3)
@@ -0,0 +1,62 @@
+import unittest
+
+import cv2
+import numpy as np
+
+from src.edgeinferencing.common.box_geometry import (
+    axis_aligned_boxes,
+    box_bounds_batch,
+    box_points_batch,
+    mini_boxes_batch,
+    polygon_area_length_batch,
+    rects_to_arrays,
+)
+from src.edgeinferencing.common.postprocess_db import DBPostProcess
+
+
+class TestBoxGeometry(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.contours = [
+            (rng.rand(6, 1, 2) * 200).astype(np.int32) for _ in range(50)
+        ]
+
+    def test_box_points_batch_matches_cv2(self):
+        rects = [cv2.minAreaRect(contour) for contour in self.contours]
+        points = box_points_batch(*rects_to_arrays(rects))
+        for rect, batch_points in zip(rects, points):
+            self.assertTrue(np.array_equal(cv2.boxPoints(rect), batch_points))
+
+    def test_mini_boxes_batch_matches_get_mini_boxes(self):
+        dp_process = DBPostProcess()
+        boxes, ssides = mini_boxes_batch(self.contours)
+        for contour, box, sside in zip(self.contours, boxes, ssides):
+            expected_box, expected_sside = dp_process.get_mini_boxes(contour)
+            self.assertTrue(np.array_equal(np.array(expected_box), box))
+            self.assertEqual(expected_sside, sside)
+
+    def test_mini_boxes_batch_handles_no_contours(self):
+        boxes, ssides = mini_boxes_batch([])
+        self.assertEqual(boxes.shape, (0, 4, 2))
+        self.assertEqual(ssides.shape, (0,))
+
+    def test_polygon_area_length_batch_returns_area_and_perimeter(self):
+        square = np.array([[[0, 0], [2, 0], [2, 2], [0, 2]]])
+        area, length = polygon_area_length_batch(square)
+        self.assertAlmostEqual(area[0], 4.0)
+        self.assertAlmostEqual(length[0], 8.0)
+
+    def test_box_bounds_batch_clips_to_map(self):
+        boxes = np.array([[[-1.5, 0.5], [3.2, 0.5], [3.2, 9.0], [-1.5, 9.0]]])
+        bounds = box_bounds_batch(boxes, height=5, width=3)
+        self.assertEqual(bounds.tolist(), [[0, 2, 0, 4]])
+
+    def test_axis_aligned_boxes_detects_rectangles(self):
+        polys = np.array(
+            [
+                [[0, 0], [4, 0], [4, 2], [0, 2]],
+                [[0, 1], [2, 0], [4, 1], [2, 2]],
+                [[0, 0], [4, 0], [4, 0], [0, 0]],
+            ]
+        )
+        self.assertEqual(axis_aligned_boxes(polys).tolist(), [True, False, False])
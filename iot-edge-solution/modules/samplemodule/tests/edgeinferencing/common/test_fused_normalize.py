@@ -0,0 +1,58 @@
+import unittest
+
+import numpy as np
+
+from src.edgeinferencing.config import EdgeInferencingPreProcessConfig
+from src.edgeinferencing.common.fused_normalize import NormalizeToCHWImage
+from src.edgeinferencing.common.preprocess_operator import (
+    NormalizeImage,
+    ToCHWImage,
+    create_operators,
+)
+
+
+class TestNormalizeToCHWImage(unittest.TestCase):
+    def test_call_matches_normalize_and_to_chw(self):
+        config = EdgeInferencingPreProcessConfig().normalize_image
+        image = np.random.randint(0, 256, (64, 96, 3), dtype=np.uint8)
+        expected = ToCHWImage()(NormalizeImage(**config)({"image": image}))["image"]
+        data = NormalizeToCHWImage(**config)({"image": image})
+        self.assertEqual(data["image"].shape, (1, 3, 64, 96))
+        self.assertEqual(data["image"].dtype, np.float32)
+        self.assertTrue(data["image"].flags["C_CONTIGUOUS"])
+        self.assertTrue(np.allclose(data["image"][0], expected, atol=1e-5))
+
+    def test_call_reuses_buffers_per_shape(self):
+        normalize = NormalizeToCHWImage(num_buffers=2)
+        image = np.zeros((8, 8, 3), dtype=np.uint8)
+        first = normalize({"image": image})["image"]
+        second = normalize({"image": image})["image"]
+        third = normalize({"image": image})["image"]
+        other_shape = normalize({"image": np.zeros((8, 16, 3), dtype=np.uint8)})["image"]
+        self.assertIsNot(first, second)
+        self.assertIs(first, third)
+        self.assertEqual(other_shape.shape, (1, 3, 8, 16))
+
+    def test_reserve_grows_the_buffer_ring(self):
+        normalize = NormalizeToCHWImage(num_buffers=1)
+        image = np.zeros((8, 8, 3), dtype=np.uint8)
+        first = normalize({"image": image})["image"]
+        normalize.reserve(3)
+        buffers = [normalize({"image": image})["image"] for _ in range(3)]
+        self.assertEqual(len({id(buffer) for buffer in buffers + [first]}), 3)
+
+    def test_create_operators_uses_fused_normalize_when_configured(self):
+        config = EdgeInferencingPreProcessConfig()
+        config.fused_normalize = {"num_buffers": 2}
+        operators = create_operators(config)
+        self.assertEqual(len(operators), 3)
+        self.assertEqual(operators[1].__class__.__name__, "NormalizeToCHWImage")
+
+    def test_call_pads_image_to_bucket_with_zeros(self):
+        op = NormalizeToCHWImage(num_buffers=1)
+        op({"image": np.full((64, 96, 3), 255, dtype=np.uint8), "bucket": (64, 128)})
+        data = op({"image": np.full((32, 64, 3), 255, dtype=np.uint8), "bucket": (64, 128)})
+        self.assertEqual(data["image"].shape, (1, 3, 64, 128))
+        self.assertTrue(np.all(data["image"][:, :, 32:, :] == 0))
+        self.assertTrue(np.all(data["image"][:, :, :, 64:] == 0))
+        self.assertTrue(np.all(data["image"][:, :, :32, :64] != 0))
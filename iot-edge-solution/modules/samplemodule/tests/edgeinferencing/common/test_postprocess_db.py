@@ -1,5 +1,6 @@
 import unittest
 
+import cv2
 import numpy as np
 
 from src.edgeinferencing.common.postprocess_db import DBPostProcess
@@ -55,3 +56,97 @@ class TestDBPostProcess(unittest.TestCase):
         self.assertEqual(len(boxes), 1)
         self.assertEqual(areas[0], 0.5)
         self.assert_(np.all(boxes[0] == expected_boxes))
+
+    def test_boxes_from_bitmap_vectorized_matches_boxes_from_bitmap(self):
+        rng = np.random.RandomState(1)
+        pred = rng.rand(128, 192).astype(np.float32) * 0.2
+        for _ in range(40):
+            center = (int(rng.randint(0, 192)), int(rng.randint(0, 128)))
+            size = (int(rng.randint(4, 60)), int(rng.randint(4, 20)))
+            angle = rng.uniform(-30, 30) if rng.rand() < 0.5 else 0
+            points = cv2.boxPoints((center, size, angle)).astype(np.int32)
+            cv2.fillPoly(pred, [points], float(rng.uniform(0.4, 1.0)))
+        bitmap = pred > 0.3
+        for score_mode in ["fast", "slow"]:
+            dp_process = DBPostProcess(score_mode=score_mode)
+            boxes, scores = dp_process.boxes_from_bitmap(pred, bitmap, 384, 256)
+            vec_boxes, vec_scores = dp_process.boxes_from_bitmap_vectorized(
+                pred, bitmap, 384, 256
+            )
+            self.assertGreater(len(boxes), 0)
+            self.assertTrue(np.array_equal(boxes, vec_boxes))
+            np.testing.assert_allclose(scores, vec_scores, rtol=1e-6)
+
+    def test_boxes_from_bitmap_vectorized_returns_empty_without_contours(self):
+        dp_process = DBPostProcess(vectorized=True)
+        pred = np.zeros((32, 32), dtype=np.float32)
+        boxes, scores = dp_process.boxes_from_bitmap_vectorized(
+            pred, pred > 0.3, 64, 64
+        )
+        self.assertEqual(len(boxes), 0)
+        self.assertEqual(scores, [])
+
+    def test_boxes_from_components_scores_each_region_once(self):
+        dp_process = DBPostProcess(score_mode="components", box_thresh=0.5)
+        pred = np.zeros((64, 64), dtype=np.float32)
+        pred[10:20, 5:40] = 0.9
+        pred[10:20, 5:10] = 0.6
+        pred[40:50, 20:30] = 0.4
+        boxes, scores = dp_process.boxes_from_components(pred, pred > 0.3, 64, 64)
+        self.assertEqual(len(boxes), 1)
+        self.assertAlmostEqual(scores[0], (30 * 0.9 + 5 * 0.6) / 35, places=6)
+
+    def test_boxes_from_components_close_to_contour_boxes(self):
+        pred = np.zeros((96, 160), dtype=np.float32)
+        pred[10:25, 10:70] = 0.9
+        pred[50:60, 90:150] = 0.8
+        bitmap = pred > 0.3
+        contour_boxes, _ = DBPostProcess().boxes_from_bitmap(pred, bitmap, 160, 96)
+        boxes, _ = DBPostProcess(score_mode="components").boxes_from_components(
+            pred, bitmap, 160, 96
+        )
+        key = lambda box: tuple(box[0])  # noqa E731
+        contour_boxes = np.array(sorted(contour_boxes.tolist(), key=key))
+        boxes = np.array(sorted(boxes.tolist(), key=key))
+        self.assertEqual(boxes.shape, contour_boxes.shape)
+        self.assertLessEqual(np.abs(boxes - contour_boxes).max(), 1)
+
+    def test_call_uses_components_score_mode(self):
+        dp_process = DBPostProcess(score_mode="components")
+        pred = np.zeros((1, 1, 32, 32), dtype=np.float32)
+        pred[0, 0, 8:16, 4:28] = 0.9
+        shape_list = [[32, 32, 1.0, 1.0]]
+        result = dp_process(pred, shape_list)
+        self.assertEqual(result[0]["points"].shape, (1, 4, 2))
+
+    def test_invalid_score_mode_raises(self):
+        with self.assertRaises(ValueError):
+            DBPostProcess(score_mode="unknown")
+
+    def test_call_skips_empty_and_low_probability_maps(self):
+        dp_process = DBPostProcess(thresh=0.3, box_thresh=0.6)
+        pred = np.zeros((3, 1, 32, 32), dtype=np.float32)
+        pred[1, 0, 8:16, 4:28] = 0.5
+        pred[2, 0, 8:16, 4:28] = 0.9
+        shape_list = [[32, 32, 1.0, 1.0]] * 3
+        result = dp_process(pred, shape_list)
+        self.assertEqual(len(result[0]["points"]), 0)
+        self.assertEqual(len(result[1]["points"]), 0)
+        self.assertEqual(len(result[2]["points"]), 1)
+        self.assertEqual(dp_process.stats.frames, 3)
+        self.assertEqual(dp_process.stats.frames_empty, 1)
+        self.assertEqual(dp_process.stats.frames_below_box_thresh, 1)
+        self.assertEqual(dp_process.stats.frames_roi, 1)
+
+    def test_find_contours_in_roi_matches_full_map(self):
+        dp_process = DBPostProcess()
+        bitmap = np.zeros((40, 60), dtype=bool)
+        bitmap[5:12, 30:50] = True
+        bitmap[20:30, 35:38] = True
+        expected, _ = cv2.findContours(
+            (bitmap * 255).astype(np.uint8), cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE
+        )
+        contours = dp_process._find_contours(bitmap)
+        self.assertEqual(len(contours), len(expected))
+        for contour, expected_contour in zip(contours, expected):
+            self.assertTrue(np.array_equal(contour, expected_contour))
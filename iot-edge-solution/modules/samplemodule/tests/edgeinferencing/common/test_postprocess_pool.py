@@ -0,0 +1,138 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+import unittest
+
+import numpy as np
+
+from src.edgeinferencing.common.postprocess_db import DBPostProcess
+from src.edgeinferencing.common.postprocess_pool import PostProcessPool
+
+OP_KWARGS = {"thresh": 0.3, "box_thresh": 0.5, "unclip_ratio": 2, "vectorized": True}
+SAMPLEMODULE_DIR = os.path.join(os.path.dirname(__file__), "../../..")
+# kills the worker with maps still queued for it, then closes the pool
+WORKER_DEATH_SCRIPT = """
+import os, signal
+import numpy as np
+from src.edgeinferencing.common.postprocess_pool import PostProcessPool
+
+if __name__ == "__main__":
+    pool = PostProcessPool({}, workers=1, max_map_shape=(1, 1, 240, 320))
+    os.kill(pool._processes[0].pid, signal.SIGKILL)
+    pool._processes[0].join(10)
+    for _ in range(3):
+        try:
+            pool.submit(np.zeros((1, 1, 960, 960), np.float32), np.array([[1, 1, 1.0, 1.0]]))
+        except RuntimeError:
+            pass
+    pool.close()
+"""
+
+
+def probability_map(regions, height=240, width=320):
+    pred = np.zeros((1, 1, height, width), dtype=np.float32)
+    for index in range(regions):
+        y = 10 + 20 * (index % 10)
+        x = 10 + 150 * (index // 10)
+        pred[0, 0, y : y + 10, x : x + 100] = 0.9  # noqa E203
+    return pred
+
+
+class TestPostProcessPool(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = PostProcessPool(OP_KWARGS, workers=2, max_map_shape=(1, 1, 240, 320))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+
+    def test_boxes_match_post_processing_in_process(self):
+        op = DBPostProcess(**OP_KWARGS)
+        shape_list = np.array([[480, 640, 0.5, 0.5]])
+        for regions in [0, 1, 12]:
+            pred = probability_map(regions)
+            expected = op(pred, shape_list)[0]["points"]
+            boxes = self.pool.submit(pred, shape_list).result(timeout=60)
+            self.assertEqual(len(boxes), 1)
+            self.assertTrue(np.array_equal(boxes[0], expected))
+
+    def test_results_of_a_stream_resolve_in_submission_order(self):
+        resolved = {"a": [], "b": []}
+        futures = []
+        shape_list = np.array([[240, 320, 1.0, 1.0]])
+        for index in range(12):
+            stream = "a" if index % 2 else "b"
+            # expensive and empty maps alternate so workers finish out of order
+            pred = probability_map(20 if index % 4 < 2 else 0)
+            future = self.pool.submit(pred, shape_list, stream)
+            future.add_done_callback(
+                lambda _, stream=stream, index=index: resolved[stream].append(index)
+            )
+            futures.append(future)
+        for future in futures:
+            future.result(timeout=60)
+        self.assertEqual(resolved["a"], [1, 3, 5, 7, 9, 11])
+        self.assertEqual(resolved["b"], [0, 2, 4, 6, 8, 10])
+
+    def test_maps_larger_than_a_slot_and_batches_are_sent_in_the_task(self):
+        pred = np.concatenate([probability_map(1, 480, 640), probability_map(3, 480, 640)])
+        shape_list = np.array([[480, 640, 1.0, 1.0]] * 2)
+        boxes = self.pool.submit(pred, shape_list).result(timeout=60)
+        self.assertEqual([len(frame_boxes) for frame_boxes in boxes], [1, 3])
+
+    def test_worker_errors_are_raised_by_the_future(self):
+        with self.assertRaises(RuntimeError):
+            self.pool.submit(probability_map(1), np.zeros((0, 4))).result(timeout=60)
+        # the worker keeps running
+        boxes = self.pool.submit(probability_map(1), np.array([[240, 320, 1.0, 1.0]]))
+        self.assertEqual(len(boxes.result(timeout=60)[0]), 1)
+
+
+class TestPostProcessPoolWorkerDeath(unittest.TestCase):
+    @unittest.skipUnless(hasattr(signal, "SIGKILL"), "needs SIGKILL")
+    def test_futures_fail_and_close_returns_when_a_worker_dies(self):
+        pool = PostProcessPool(OP_KWARGS, workers=1, max_map_shape=(1, 1, 240, 320))
+        shape_list = np.array([[240, 320, 1.0, 1.0]])
+        try:
+            pool.submit(probability_map(1), shape_list).result(timeout=60)
+            os.kill(pool._processes[0].pid, signal.SIGKILL)
+            pool._processes[0].join(10)
+            with self.assertRaises(RuntimeError):
+                pool.submit(probability_map(1), shape_list).result(timeout=10)
+            with self.assertRaises(RuntimeError):
+                pool.submit(probability_map(1), shape_list)
+        finally:
+            start_time = time.monotonic()
+            pool.close()
+        self.assertLess(time.monotonic() - start_time, 10)
+
+    @unittest.skipUnless(hasattr(signal, "SIGKILL"), "needs SIGKILL")
+    def test_process_exits_after_closing_a_pool_with_a_dead_worker(self):
+        result = subprocess.run(
+            [sys.executable, "-c", WORKER_DEATH_SCRIPT],
+            cwd=SAMPLEMODULE_DIR,
+            capture_output=True,
+            timeout=60,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr.decode())
+
+
+class TestPostProcessPoolAffinity(unittest.TestCase):
+    @unittest.skipUnless(hasattr(os, "sched_getaffinity"), "needs sched_setaffinity")
+    def test_workers_pinned_to_cpus_and_stats_added_up(self):
+        cpu = sorted(os.sched_getaffinity(0))[0]
+        pool = PostProcessPool(OP_KWARGS, workers=1, cpu_affinity=[cpu])
+        try:
+            pool.submit(probability_map(0), np.array([[240, 320, 1.0, 1.0]])).result(timeout=60)
+            pool.submit(probability_map(2), np.array([[240, 320, 1.0, 1.0]])).result(timeout=60)
+            self.assertEqual(pool.stats.frames, 2)
+            self.assertEqual(pool.stats.frames_empty, 1)
+        finally:
+            pool.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
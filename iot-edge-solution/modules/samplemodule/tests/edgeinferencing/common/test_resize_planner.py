@@ -0,0 +1,95 @@
+import unittest
+
+import numpy as np
+
+from src.edgeinferencing.config import EdgeInferencingPreProcessConfig
+from src.edgeinferencing.common.preprocess_operator import create_operators
+from src.edgeinferencing.common.resize_planner import (
+    FusedResizeForTest,
+    buckets_from_profile_config,
+    plan_resize,
+    select_bucket,
+)
+
+
+class TestPlanResize(unittest.TestCase):
+    def test_plan_resize_keeps_aspect_ratio_for_1080p(self):
+        plan = plan_resize(1080, 1920, (960, 960))
+        self.assertEqual((plan.resize_h, plan.resize_w), (544, 960))
+        self.assertAlmostEqual(plan.ratio_h, 544 / 1080)
+        self.assertAlmostEqual(plan.ratio_w, 960 / 1920)
+
+    def test_plan_resize_keeps_aspect_ratio_for_4k(self):
+        plan = plan_resize(2160, 3840, (960, 960))
+        self.assertEqual((plan.resize_h, plan.resize_w), (544, 960))
+
+    def test_plan_resize_stretches_without_aspect_ratio(self):
+        plan = plan_resize(1080, 1920, (960, 960), keep_aspect_ratio=False)
+        self.assertEqual((plan.resize_h, plan.resize_w), (960, 960))
+        self.assertTrue(
+            np.allclose(plan.shape(), [1080, 1920, 960 / 1080, 960 / 1920])
+        )
+
+    def test_plan_resize_aligns_to_stride(self):
+        plan = plan_resize(7, 9, (960, 960))
+        self.assertEqual(plan.resize_h % 32, 0)
+        self.assertEqual(plan.resize_w % 32, 0)
+
+
+class TestFusedResizeForTest(unittest.TestCase):
+    def test_call_resizes_once_and_reports_source_shape(self):
+        fused_resize = FusedResizeForTest(image_size=(960, 960))
+        data = {"image": np.zeros((1080, 1920, 3), dtype=np.uint8)}
+        fused_resize(data)
+        self.assertEqual(data["image"].shape, (544, 960, 3))
+        self.assertEqual(data["image"].dtype, np.uint8)
+        self.assertEqual(list(data["shape"][:2]), [1080, 1920])
+        self.assertEqual(len(fused_resize._plans), 1)
+
+    def test_call_reports_image_size_shape_without_source_coordinates(self):
+        fused_resize = FusedResizeForTest(
+            image_size=(960, 960), keep_aspect_ratio=False, source_coordinates=False
+        )
+        data = fused_resize({"image": np.zeros((1080, 1920, 3), dtype=np.uint8)})
+        self.assertEqual(data["image"].shape, (960, 960, 3))
+        self.assertTrue(np.allclose(data["shape"], [960, 960, 1.0, 1.0]))
+
+    def test_create_operators_uses_fused_resize_when_configured(self):
+        config = EdgeInferencingPreProcessConfig()
+        config.fused_resize = {"image_size": (960, 960)}
+        operators = create_operators(config)
+        self.assertEqual(len(operators), 4)
+        self.assertEqual(operators[0].__class__.__name__, "FusedResizeForTest")
+
+
+class TestShapeBuckets(unittest.TestCase):
+    def test_buckets_from_profile_config_uses_min_opt_max_shapes(self):
+        profile_config = [
+            {"x": [(1, 3, 960, 960), (1, 3, 1280, 1280), (1, 3, 1536, 1536)]}
+        ]
+        self.assertEqual(
+            buckets_from_profile_config(profile_config),
+            [(960, 960), (1280, 1280), (1536, 1536)],
+        )
+
+    def test_select_bucket_returns_smallest_fitting_bucket(self):
+        buckets = [(544, 960), (960, 960), (1280, 1280)]
+        self.assertEqual(select_bucket(480, 640, buckets), (544, 960))
+        self.assertEqual(select_bucket(736, 960, buckets), (960, 960))
+        self.assertIsNone(select_bucket(1600, 960, buckets))
+
+    def test_fused_resize_pads_mixed_cameras_to_one_bucket(self):
+        op = FusedResizeForTest(image_size=(960, 960), buckets=[(960, 960)])
+        for src_h, src_w in [(1080, 1920), (480, 640), (1536, 2048)]:
+            data = op({"image": np.zeros((src_h, src_w, 3), dtype=np.uint8)})
+            self.assertEqual(data["bucket"], (960, 960))
+            valid_h, valid_w = data["shape"][4:6]
+            self.assertEqual(data["image"].shape[:2], (valid_h, valid_w))
+            self.assertAlmostEqual(data["shape"][2], valid_h / src_h)
+
+    def test_fused_resize_shrinks_inputs_larger_than_every_bucket(self):
+        op = FusedResizeForTest(image_size=(1536, 1536), buckets=[(544, 960)])
+        data = op({"image": np.zeros((1080, 1920, 3), dtype=np.uint8)})
+        self.assertEqual(data["bucket"], (544, 960))
+        self.assertLessEqual(data["shape"][4], 544)
+        self.assertLessEqual(data["shape"][5], 960)
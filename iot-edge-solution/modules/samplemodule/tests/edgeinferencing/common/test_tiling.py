@@ -0,0 +1,69 @@
+import unittest
+
+import numpy as np
+
+from src.edgeinferencing.common.tiling import (
+    TileTracker,
+    merge_tile_boxes,
+    plan_tiles,
+)
+
+
+def rect(x0, y0, x1, y1):
+    return [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+
+
+class TestPlanTiles(unittest.TestCase):
+    def test_tiles_cover_frame_with_overlap(self):
+        tiles = plan_tiles(2160, 3840, tile_size=1280, overlap=128)
+        coverage = np.zeros((2160, 3840), dtype=np.int32)
+        for x, y, w, h in tiles:
+            self.assertEqual((w, h), (1280, 1280))
+            coverage[y : y + h, x : x + w] += 1  # noqa E203
+        self.assertTrue(np.all(coverage >= 1))
+        xs = sorted(set(x for x, _, _, _ in tiles))
+        self.assertTrue(all(b - a <= 1280 - 128 for a, b in zip(xs, xs[1:])))
+
+    def test_small_frame_is_one_tile(self):
+        self.assertEqual(plan_tiles(720, 1280, tile_size=1280), [(0, 0, 1280, 720)])
+
+
+class TestMergeTileBoxes(unittest.TestCase):
+    def test_merges_box_cut_by_seam_with_whole_box(self):
+        boxes = np.array([rect(100, 10, 200, 30), rect(150, 10, 200, 30)])
+        merged = merge_tile_boxes(boxes, np.array([0, 1]))
+        self.assertEqual(merged.shape, (1, 4, 2))
+        self.assertTrue(np.array_equal(merged[0], rect(100, 10, 200, 30)))
+
+    def test_keeps_boxes_of_the_same_tile_and_distinct_boxes(self):
+        boxes = np.array(
+            [rect(0, 0, 50, 20), rect(10, 0, 40, 20), rect(300, 300, 350, 320)]
+        )
+        merged = merge_tile_boxes(boxes, np.array([0, 0, 1]))
+        self.assertEqual(len(merged), 3)
+
+
+class TestTileTracker(unittest.TestCase):
+    def test_only_changed_tiles_are_dirty_and_boxes_are_in_frame_coordinates(self):
+        tracker = TileTracker(tile_size=256, overlap=32, refresh_interval=100)
+        frame = np.zeros((400, 600, 3), dtype=np.uint8)
+        dirty = tracker.dirty_tiles(frame)
+        self.assertEqual(dirty, list(range(len(tracker.tiles))))
+        for index in dirty:
+            tracker.update(index, np.zeros((0, 4, 2), dtype=np.int16))
+
+        frame[380:400, 580:600] = 255
+        dirty = tracker.dirty_tiles(frame)
+        self.assertEqual(dirty, [len(tracker.tiles) - 1])
+        tracker.update(dirty[0], np.array([rect(10, 10, 60, 30)]))
+        x, y, _, _ = tracker.tiles[dirty[0]]
+        boxes = tracker.boxes()
+        self.assertTrue(np.array_equal(boxes[0], rect(x + 10, y + 10, x + 60, y + 30)))
+        self.assertEqual(tracker.tiles_skipped, len(tracker.tiles) - 1)
+
+    def test_refresh_interval_marks_every_tile_dirty(self):
+        tracker = TileTracker(tile_size=256, overlap=32, refresh_interval=2)
+        frame = np.zeros((400, 600, 3), dtype=np.uint8)
+        for index in tracker.dirty_tiles(frame):
+            tracker.update(index, [])
+        self.assertEqual(len(tracker.dirty_tiles(frame)), len(tracker.tiles))
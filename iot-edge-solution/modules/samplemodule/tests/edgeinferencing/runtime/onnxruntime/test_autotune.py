@@ -0,0 +1,57 @@
+import unittest
+
+from src.edgeinferencing.runtime.onnxruntime.autotune import autotune, search_space
+
+
+class TestAutotune(unittest.TestCase):
+    def test_search_space_only_offers_available_providers(self):
+        space = dict(search_space(4, ["CPUExecutionProvider"]))
+        self.assertEqual(space["providers"], [["CPUExecutionProvider"]])
+        self.assertEqual(space["intra_op_num_threads"], [0, 1, 2, 4])
+
+    def test_autotune_keeps_the_fastest_value_of_every_option(self):
+        def measure(config):
+            latency = 10.0
+            if config.intra_op_num_threads == 2:
+                latency -= 3.0
+            if config.execution_mode == "parallel":
+                latency += 5.0
+            return latency
+
+        space = [
+            ("intra_op_num_threads", [0, 1, 2]),
+            ("execution_mode", ["sequential", "parallel"]),
+        ]
+        best, results = autotune(measure, space)
+        self.assertEqual(best.intra_op_num_threads, 2)
+        self.assertEqual(best.execution_mode, "sequential")
+        self.assertEqual(len(results), 4)
+
+    def test_autotune_sweeps_inter_op_threads_only_in_parallel_mode(self):
+        def measure(config):
+            measured.append(config.to_dict())
+            return 10.0 if config.execution_mode == "sequential" else 5.0
+
+        space = [("inter_op_num_threads", [0, 1, 2])]
+        measured = []
+        best, results = autotune(measure, space)
+        self.assertEqual(len(measured), 1)
+        self.assertEqual(best.inter_op_num_threads, 0)
+
+        measured = []
+        space = [("execution_mode", ["sequential", "parallel"])] + space
+        best, results = autotune(measure, space)
+        self.assertEqual(best.execution_mode, "parallel")
+        self.assertEqual(
+            [config["inter_op_num_threads"] for config in measured], [0, 0, 1, 2]
+        )
+
+    def test_autotune_skips_failing_configurations(self):
+        def measure(config):
+            if config.enable_mem_pattern is False:
+                raise RuntimeError("not supported")
+            return 1.0
+
+        best, results = autotune(measure, [("enable_mem_pattern", [True, False])])
+        self.assertTrue(best.enable_mem_pattern)
+        self.assertEqual(len(results), 1)
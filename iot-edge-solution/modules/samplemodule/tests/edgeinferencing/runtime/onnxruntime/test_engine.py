@@ -0,0 +1,77 @@
+import os
+import unittest
+
+import numpy as np
+from onnxruntime import ExecutionMode, GraphOptimizationLevel
+
+from src.edgeinferencing.config import EdgeModelConfig, OrtSessionConfig
+from src.edgeinferencing.runtime.onnxruntime.engine import (
+    Engine,
+    build_session_options,
+)
+
+MODEL_PATH = os.path.join(
+    os.path.dirname(__file__), "../../../../local_data/ch_pp_inf_dynamic.onnx"
+)
+
+
+class TestBuildSessionOptions(unittest.TestCase):
+    def test_options_follow_session_config(self):
+        session_config = OrtSessionConfig.from_dict(
+            {
+                "intra_op_num_threads": 2,
+                "inter_op_num_threads": 1,
+                "execution_mode": "parallel",
+                "graph_optimization_level": "basic",
+                "enable_cpu_mem_arena": False,
+                "enable_mem_pattern": False,
+            }
+        )
+        so = build_session_options(session_config, profiling=True)
+        self.assertEqual(so.intra_op_num_threads, 2)
+        self.assertEqual(so.inter_op_num_threads, 1)
+        self.assertEqual(so.execution_mode, ExecutionMode.ORT_PARALLEL)
+        self.assertEqual(
+            so.graph_optimization_level, GraphOptimizationLevel.ORT_ENABLE_BASIC
+        )
+        self.assertFalse(so.enable_cpu_mem_arena)
+        self.assertFalse(so.enable_mem_pattern)
+        self.assertTrue(so.enable_profiling)
+
+    def test_invalid_execution_mode_raises(self):
+        session_config = OrtSessionConfig()
+        session_config.execution_mode = "fastest"
+        with self.assertRaises(ValueError):
+            build_session_options(session_config)
+
+
+class TestOrtSessionConfig(unittest.TestCase):
+    def test_save_and_load_round_trip(self):
+        session_config = OrtSessionConfig()
+        session_config.intra_op_num_threads = 3
+        path = os.path.join(os.path.dirname(__file__), "ort_session_config.json")
+        try:
+            session_config.save(path)
+            loaded = OrtSessionConfig.load(path)
+        finally:
+            os.remove(path)
+        self.assertEqual(loaded.to_dict(), session_config.to_dict())
+
+    def test_from_dict_rejects_unknown_options(self):
+        with self.assertRaises(ValueError):
+            OrtSessionConfig.from_dict({"threads": 4})
+
+
+@unittest.skipUnless(os.path.exists(MODEL_PATH), "bundled ONNX model not found")
+class TestEngine(unittest.TestCase):
+    def test_inference_uses_configured_session(self):
+        config = EdgeModelConfig(MODEL_PATH, "")
+        config.ort_session.intra_op_num_threads = 1
+        config.ort_model_cache = False
+        engine = Engine(config)
+        engine.initialize()
+        self.assertEqual(
+            engine.sess.get_session_options().intra_op_num_threads, 1
+        )
+        outputs = engine.inference_single(np.zeros((1, 3, 64, 64), dtype=np.float32))
+        self.assertEqual(outputs[0].shape, (1, 1, 64, 64))
@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.edgeinferencing.config import EdgeModelConfig, OrtSessionConfig
+from src.edgeinferencing.runtime.onnxruntime.engine import Engine
+from src.edgeinferencing.runtime.onnxruntime.model_cache import (
+    CACHE_SUFFIX,
+    OptimizedModelCache,
+    cache_key,
+)
+
+MODEL_PATH = os.path.join(
+    os.path.dirname(__file__), "../../../../local_data/ch_pp_inf_dynamic.onnx"
+)
+
+
+@unittest.skipUnless(os.path.exists(MODEL_PATH), "bundled ONNX model not found")
+class TestOptimizedModelCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.model_path = os.path.join(self.tmp_dir, "model.onnx")
+        shutil.copy(MODEL_PATH, self.model_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def cached_files(self):
+        return [name for name in os.listdir(self.tmp_dir) if name.endswith(CACHE_SUFFIX)]
+
+    def create_engine(self, session_config=None):
+        config = EdgeModelConfig(self.model_path, "")
+        if session_config is not None:
+            config.ort_session = session_config
+        engine = Engine(config)
+        engine.initialize()
+        return engine
+
+    def test_key_depends_on_graph_options_only(self):
+        session_config = OrtSessionConfig()
+        key = cache_key(self.model_path, session_config)
+        session_config.enable_profiling = True
+        session_config.intra_op_num_threads = 1
+        session_config.inter_op_num_threads = 2
+        session_config.execution_mode = "parallel"
+        session_config.enable_cpu_mem_arena = False
+        session_config.enable_mem_pattern = False
+        self.assertEqual(cache_key(self.model_path, session_config), key)
+        session_config.graph_optimization_level = "basic"
+        self.assertNotEqual(cache_key(self.model_path, session_config), key)
+
+    def test_key_depends_on_model_content(self):
+        key = cache_key(self.model_path, OrtSessionConfig())
+        with open(self.model_path, "ab") as model_file:
+            model_file.write(b"\0")
+        self.assertNotEqual(cache_key(self.model_path, OrtSessionConfig()), key)
+
+    def test_first_start_writes_and_second_start_loads_the_cache(self):
+        self.create_engine()
+        cache = OptimizedModelCache(self.model_path, OrtSessionConfig())
+        self.assertTrue(cache.exists())
+        engine = self.create_engine()
+        self.assertEqual(engine.sess._model_path, cache.path)
+
+    def test_new_key_replaces_stale_cache_file(self):
+        self.create_engine()
+        session_config = OrtSessionConfig()
+        session_config.graph_optimization_level = "extended"
+        self.create_engine(session_config)
+        cache = OptimizedModelCache(self.model_path, session_config)
+        self.assertEqual(self.cached_files(), [os.path.basename(cache.path)])
+
+    def test_corrupt_cache_is_rebuilt(self):
+        cache = OptimizedModelCache(self.model_path, OrtSessionConfig())
+        with open(cache.path, "wb") as cache_file:
+            cache_file.write(b"not a model")
+        engine = self.create_engine()
+        self.assertEqual(engine.sess._model_path, self.model_path)
+        self.assertGreater(os.path.getsize(cache.path), 1000)
@@ -0,0 +1,94 @@
+import asyncio
+import threading
+import unittest
+
+import cv2
+import numpy as np
+
+from src.edgeinferencing.config import EdgeModelConfig
+from src.edgeinferencing.edge_model import TextDetection
+from src.edgeinferencing.runtime.numpy_backend import NumpyBackend
+
+
+def model_input(seed=0, shape=(1, 3, 64, 96)):
+    return np.random.RandomState(seed).standard_normal(shape).astype(np.float32)
+
+
+class TestNumpyBackend(unittest.TestCase):
+    def setUp(self):
+        self.backend = NumpyBackend(EdgeModelConfig("model.onnx", "model.engine"))
+        self.backend.initialize()
+
+    def test_output_is_a_deterministic_probability_map(self):
+        outputs = self.backend.infer(model_input())
+        self.assertEqual(outputs[0].shape, (1, 1, 64, 96))
+        self.assertEqual(outputs[0].dtype, np.float32)
+        self.assertTrue(np.all((outputs[0] >= 0) & (outputs[0] < 1)))
+        self.assertTrue(np.array_equal(outputs[0], self.backend.infer(model_input())[0]))
+
+    def test_flat_input_gives_empty_map(self):
+        outputs = self.backend.infer(np.ones((2, 3, 32, 32), dtype=np.float32))
+        self.assertFalse(outputs[0].any())
+
+    def test_infer_batch_matches_infer(self):
+        inputs = [model_input(seed) for seed in range(3)]
+        outputs = self.backend.infer_batch(inputs)
+        self.assertEqual(len(outputs), 3)
+        for img, output in zip(inputs, outputs):
+            self.assertTrue(np.allclose(output[0], self.backend.infer(img)[0]))
+
+    def test_stats_and_warm_up(self):
+        report = self.backend.warm_up([(32, 32), (64, 64)], max_runs=5)
+        self.assertEqual(set(report), {(32, 32), (64, 64)})
+        stats = self.backend.stats()
+        self.assertEqual(stats["backend"], "numpy")
+        self.assertEqual(stats["inferences"], sum(len(runs) for runs in report.values()))
+        self.assertGreater(stats["mean_ms"], 0)
+
+    def test_submit_runs_inputs_concurrently(self):
+        self.backend.max_in_flight = 2
+        barrier = threading.Barrier(2, timeout=5)
+        run = self.backend._run
+
+        def run_together(input_data):
+            # both inputs have to be running for the barrier to open
+            barrier.wait()
+            return run(input_data)
+
+        self.backend._run = run_together
+        futures = [self.backend.submit(model_input(seed)) for seed in range(2)]
+        for seed, future in enumerate(futures):
+            self.assertTrue(
+                np.array_equal(future.result()[0], run(model_input(seed))[0])
+            )
+        self.backend.close()
+
+    def test_infer_async(self):
+        async def infer_all():
+            return await asyncio.gather(
+                *[self.backend.infer_async(model_input(seed)) for seed in range(3)]
+            )
+
+        outputs = asyncio.run(infer_all())
+        for seed, output in enumerate(outputs):
+            self.assertTrue(np.array_equal(output[0], self.backend.infer(model_input(seed))[0]))
+        self.assertEqual(self.backend.stats()["inferences"], 6)
+        self.backend.close()
+
+    def test_text_detection_finds_text(self):
+        config = EdgeModelConfig("model.onnx", "model.engine")
+        config.backend = "numpy"
+        config.boxes_in_source_frame = True
+        text_detection = TextDetection(config)
+        text_detection.initialize()
+        frame = np.full((720, 1280, 3), 255, dtype=np.uint8)
+        cv2.putText(frame, "text", (100, 400), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 0), 2)
+        boxes = text_detection.run(frame)
+        self.assertGreater(len(boxes), 0)
+        self.assertTrue(np.all((boxes[:, :, 0] >= 60) & (boxes[:, :, 0] <= 220)))
+        self.assertTrue(np.all((boxes[:, :, 1] >= 330) & (boxes[:, :, 1] <= 450)))
+        self.assertEqual(text_detection.engine.stats()["inferences"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import unittest
+from unittest.mock import patch
+
+from src.edgeinferencing.runtime import registry
+from src.edgeinferencing.runtime.backend import InferenceBackend
+from src.edgeinferencing.runtime.numpy_backend import NumpyBackend
+from src.common.utils import get_inference_backend
+
+
+class FakeBackend(InferenceBackend):
+    name = "fake"
+
+
+class FakeEntryPoint:
+    name = "entry"
+
+    def load(self):
+        return FakeBackend
+
+
+class TestRegistry(unittest.TestCase):
+    def tearDown(self):
+        registry._BACKENDS.pop("fake", None)
+        registry._BACKENDS.pop("entry", None)
+
+    def test_builtin_backends_are_available(self):
+        self.assertTrue(
+            {"numpy", "onnxruntime", "tensorrt"} <= set(registry.available_backends())
+        )
+        self.assertIs(registry.get_backend("numpy"), NumpyBackend)
+
+    def test_register_backend_by_class_and_path(self):
+        registry.register_backend("fake", FakeBackend)
+        self.assertIs(registry.get_backend("fake"), FakeBackend)
+        registry.register_backend("fake", f"{__name__}:FakeBackend")
+        self.assertIs(registry.get_backend("fake"), FakeBackend)
+
+    def test_entry_point_backends(self):
+        with patch.object(
+            registry, "_entry_points", return_value={"entry": FakeEntryPoint()}
+        ):
+            self.assertIn("entry", registry.available_backends())
+            self.assertIs(registry.get_backend("entry"), FakeBackend)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            registry.get_backend("openvino")
+
+
+class TestGetInferenceBackend(unittest.TestCase):
+    def test_inference_backend_overrides_use_tensor_rt(self):
+        with patch.dict(os.environ, {"INFERENCE_BACKEND": "numpy", "USE_TENSOR_RT": "True"}):
+            self.assertEqual(get_inference_backend(), "numpy")
+
+    def test_use_tensor_rt_fallback(self):
+        with patch.dict(os.environ, {"INFERENCE_BACKEND": "", "USE_TENSOR_RT": "True"}):
+            self.assertEqual(get_inference_backend(), "tensorrt")
+        with patch.dict(os.environ, {"INFERENCE_BACKEND": "", "USE_TENSOR_RT": "False"}):
+            self.assertEqual(get_inference_backend(), "onnxruntime")
+
+
+if __name__ == "__main__":
+    unittest.main()
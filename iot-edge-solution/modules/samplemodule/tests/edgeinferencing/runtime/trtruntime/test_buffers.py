@@ -0,0 +1,150 @@
+import unittest
+
+import numpy as np
+
+from src.edgeinferencing.runtime.trtruntime.buffers import BindingBuffers
+
+
+class FakeDeviceAllocation:
+    def __init__(self, nbytes):
+        self.data = np.zeros(nbytes, dtype=np.uint8)
+        self.freed = False
+
+    def free(self):
+        self.freed = True
+
+    def __int__(self):
+        return id(self)
+
+
+class FakeStream:
+    handle = 1
+
+    def __init__(self):
+        self.synchronized = 0
+
+    def synchronize(self):
+        self.synchronized += 1
+
+
+class FakeCuda:
+    def __init__(self):
+        self.streams = 0
+        self.allocations = []
+
+    def Stream(self):
+        self.streams += 1
+        return FakeStream()
+
+    def pagelocked_empty(self, size, dtype):
+        return np.empty(size, dtype)
+
+    def mem_alloc(self, nbytes):
+        allocation = FakeDeviceAllocation(nbytes)
+        self.allocations.append(allocation)
+        return allocation
+
+    def memcpy_htod_async(self, device, host, stream):
+        device.data[: host.nbytes] = host.view(np.uint8)
+
+    def memcpy_dtoh_async(self, host, device, stream):
+        host.view(np.uint8)[:] = device.data[: host.nbytes]
+
+
+class FakeTrt:
+    @staticmethod
+    def volume(shape):
+        return int(np.prod(shape))
+
+    @staticmethod
+    def nptype(dtype):
+        return dtype
+
+
+class FakeEngine:
+    num_bindings = 2
+
+    def __init__(self, max_shape=(1, 3, 64, 64)):
+        self.max_shape = max_shape
+
+    def binding_is_input(self, idx):
+        return idx == 0
+
+    def get_binding_dtype(self, idx):
+        return np.float32
+
+    def get_profile_shape(self, profile_idx, binding_idx):
+        return (1, 3, 32, 32), (1, 3, 48, 48), self.max_shape
+
+
+class FakeContext:
+    """Output is the first input channel, so the copies can be checked end to end."""
+
+    def __init__(self, buffers_by_pointer):
+        self.input_shape = None
+        self.shape_calls = 0
+        self.profile_calls = 0
+        self.buffers_by_pointer = buffers_by_pointer
+
+    def set_optimization_profile_async(self, profile_idx, stream_handle):
+        self.profile_calls += 1
+
+    def set_binding_shape(self, idx, shape):
+        self.shape_calls += 1
+        self.input_shape = tuple(shape)
+
+    def get_binding_shape(self, idx):
+        n, _, h, w = self.input_shape
+        return (n, 3, h, w) if idx == 0 else (n, 1, h, w)
+
+    def execute_async_v2(self, bindings, stream_handle):
+        input_mem, output_mem = [self.buffers_by_pointer()[ptr] for ptr in bindings]
+        n, _, h, w = self.input_shape
+        size = n * 3 * h * w
+        input_data = input_mem.data.view(np.float32)[:size].reshape(n, 3, h, w)
+        output_size = n * h * w
+        output_mem.data.view(np.float32)[:output_size] = input_data[:, 0].ravel()
+
+
+class TestBindingBuffers(unittest.TestCase):
+    def setUp(self):
+        self.cuda = FakeCuda()
+        self.buffers = BindingBuffers(FakeEngine(), self.cuda, FakeTrt())
+        self.context = FakeContext(
+            lambda: {int(a): a for a in self.cuda.allocations}
+        )
+
+    def test_infer_returns_outputs_for_the_actual_shape(self):
+        input_data = np.random.rand(1, 3, 32, 48).astype(np.float32)
+        outputs = self.buffers.infer(self.context, input_data)
+        self.assertEqual(len(outputs), 1)
+        self.assertTrue(np.array_equal(outputs[0], input_data[:, 0].ravel()))
+
+    def test_infer_reuses_buffers_and_stream_across_calls(self):
+        for shape in [(1, 3, 32, 32), (1, 3, 64, 64), (1, 3, 32, 32)] * 3:
+            self.buffers.infer(self.context, np.zeros(shape, dtype=np.float32))
+        self.assertEqual(self.cuda.streams, 1)
+        self.assertEqual(len(self.cuda.allocations), 2)
+        self.assertEqual(self.context.profile_calls, 1)
+
+    def test_infer_only_sets_binding_shape_when_shape_changes(self):
+        input_data = np.zeros((1, 3, 32, 32), dtype=np.float32)
+        self.buffers.infer(self.context, input_data)
+        shape_calls = self.context.shape_calls
+        for _ in range(5):
+            self.buffers.infer(self.context, input_data)
+        self.assertEqual(self.context.shape_calls, shape_calls)
+
+    def test_infer_reallocates_when_a_larger_shape_arrives(self):
+        self.buffers.infer(self.context, np.zeros((1, 3, 32, 32), dtype=np.float32))
+        first_allocations = list(self.cuda.allocations)
+        input_data = np.random.rand(2, 3, 64, 64).astype(np.float32)
+        outputs = self.buffers.infer(self.context, input_data)
+        self.assertEqual(len(self.cuda.allocations), 4)
+        self.assertTrue(all(allocation.freed for allocation in first_allocations))
+        self.assertTrue(np.array_equal(outputs[0], input_data[:, 0].ravel()))
+
+    def test_free_releases_device_buffers(self):
+        self.buffers.infer(self.context, np.zeros((1, 3, 32, 32), dtype=np.float32))
+        self.buffers.free()
+        self.assertTrue(all(allocation.freed for allocation in self.cuda.allocations))
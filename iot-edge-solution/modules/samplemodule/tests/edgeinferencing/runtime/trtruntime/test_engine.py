@@ -0,0 +1,154 @@
+import importlib
+import sys
+import tempfile
+import threading
+import types
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from src.edgeinferencing.config import EdgeModelConfig
+from tests.edgeinferencing.runtime.trtruntime.test_buffers import FakeCuda, FakeTrt
+
+
+class FakeCudaContext:
+    def __init__(self):
+        self.pushes = 0
+
+    def push(self):
+        self.pushes += 1
+
+    def pop(self):
+        pass
+
+
+class FakeMultiProfileEngine:
+    """One input and one output binding per optimization profile."""
+
+    def __init__(self, profiles):
+        self.num_optimization_profiles = profiles
+        self.num_bindings = 2 * profiles
+        self.contexts = []
+
+    def binding_is_input(self, idx):
+        return idx % 2 == 0
+
+    def get_binding_dtype(self, idx):
+        return np.float32
+
+    def get_profile_shape(self, profile_idx, binding_idx):
+        return (1, 3, 32, 32), (1, 3, 32, 32), (1, 3, 64, 64)
+
+    def create_execution_context(self):
+        context = FakeContext(self)
+        self.contexts.append(context)
+        return context
+
+
+class FakeContext:
+    """Output is the first input channel, both contexts have to run at once."""
+
+    barrier = None
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.profiles = []
+        self.input_shape = None
+
+    def set_optimization_profile_async(self, profile_idx, stream_handle):
+        self.profiles.append(profile_idx)
+
+    def set_binding_shape(self, idx, shape):
+        self.input_shape = tuple(shape)
+
+    def get_binding_shape(self, idx):
+        n, _, h, w = self.input_shape
+        return (n, 3, h, w) if idx % 2 == 0 else (n, 1, h, w)
+
+    def execute_async_v2(self, bindings, stream_handle):
+        if FakeContext.barrier is not None:
+            FakeContext.barrier.wait()
+        allocations = {int(a): a for a in self.engine.cuda.allocations}
+        active = [idx for idx, ptr in enumerate(bindings) if ptr]
+        assert active == [2 * self.profiles[-1], 2 * self.profiles[-1] + 1]
+        input_mem, output_mem = [allocations[bindings[idx]] for idx in active]
+        n, _, h, w = self.input_shape
+        input_data = input_mem.data.view(np.float32)[: n * 3 * h * w].reshape(n, 3, h, w)
+        output_mem.data.view(np.float32)[: n * h * w] = input_data[:, 0].ravel()
+
+
+def fake_trt_module():
+    trt = types.ModuleType("tensorrt")
+    trt.__version__ = "8.5.2"
+    trt.Logger = lambda: None
+    trt.NetworkDefinitionCreationFlag = types.SimpleNamespace(EXPLICIT_BATCH=0)
+    trt.volume = FakeTrt.volume
+    trt.nptype = FakeTrt.nptype
+    return trt
+
+
+class TestEngine(unittest.TestCase):
+    def setUp(self):
+        self.cuda = FakeCuda()
+        driver = types.ModuleType("pycuda.driver")
+        for name in ["Stream", "pagelocked_empty", "mem_alloc", "memcpy_htod_async", "memcpy_dtoh_async"]:
+            setattr(driver, name, getattr(self.cuda, name))
+        pycuda = types.ModuleType("pycuda")
+        pycuda.driver = driver
+        modules = {"tensorrt": fake_trt_module(), "pycuda": pycuda, "pycuda.driver": driver}
+        self.modules = patch.dict(sys.modules, modules)
+        self.modules.start()
+        sys.modules.pop("src.edgeinferencing.runtime.trtruntime.engine", None)
+        self.engine_module = importlib.import_module(
+            "src.edgeinferencing.runtime.trtruntime.engine"
+        )
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        FakeContext.barrier = None
+        sys.modules.pop("src.edgeinferencing.runtime.trtruntime.engine", None)
+        self.modules.stop()
+        self.tmp_dir.cleanup()
+
+    def create_engine(self, max_in_flight):
+        config = EdgeModelConfig("model.onnx", f"{self.tmp_dir.name}/model.engine")
+        config.max_in_flight = max_in_flight
+        config.profile_config = [{"x": [(1, 3, 32, 32), (1, 3, 32, 32), (1, 3, 64, 64)]}]
+        engine = self.engine_module.Engine(config)
+        engine.ctx = FakeCudaContext()
+        trt_engine = FakeMultiProfileEngine(max_in_flight)
+        trt_engine.cuda = self.cuda
+        metadata = {"model_sha256": "0"}
+        engine._plan_cache.store(metadata, b"plan")
+        with patch.object(engine, "_plan_metadata", return_value=metadata), patch.object(
+            engine, "_load_plan", return_value=trt_engine
+        ):
+            engine.get_engine()
+        return engine, trt_engine
+
+    def test_inference_single_returns_outputs(self):
+        engine, trt_engine = self.create_engine(1)
+        input_data = np.random.rand(1, 3, 32, 48).astype(np.float32)
+        outputs = engine.inference_single(input_data)
+        self.assertTrue(np.array_equal(outputs[0], input_data[:, 0].ravel()))
+        self.assertEqual(trt_engine.contexts[0].profiles, [0])
+        self.assertEqual(engine.ctx.pushes, 1)
+
+    def test_submitted_inputs_run_on_separate_contexts(self):
+        engine, trt_engine = self.create_engine(2)
+        FakeContext.barrier = threading.Barrier(2, timeout=5)
+        inputs = [np.random.rand(1, 3, 32, 32).astype(np.float32) for _ in range(2)]
+        futures = [engine.submit(input_data) for input_data in inputs]
+        for input_data, future in zip(inputs, futures):
+            self.assertTrue(np.array_equal(future.result()[0], input_data[:, 0].ravel()))
+        engine.close()
+        self.assertEqual(len(trt_engine.contexts), 2)
+        # every context uses its own copy of the optimization profile
+        self.assertEqual(
+            sorted(context.profiles[0] for context in trt_engine.contexts), [0, 1]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from src.edgeinferencing.runtime.trtruntime.plan_cache import (
+    PlanCache,
+    plan_cache_key,
+    plan_metadata,
+)
+
+PROFILE_CONFIG = [
+    {"x": [(1, 3, 32, 32), (1, 3, 960, 960), (1, 3, 1280, 1280)]},
+]
+
+
+class TestPlanCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.model_path = os.path.join(self.tmp_dir, "model.onnx")
+        with open(self.model_path, "wb") as model_file:
+            model_file.write(b"model")
+        self.cache = PlanCache(self.tmp_dir, "model_fp16", max_entries=2)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def metadata(self, **overrides):
+        values = dict(
+            profile_config=PROFILE_CONFIG,
+            precision="fp16",
+            tensorrt_version="8.5.2",
+            gpu_name="Orin",
+            compute_capability="8.7",
+        )
+        values.update(overrides)
+        return plan_metadata(self.model_path, **values)
+
+    def test_key_changes_with_every_key_field(self):
+        key = plan_cache_key(self.metadata())
+        self.assertEqual(key, plan_cache_key(self.metadata()))
+        for overrides in [
+            {"precision": "fp32"},
+            {"tensorrt_version": "8.6.1"},
+            {"gpu_name": "Xavier"},
+            {"compute_capability": "7.2"},
+            {"builder": {"max_workspace_size": 1}},
+            {"profile_config": [{"x": [(1, 3, 32, 32), (1, 3, 640, 640), (1, 3, 1280, 1280)]}]},
+        ]:
+            self.assertNotEqual(key, plan_cache_key(self.metadata(**overrides)), overrides)
+        with open(self.model_path, "wb") as model_file:
+            model_file.write(b"retrained model")
+        self.assertNotEqual(key, plan_cache_key(self.metadata()))
+
+    def test_key_ignores_informational_fields(self):
+        metadata = self.metadata()
+        self.assertEqual(
+            plan_cache_key(metadata), plan_cache_key(dict(metadata, last_used=1.0))
+        )
+
+    def test_store_and_lookup(self):
+        metadata = self.metadata()
+        self.assertIsNone(self.cache.lookup(metadata))
+        plan_path = self.cache.store(metadata, b"plan")
+        self.assertEqual(self.cache.lookup(metadata), plan_path)
+        with open(plan_path, "rb") as plan_file:
+            self.assertEqual(plan_file.read(), b"plan")
+        self.assertIsNone(self.cache.lookup(self.metadata(precision="fp32")))
+        self.assertFalse([name for name in os.listdir(self.tmp_dir) if name.endswith(".tmp")])
+
+    def test_truncated_plan_is_ignored(self):
+        metadata = self.metadata()
+        plan_path = self.cache.store(metadata, b"plan")
+        with open(plan_path, "wb") as plan_file:
+            plan_file.write(b"pl")
+        self.assertIsNone(self.cache.lookup(metadata))
+
+    def test_corrupted_plan_of_the_same_size_is_ignored(self):
+        metadata = self.metadata()
+        plan_path = self.cache.store(metadata, b"plan")
+        with open(plan_path, "wb") as plan_file:
+            plan_file.write(b"plax")
+        self.assertIsNone(self.cache.lookup(metadata))
+
+    def test_invalidate(self):
+        metadata = self.metadata()
+        self.cache.store(metadata, b"plan")
+        self.cache.invalidate(plan_cache_key(metadata))
+        self.assertIsNone(self.cache.lookup(metadata))
+        self.assertEqual(os.listdir(self.tmp_dir), ["model.onnx"])
+
+    def test_least_recently_used_plan_is_evicted(self):
+        first, second, third = [
+            self.metadata(tensorrt_version=version) for version in ["8.4", "8.5", "8.6"]
+        ]
+        self.cache.store(first, b"first")
+        time.sleep(0.01)
+        self.cache.store(second, b"second")
+        time.sleep(0.01)
+        self.assertIsNotNone(self.cache.lookup(first))
+        time.sleep(0.01)
+        self.cache.store(third, b"third")
+        self.assertIsNotNone(self.cache.lookup(first))
+        self.assertIsNone(self.cache.lookup(second))
+        self.assertIsNotNone(self.cache.lookup(third))
+        self.assertEqual(len(self.cache.entries()), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
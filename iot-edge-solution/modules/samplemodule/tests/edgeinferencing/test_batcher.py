@@ -0,0 +1,45 @@
+import unittest
+
+import numpy as np
+
+from src.edgeinferencing.batcher import DynamicBatcher
+
+
+class FakeTextDetection:
+    def __init__(self):
+        self.batch_sizes = []
+
+    def run_batch(self, images):
+        self.batch_sizes.append(len(images))
+        return [[int(image[0, 0, 0])] for image in images]
+
+
+class FailingTextDetection:
+    def run_batch(self, images):
+        raise RuntimeError("engine failure")
+
+
+class TestDynamicBatcher(unittest.TestCase):
+    def test_submit_groups_frames_and_returns_results_per_frame(self):
+        text_detection = FakeTextDetection()
+        batcher = DynamicBatcher(text_detection, max_batch_size=3, max_wait_ms=1000)
+        frames = [np.full((2, 2, 3), i, dtype=np.uint8) for i in range(7)]
+        futures = [batcher.submit(frame) for frame in frames]
+        batcher.start()
+        results = [future.result(timeout=5) for future in futures]
+        batcher.stop()
+        self.assertEqual(results, [[i] for i in range(7)])
+        self.assertEqual(text_detection.batch_sizes, [3, 3, 1])
+        self.assertAlmostEqual(batcher.average_batch_size, 7 / 3)
+
+    def test_submit_propagates_engine_errors(self):
+        batcher = DynamicBatcher(FailingTextDetection(), max_wait_ms=0)
+        batcher.start()
+        future = batcher.submit(np.zeros((2, 2, 3), dtype=np.uint8))
+        with self.assertRaises(RuntimeError):
+            future.result(timeout=5)
+        batcher.stop()
+
+    def test_invalid_batch_size_raises(self):
+        with self.assertRaises(ValueError):
+            DynamicBatcher(FakeTextDetection(), max_batch_size=0)
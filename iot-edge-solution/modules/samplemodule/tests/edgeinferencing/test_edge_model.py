@@ -0,0 +1,255 @@
+import unittest
+from unittest.mock import patch
+
+import asyncio
+
+import cv2
+import numpy as np
+
+from src.common.metrics import METRICS
+from src.edgeinferencing.config import EdgeModelConfig
+from src.edgeinferencing.edge_model import TextDetection
+
+
+class FakeEngine:
+    def __init__(self, config):
+        self.input_shapes = []
+
+    def infer(self, input_data):
+        self.input_shapes.append(input_data.shape)
+        n, _, h, w = input_data.shape
+        output = np.zeros((n, 1, h, w), dtype=np.float32)
+        output[:, :, 100:200, 100:400] = 0.9
+        return [output]
+
+
+class TestTextDetection(unittest.TestCase):
+    def setUp(self):
+        with patch("src.edgeinferencing.edge_model.Engine", FakeEngine):
+            self.text_detection = TextDetection(EdgeModelConfig("model.onnx", "model.engine"))
+
+    def test_run_batch_stacks_frames_into_one_engine_call(self):
+        frames = [np.zeros((480, 640, 3), dtype=np.uint8) for _ in range(3)]
+        results = self.text_detection.run_batch(frames)
+        self.assertEqual(len(results), 3)
+        self.assertEqual(len(self.text_detection.engine.input_shapes), 1)
+        self.assertEqual(self.text_detection.engine.input_shapes[0][0], 3)
+        single = self.text_detection.run(frames[0])
+        for boxes in results:
+            self.assertTrue(np.array_equal(boxes, single))
+
+    def test_run_batch_splits_batches_larger_than_max_batch_size(self):
+        self.text_detection.model_config.max_batch_size = 2
+        frames = [np.zeros((480, 640, 3), dtype=np.uint8) for _ in range(5)]
+        results = self.text_detection.run_batch(frames)
+        self.assertEqual(len(results), 5)
+        batch_sizes = [shape[0] for shape in self.text_detection.engine.input_shapes]
+        self.assertEqual(batch_sizes, [2, 2, 1])
+
+    def test_run_batch_respects_the_batch_dimension_of_the_profiles(self):
+        config = self.text_detection.model_config
+        self.assertEqual(config.max_profile_batch_size(), 1)
+        # the TensorRT engine accepts batches up to the profile batch dimension
+        self.text_detection.engine.max_batch_size = config.max_profile_batch_size()
+        self.assertEqual(self.text_detection.batch_size(), 1)
+        frames = [np.zeros((480, 640, 3), dtype=np.uint8) for _ in range(3)]
+        self.assertEqual(len(self.text_detection.run_batch(frames)), 3)
+        batch_sizes = [shape[0] for shape in self.text_detection.engine.input_shapes]
+        self.assertEqual(batch_sizes, [1, 1, 1])
+
+        config.profile_config = [
+            {"x": [(1, 3, 960, 960), (2, 3, 1280, 1280), (8, 3, 1536, 1536)]}
+        ]
+        self.text_detection.engine.max_batch_size = config.max_profile_batch_size()
+        self.assertEqual(self.text_detection.batch_size(), config.max_batch_size)
+
+    def test_run_keeps_model_input_and_boxes_in_image_size_by_default(self):
+        frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        boxes = self.text_detection.run(frame)
+        self.assertEqual(self.text_detection.engine.input_shapes[0], (1, 3, 960, 960))
+        self.assertEqual(len(boxes), 1)
+        # the map is 960x960 like the model input, so the unclipped box stays near it
+        self.assertLess(boxes[0][:, 0].max(), 500)
+        self.assertLess(boxes[0][:, 1].max(), 300)
+
+    def test_default_input_shapes_are_inside_the_profile_range(self):
+        config = self.text_detection.model_config
+        min_shape, _, max_shape = config.profile_config[0]["x"]
+        for src_h, src_w in [(480, 640), (720, 1280), (1080, 1920), (2160, 3840)]:
+            img, _ = self.text_detection.preprocess(np.zeros((src_h, src_w, 3), dtype=np.uint8))
+            for dim in range(4):
+                self.assertGreaterEqual(img.shape[dim], min_shape[dim])
+                self.assertLessEqual(img.shape[dim], max_shape[dim])
+
+    def test_run_maps_boxes_back_to_source_resolution(self):
+        config = EdgeModelConfig("model.onnx", "model.engine")
+        config.keep_aspect_ratio = True
+        config.boxes_in_source_frame = True
+        with patch("src.edgeinferencing.edge_model.Engine", FakeEngine):
+            self.text_detection = TextDetection(config)
+        frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        boxes = self.text_detection.run(frame)
+        self.assertEqual(self.text_detection.engine.input_shapes[0], (1, 3, 544, 960))
+        self.assertEqual(len(boxes), 1)
+        self.assertGreater(boxes[0][:, 0].max(), 400 * 2)
+        self.assertLessEqual(boxes[0][:, 0].max(), 1920)
+        self.assertLessEqual(boxes[0][:, 1].max(), 1080)
+
+    def test_run_tiled_infers_only_changed_tiles_in_batches(self):
+        config = EdgeModelConfig("model.onnx", "model.engine")
+        config.tiled = True
+        config.max_batch_size = 8
+        with patch("src.edgeinferencing.edge_model.Engine", FakeEngine):
+            text_detection = TextDetection(config)
+        frame = np.zeros((2160, 3840, 3), dtype=np.uint8)
+        boxes = text_detection.run(frame)
+        num_tiles = len(text_detection.tile_tracker.tiles)
+        self.assertEqual(
+            text_detection.engine.input_shapes, [(num_tiles, 3, 1280, 1280)]
+        )
+        self.assertEqual(len(boxes), num_tiles)
+
+        frame[2000:2100, 3700:3800] = 255
+        text_detection.run(frame)
+        self.assertEqual(text_detection.engine.input_shapes[1], (1, 3, 1280, 1280))
+
+    def test_run_tiled_pads_tiles_into_the_profile_and_honors_the_box_space(self):
+        config = EdgeModelConfig("model.onnx", "model.engine")
+        config.tiled = True
+        self.assertTrue(config.profile_accepts(config.tile_size, config.tile_size))
+        self.assertFalse(config.profile_accepts(704, 1280))
+        with patch("src.edgeinferencing.edge_model.Engine", FakeEngine):
+            text_detection = TextDetection(config)
+        frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+        boxes = text_detection.run(frame)
+        self.assertEqual(text_detection.engine.input_shapes, [(1, 3, 1280, 1280)])
+
+        config.boxes_in_source_frame = True
+        with patch("src.edgeinferencing.edge_model.Engine", FakeEngine):
+            text_detection = TextDetection(config)
+        source_boxes = text_detection.run(frame)
+        scale = np.array([960 / 1280, 960 / 720])
+        self.assertTrue(np.allclose(boxes, source_boxes * scale, atol=1))
+
+    def test_shape_bucketing_keeps_one_input_shape_and_correct_boxes(self):
+        config = EdgeModelConfig("model.onnx", "model.engine")
+        config.keep_aspect_ratio = True
+        with patch("src.edgeinferencing.edge_model.Engine", FakeEngine):
+            reference = TextDetection(config)
+        config.shape_bucketing = True
+        config.shape_buckets = [(960, 960)]
+        with patch("src.edgeinferencing.edge_model.Engine", FakeEngine):
+            text_detection = TextDetection(config)
+        frames = [
+            np.zeros((1080, 1920, 3), dtype=np.uint8),
+            np.zeros((480, 640, 3), dtype=np.uint8),
+        ]
+        bucketed = [text_detection.run(frame) for frame in frames]
+        self.assertEqual(set(text_detection.engine.input_shapes), {(1, 3, 960, 960)})
+        for frame, boxes in zip(frames, bucketed):
+            expected = reference.run(frame)
+            self.assertTrue(np.array_equal(boxes, expected))
+
+    def test_warm_up_covers_the_runtime_shapes_and_marks_ready(self):
+        self.assertFalse(self.text_detection.ready)
+        self.text_detection.warm_up(max_runs=3, tolerance=10.0, batch_size=3)
+        self.assertTrue(self.text_detection.ready)
+        self.assertEqual(
+            set(self.text_detection.engine.input_shapes),
+            {(1, 3, 960, 960), (3, 3, 960, 960)},
+        )
+        self.assertEqual(METRICS.snapshot()["stages"], {})
+
+        self.text_detection.run(np.zeros((1080, 1920, 3), dtype=np.uint8))
+        self.text_detection.run_batch([np.zeros((1080, 1920, 3), dtype=np.uint8)] * 3)
+        self.assertEqual(
+            set(self.text_detection.engine.input_shapes),
+            {(1, 3, 960, 960), (3, 3, 960, 960)},
+        )
+
+    def test_warm_up_shapes_follow_the_resize_plan_and_buckets(self):
+        config = EdgeModelConfig("model.onnx", "model.engine")
+        config.keep_aspect_ratio = True
+        config.warm_up_frame_sizes = [(1080, 1920), (480, 640)]
+        with patch("src.edgeinferencing.edge_model.Engine", FakeEngine):
+            text_detection = TextDetection(config)
+        self.assertEqual(text_detection.warm_up_shapes(), [(1, 544, 960), (1, 704, 960)])
+        self.assertEqual(
+            text_detection.warm_up_shapes(batch_size=8),
+            [(1, 544, 960), (4, 544, 960), (1, 704, 960), (4, 704, 960)],
+        )
+
+        config.shape_bucketing = True
+        with patch("src.edgeinferencing.edge_model.Engine", FakeEngine):
+            text_detection = TextDetection(config)
+        self.assertEqual(
+            text_detection.warm_up_shapes(),
+            [(1, 960, 960), (1, 1280, 1280), (1, 1536, 1536)],
+        )
+
+    def test_warm_up_shapes_cover_the_tile_batches(self):
+        config = EdgeModelConfig("model.onnx", "model.engine")
+        config.tiled = True
+        config.warm_up_frame_sizes = [(720, 1280), (2160, 3840)]
+        with patch("src.edgeinferencing.edge_model.Engine", FakeEngine):
+            text_detection = TextDetection(config)
+        # 720p is one padded tile, 4K are 8 tiles run as two batches of 4
+        shapes = text_detection.warm_up_shapes()
+        self.assertEqual(shapes, [(1, 1280, 1280), (4, 1280, 1280)])
+
+        frame = np.zeros((2160, 3840, 3), dtype=np.uint8)
+        text_detection.run(frame)
+        frame[100:200, 100:400] = 255
+        text_detection.run(frame)
+        engine_shapes = set(text_detection.engine.input_shapes)
+        self.assertEqual(engine_shapes, {(n, 3, h, w) for n, h, w in shapes})
+
+    def test_submit_matches_run_with_frames_in_flight(self):
+        config = EdgeModelConfig("model.onnx", "model.engine")
+        config.backend = "numpy"
+        config.max_in_flight = 2
+        text_detection = TextDetection(config)
+        frames = []
+        for index in range(6):
+            frame = np.full((720, 1280, 3), 255, dtype=np.uint8)
+            cv2.putText(
+                frame, "text", (100 + 150 * index, 400), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 0), 2
+            )
+            frames.append(frame)
+        expected = [text_detection.run(frame) for frame in frames]
+        futures = [text_detection.submit(frame) for frame in frames]
+        self.assertLessEqual(len(text_detection._in_flight), config.max_in_flight)
+        for future, boxes in zip(futures, expected):
+            self.assertTrue(np.array_equal(future.result(), boxes))
+
+        async def run_all():
+            return await asyncio.gather(*[text_detection.run_async(frame) for frame in frames])
+
+        for boxes, expected_boxes in zip(asyncio.run(run_all()), expected):
+            self.assertTrue(np.array_equal(boxes, expected_boxes))
+        text_detection.engine.close()
+
+    def test_submit_post_processes_on_worker_processes(self):
+        config = EdgeModelConfig("model.onnx", "model.engine")
+        config.backend = "numpy"
+        config.post_process_workers = 2
+        text_detection = TextDetection(config)
+        text_detection.initialize()
+        frames = []
+        for index in range(4):
+            frame = np.full((720, 1280, 3), 255, dtype=np.uint8)
+            for line in range(index + 1):
+                cv2.putText(
+                    frame, "text", (100, 100 + 120 * line), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 0), 2
+                )
+            frames.append(frame)
+        try:
+            futures = [text_detection.submit(frame) for frame in frames]
+            results = [future.result(timeout=60) for future in futures]
+            self.assertEqual(text_detection.post_process_op.stats.frames, 4)
+        finally:
+            text_detection.close()
+        self.assertIsNone(text_detection.post_process_pool)
+        for frame, boxes in zip(frames, results):
+            self.assertTrue(np.array_equal(boxes, text_detection.run(frame)))
+        self.assertEqual([len(boxes) for boxes in results], [1, 2, 3, 4])
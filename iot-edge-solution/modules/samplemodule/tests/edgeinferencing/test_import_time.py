@@ -0,0 +1,67 @@
+import os
+import subprocess
+import sys
+import unittest
+
+SAMPLEMODULE_DIR = os.path.join(os.path.dirname(__file__), "../..")
+# modules that are only imported once they are needed
+DEFERRED_MODULES = ["onnxruntime", "tensorrt", "pycuda", "shapely", "pyclipper", "PIL"]
+# opt-in budget in microseconds for the modules of this repository, third party
+# modules excluded, wall-clock import times are too noisy for shared CI runners
+SRC_SELF_TIME_BUDGET_US = os.environ.get("IMPORT_TIME_BUDGET_US")
+
+
+def import_times(module):
+    """
+    Import a module in a fresh interpreter with -X importtime.
+
+    @param
+        module (str): module to import
+    @return
+        Dict[str, Tuple[int, int]]: self and cumulative time in microseconds per
+            imported module
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SAMPLEMODULE_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")  # noqa E203
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+class TestImportTime(unittest.TestCase):
+    def test_edge_model_defers_heavy_modules(self):
+        times = import_times("src.edgeinferencing.edge_model")
+        self.assertIn("src.edgeinferencing.edge_model", times)
+        for name in times:
+            self.assertNotIn(name.split(".")[0], DEFERRED_MODULES, name)
+
+    def test_runtime_package_defers_engine(self):
+        times = import_times("src.edgeinferencing.runtime")
+        self.assertNotIn("src.edgeinferencing.runtime.onnxruntime.engine", times)
+        self.assertNotIn("onnxruntime", times)
+
+    def test_main_defers_heavy_modules(self):
+        times = import_times("main")
+        for name in times:
+            self.assertNotIn(name.split(".")[0], DEFERRED_MODULES, name)
+
+    @unittest.skipUnless(SRC_SELF_TIME_BUDGET_US, "IMPORT_TIME_BUDGET_US is not set")
+    def test_src_modules_within_budget(self):
+        times = import_times("main")
+        src_self_time = sum(
+            self_us for name, (self_us, _) in times.items() if name.startswith("src.")
+        )
+        self.assertLess(src_self_time, int(SRC_SELF_TIME_BUDGET_US))
+
+
+if __name__ == "__main__":
+    unittest.main()
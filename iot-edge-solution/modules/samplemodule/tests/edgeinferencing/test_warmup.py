@@ -0,0 +1,24 @@
+import unittest
+
+from src.edgeinferencing.warmup import latencies_stable, warm_up
+
+
+class TestWarmUp(unittest.TestCase):
+    def test_latencies_stable_checks_the_last_window(self):
+        self.assertFalse(latencies_stable([50.0, 10.0], window=3))
+        self.assertFalse(latencies_stable([50.0, 20.0, 10.0, 10.0], window=3))
+        self.assertTrue(latencies_stable([50.0, 10.0, 10.5, 10.2], window=3))
+
+    def test_warm_up_runs_every_shape_until_stable(self):
+        shapes_seen = []
+
+        def infer(img):
+            shapes_seen.append(img.shape)
+
+        report = warm_up(infer, [(96, 128), (64, 64)], min_runs=3, max_runs=5)
+        self.assertEqual(set(report), {(96, 128), (64, 64)})
+        self.assertIn((1, 3, 96, 128), shapes_seen)
+        self.assertIn((1, 3, 64, 64), shapes_seen)
+        for latencies in report.values():
+            self.assertGreaterEqual(len(latencies), 3)
+            self.assertLessEqual(len(latencies), 5)
@@ -0,0 +1,75 @@
+import unittest
+
+import numpy as np
+
+from src.frameprovider.change_gate import FrameChangeGate, create_change_gate
+from src.frameprovider.config import FrameProviderConfig
+
+
+class FakeDetector:
+    def __init__(self):
+        self.calls = 0
+
+    def run(self, frame):
+        self.calls += 1
+        return [self.calls]
+
+
+class TestFrameChangeGate(unittest.TestCase):
+    def setUp(self):
+        self.frame = np.full((180, 320, 3), 100, dtype=np.uint8)
+
+    def test_static_scene_reuses_previous_boxes(self):
+        gate = FrameChangeGate(threshold=6.0, refresh_interval=100)
+        detector = FakeDetector()
+        for _ in range(10):
+            boxes = gate.run(self.frame.copy(), detector.run)
+        self.assertEqual(detector.calls, 1)
+        self.assertEqual(boxes, [1])
+        self.assertEqual(gate.frames, 10)
+        self.assertEqual(gate.frames_skipped, 9)
+
+    def test_small_local_change_triggers_inference(self):
+        gate = FrameChangeGate(threshold=6.0, refresh_interval=100)
+        detector = FakeDetector()
+        gate.run(self.frame, detector.run)
+        changed = self.frame.copy()
+        changed[20:28, 40:60] = 255
+        boxes = gate.run(changed, detector.run)
+        self.assertEqual(detector.calls, 2)
+        self.assertEqual(boxes, [2])
+
+    def test_noise_below_threshold_is_ignored(self):
+        gate = FrameChangeGate(threshold=6.0, refresh_interval=100)
+        detector = FakeDetector()
+        gate.run(self.frame, detector.run)
+        noise = np.random.RandomState(0).randint(-3, 4, self.frame.shape)
+        gate.run((self.frame + noise).astype(np.uint8), detector.run)
+        self.assertEqual(detector.calls, 1)
+
+    def test_refresh_interval_forces_inference(self):
+        gate = FrameChangeGate(refresh_interval=3)
+        detector = FakeDetector()
+        for _ in range(7):
+            gate.run(self.frame, detector.run)
+        self.assertEqual(detector.calls, 3)
+
+    def test_changes_are_measured_against_last_inferred_frame(self):
+        gate = FrameChangeGate(threshold=6.0, refresh_interval=100)
+        detector = FakeDetector()
+        gate.run(self.frame, detector.run)
+        for level in range(101, 120, 2):
+            gate.run(np.full_like(self.frame, level), detector.run)
+        self.assertGreater(detector.calls, 1)
+
+    def test_invalid_refresh_interval_raises(self):
+        with self.assertRaises(ValueError):
+            FrameChangeGate(refresh_interval=0)
+
+    def test_create_change_gate_follows_config(self):
+        config = FrameProviderConfig()
+        self.assertIsNone(create_change_gate(config))
+        config.change_gate = True
+        config.change_refresh_interval = 5
+        gate = create_change_gate(config)
+        self.assertEqual(gate.refresh_interval, 5)
@@ -0,0 +1,30 @@
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from src.frameprovider.frame_provider import VideoCapture
+from tests.frameprovider.test_pipeline import FakeCapture
+
+
+class FakeTextDetection:
+    def __init__(self):
+        self.frames = []
+
+    def run(self, frame):
+        self.frames.append(int(frame[0, 0, 0]))
+        return np.zeros((0, 4, 2))
+
+
+class TestVideoCapture(unittest.TestCase):
+    def test_serial_capture_stops_at_end_of_stream(self):
+        text_detection = FakeTextDetection()
+        cap = FakeCapture(3)
+        cap.release = lambda: None
+        with patch("cv2.VideoCapture", return_value=cap):
+            VideoCapture("video.mkv", text_detection)
+        self.assertEqual(text_detection.frames, [0, 1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import threading
+import time
+import unittest
+
+from src.frameprovider.latest_frame import CaptureStats, LatestFrameReader
+
+
+class FakeCapture:
+    def __init__(self, num_frames, release=None):
+        self.num_frames = num_frames
+        self.index = 0
+        self.release = release
+
+    def read(self):
+        if self.release is not None:
+            self.release.wait()
+        if self.index >= self.num_frames:
+            return False, None
+        self.index += 1
+        return True, self.index - 1
+
+
+class TestCaptureStats(unittest.TestCase):
+    def test_record_captured_and_processed_update_counters(self):
+        stats = CaptureStats()
+        stats.record_captured(False)
+        stats.record_captured(True)
+        latency = stats.record_processed(time.monotonic() - 0.5)
+        self.assertEqual(stats.frames_captured, 2)
+        self.assertEqual(stats.frames_dropped, 1)
+        self.assertEqual(stats.frames_processed, 1)
+        self.assertGreaterEqual(latency, 0.5)
+        self.assertEqual(stats.average_latency, latency)
+
+
+class TestLatestFrameReader(unittest.TestCase):
+    def test_read_returns_newest_frame_and_counts_dropped_frames(self):
+        release = threading.Event()
+        reader = LatestFrameReader(FakeCapture(10, release))
+        reader.start()
+        release.set()
+        reader._thread.join()
+        ret, frame, _ = reader.read()
+        self.assertTrue(ret)
+        self.assertEqual(frame, 9)
+        ret, frame, _ = reader.read()
+        self.assertFalse(ret)
+        self.assertEqual(reader.stats.frames_captured, 10)
+        self.assertEqual(reader.stats.frames_dropped, 9)
+
+    def test_read_times_out_without_new_frame(self):
+        reader = LatestFrameReader(FakeCapture(1, threading.Event()))
+        reader.start()
+        ret, frame, _ = reader.read(timeout=0.01)
+        self.assertFalse(ret)
+        self.assertIsNone(frame)
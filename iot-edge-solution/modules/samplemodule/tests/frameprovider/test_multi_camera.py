@@ -0,0 +1,114 @@
+import threading
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from src.frameprovider.config import FrameProviderConfig
+from src.frameprovider.multi_camera import (
+    CameraStream,
+    MultiCameraCapture,
+    WeightedRoundRobinScheduler,
+)
+
+
+class FakeCapture:
+    def __init__(self, camera_path):
+        self.remaining = int(camera_path)
+
+    def read(self):
+        if self.remaining == 0:
+            return False, None
+        self.remaining -= 1
+        return True, np.zeros((4, 4, 3), dtype=np.uint8)
+
+
+class FakeTextDetection:
+    def __init__(self):
+        self.run_calls = 0
+        self.batch_sizes = []
+
+    def run(self, image):
+        self.run_calls += 1
+        return []
+
+    def run_batch(self, images):
+        self.batch_sizes.append(len(images))
+        return [[] for _ in images]
+
+    def post_process_summary(self):
+        return ""
+
+
+class TestWeightedRoundRobinScheduler(unittest.TestCase):
+    def create_streams(self, weights):
+        with patch("src.frameprovider.multi_camera.cv2.VideoCapture", FakeCapture):
+            return [
+                CameraStream(f"camera{index}", "0", weight, threading.Event())
+                for index, weight in enumerate(weights)
+            ]
+
+    def test_next_is_fair_with_equal_weights(self):
+        streams = self.create_streams([1, 1, 1])
+        scheduler = WeightedRoundRobinScheduler(streams)
+        picks = [scheduler.next(streams).name for _ in range(6)]
+        self.assertEqual(picks, ["camera0", "camera1", "camera2"] * 2)
+
+    def test_next_respects_weights(self):
+        streams = self.create_streams([3, 1])
+        scheduler = WeightedRoundRobinScheduler(streams)
+        picks = [scheduler.next(streams).name for _ in range(8)]
+        self.assertEqual(picks.count("camera0"), 6)
+        self.assertEqual(picks.count("camera1"), 2)
+
+    def test_next_returns_none_without_ready_streams(self):
+        scheduler = WeightedRoundRobinScheduler([])
+        self.assertIsNone(scheduler.next([]))
+
+    def test_invalid_weight_raises(self):
+        with self.assertRaises(ValueError):
+            self.create_streams([0])
+
+
+class TestMultiCameraCapture(unittest.TestCase):
+    @patch("src.frameprovider.multi_camera.cv2.VideoCapture", FakeCapture)
+    def test_read_processes_all_cameras_with_one_text_detection(self):
+        text_detection = FakeTextDetection()
+        capture = MultiCameraCapture(["5", "3"], text_detection)
+        self.assertEqual(len(capture.streams), 2)
+        for stream in capture.streams:
+            self.assertTrue(stream.reader.finished)
+            self.assertGreaterEqual(stream.stats.frames_processed, 1)
+            self.assertEqual(
+                stream.stats.frames_processed + stream.stats.frames_dropped,
+                stream.stats.frames_captured,
+            )
+        self.assertEqual(
+            text_detection.run_calls,
+            sum(stream.stats.frames_processed for stream in capture.streams),
+        )
+
+    @patch("src.frameprovider.multi_camera.cv2.VideoCapture", FakeCapture)
+    def test_read_uses_run_batch_when_batch_size_is_larger_than_one(self):
+        config = FrameProviderConfig()
+        config.batch_size = 2
+        text_detection = FakeTextDetection()
+        MultiCameraCapture(["2", "2"], text_detection, [1, 1], config)
+        self.assertTrue(all(size <= 2 for size in text_detection.batch_sizes))
+
+    @patch("src.frameprovider.multi_camera.cv2.VideoCapture", FakeCapture)
+    def test_read_skips_unchanged_frames_with_change_gate(self):
+        config = FrameProviderConfig()
+        config.change_gate = True
+        text_detection = FakeTextDetection()
+        capture = MultiCameraCapture(["5", "3"], text_detection, None, config)
+        self.assertEqual(text_detection.run_calls, 2)
+        for stream in capture.streams:
+            self.assertEqual(
+                stream.stats.frames_processed + stream.stats.frames_dropped,
+                stream.stats.frames_captured,
+            )
+
+    def test_mismatched_weights_raise(self):
+        with self.assertRaises(ValueError):
+            MultiCameraCapture(["1", "1"], FakeTextDetection(), [1])
@@ -0,0 +1,155 @@
+import threading
+import types
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src.frameprovider.pipeline import StageQueue, FramePipeline
+
+
+class FakeCapture:
+    def __init__(self, num_frames):
+        self.frames = [np.full((4, 4, 3), i, dtype=np.uint8) for i in range(num_frames)]
+
+    def read(self):
+        if not self.frames:
+            return False, None
+        return True, self.frames.pop(0)
+
+
+class FakeTextDetection:
+    def reserve_input_buffers(self, count):
+        self.reserved = count
+
+    def preprocess(self, image):
+        return image[np.newaxis], np.array([[4, 4, 1.0, 1.0]])
+
+    def infer(self, img):
+        return img[:, :1]
+
+    def postprocess(self, results, shape_list):
+        return [int(results[0, 0, 0, 0])]
+
+
+class FakePooledTextDetection(FakeTextDetection):
+    def __init__(self):
+        self.post_process_pool = types.SimpleNamespace(workers=2)
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def postprocess_async(self, results, shape_list):
+        return self.executor.submit(self.postprocess, results.copy(), shape_list)
+
+
+class FailingTextDetection(FakeTextDetection):
+    def __init__(self, fail_at):
+        self.fail_at = fail_at
+        self.inferred = 0
+
+    def infer(self, img):
+        self.inferred += 1
+        if self.inferred == self.fail_at:
+            raise RuntimeError("engine failed")
+        return super().infer(img)
+
+
+def run_with_timeout(pipeline, timeout=10):
+    errors = []
+
+    def run():
+        try:
+            pipeline.run()
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    return thread.is_alive(), errors
+
+
+class TestStageQueue(unittest.TestCase):
+    def test_stage_queue_drop_oldest_keeps_newest_items(self):
+        stage_queue = StageQueue(2, "drop_oldest")
+        for i in range(5):
+            stage_queue.put(i)
+        self.assertEqual(stage_queue.dropped, 3)
+        self.assertEqual(stage_queue.get(), 3)
+        self.assertEqual(stage_queue.get(), 4)
+
+    def test_stage_queue_rejects_invalid_configuration(self):
+        with self.assertRaises(ValueError):
+            StageQueue(0)
+        with self.assertRaises(ValueError):
+            StageQueue(1, "drop_newest")
+
+
+class TestFramePipeline(unittest.TestCase):
+    def test_run_processes_every_frame_in_order_when_blocking(self):
+        results = []
+        pipeline = FramePipeline(
+            FakeCapture(20),
+            FakeTextDetection(),
+            queue_depth=1,
+            on_result=lambda frame_id, timestamp, boxes: results.append(
+                (frame_id, boxes[0])
+            ),
+        )
+        pipeline.run()
+        self.assertEqual(results, [(i, i) for i in range(20)])
+        self.assertEqual(pipeline.frames_captured, 20)
+        self.assertEqual(pipeline.frames_processed, 20)
+        self.assertEqual(pipeline.dropped, 0)
+
+    def test_run_emits_in_order_with_a_post_processing_pool(self):
+        results = []
+        text_detection = FakePooledTextDetection()
+        pipeline = FramePipeline(
+            FakeCapture(20),
+            text_detection,
+            on_result=lambda frame_id, timestamp, boxes: results.append(
+                (frame_id, boxes[0])
+            ),
+        )
+        pipeline.run()
+        text_detection.executor.shutdown()
+        self.assertEqual(results, [(i, i) for i in range(20)])
+        self.assertEqual(pipeline.frames_processed, 20)
+
+    def test_run_accounts_for_every_frame_when_dropping(self):
+        results = []
+        pipeline = FramePipeline(
+            FakeCapture(50),
+            FakeTextDetection(),
+            queue_depth=1,
+            backpressure="drop_oldest",
+            on_result=lambda frame_id, timestamp, boxes: results.append(frame_id),
+        )
+        pipeline.run()
+        self.assertEqual(results, sorted(results))
+        self.assertEqual(results[-1], 49)
+        self.assertEqual(pipeline.frames_processed + pipeline.dropped, 50)
+
+    def test_run_raises_instead_of_hanging_when_a_stage_fails(self):
+        for backpressure in ["block", "drop_oldest"]:
+            results = []
+            pipeline = FramePipeline(
+                FakeCapture(50),
+                FailingTextDetection(fail_at=1),
+                queue_depth=1,
+                backpressure=backpressure,
+                on_result=lambda frame_id, timestamp, boxes: results.append(frame_id),
+            )
+            hanging, errors = run_with_timeout(pipeline)
+            self.assertFalse(hanging)
+            self.assertEqual([str(e) for e in errors], ["engine failed"])
+            self.assertEqual(results, [])
+
+    def test_run_raises_when_the_last_stage_fails(self):
+        def on_result(frame_id, timestamp, boxes):
+            raise ValueError("consumer failed")
+
+        pipeline = FramePipeline(FakeCapture(50), FakeTextDetection(), 1, on_result=on_result)
+        hanging, errors = run_with_timeout(pipeline)
+        self.assertFalse(hanging)
+        self.assertIsInstance(errors[0], ValueError)
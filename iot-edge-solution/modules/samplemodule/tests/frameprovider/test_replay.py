@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+
+from src.edgeinferencing.config import EdgeModelConfig
+from src.frameprovider import replay as replay_module
+from src.frameprovider.replay import ReplayShard, plan_shards, read_frames, replay
+
+
+def numbered_frame(index, height=360, width=640):
+    frame = np.full((height, width, 3), 200, dtype=np.uint8)
+    cv2.putText(frame, f"FRAME {index}", (10, 240), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+    return frame
+
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.image_dir = os.path.join(self.tmp_dir.name, "images")
+        os.mkdir(self.image_dir)
+        for index in range(12):
+            cv2.imwrite(os.path.join(self.image_dir, f"{index:03d}.png"), numbered_frame(index))
+        with open(os.path.join(self.image_dir, "notes.txt"), "w") as notes:
+            notes.write("not an image")
+        self.video_path = os.path.join(self.tmp_dir.name, "video.avi")
+        writer = cv2.VideoWriter(
+            self.video_path, cv2.VideoWriter_fourcc(*"MJPG"), 10, (640, 360)
+        )
+        for index in range(9):
+            writer.write(numbered_frame(index))
+        writer.release()
+        self.config = EdgeModelConfig("model.onnx", "model.engine")
+        self.config.backend = "numpy"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_plan_shards_splits_sources_into_frame_ranges(self):
+        with patch.object(replay_module, "MIN_SHARD_FRAMES", 4):
+            shards = plan_shards([self.image_dir, self.video_path], workers=3)
+        ranges = [(shard.source, shard.start, shard.stop) for shard in shards]
+        self.assertEqual(
+            ranges,
+            [
+                (self.image_dir, 0, 4),
+                (self.image_dir, 4, 8),
+                (self.image_dir, 8, 12),
+                (self.video_path, 0, 4),
+                (self.video_path, 4, 9),
+            ],
+        )
+
+    def test_read_frames_reads_a_range_to_the_end_of_the_source(self):
+        indices = [index for index, _ in read_frames(ReplayShard(self.video_path, 6))]
+        self.assertEqual(indices, [6, 7, 8])
+        indices = [index for index, _ in read_frames(ReplayShard(self.video_path, 2, 4))]
+        self.assertEqual(indices, [2, 3])
+        frames = list(read_frames(ReplayShard(self.image_dir, 10, 20)))
+        self.assertEqual([index for index, _ in frames], [10, 11])
+        self.assertTrue(np.array_equal(frames[0][1], numbered_frame(10)))
+
+    def test_replay_writes_the_same_columns_with_several_workers(self):
+        outputs = []
+        for workers in [1, 2]:
+            output = os.path.join(self.tmp_dir.name, f"results_{workers}.npz")
+            with patch.object(replay_module, "MIN_SHARD_FRAMES", 4):
+                report = replay([self.image_dir, self.video_path], self.config, output, workers)
+            self.assertEqual(report["frames"], 21)
+            outputs.append(np.load(output))
+        single, sharded = outputs
+        self.assertEqual(list(single["frame_index"]), list(range(12)) + list(range(9)))
+        self.assertEqual(list(single["source"]), [self.image_dir] * 12 + [self.video_path] * 9)
+        self.assertGreater(single["num_boxes"].sum(), 0)
+        self.assertEqual(single["box_offsets"][-1], len(single["boxes"]))
+        for column in ["source", "frame_index", "num_boxes", "boxes", "box_offsets"]:
+            self.assertTrue(np.array_equal(single[column], sharded[column]), column)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+import cv2
+import numpy as np
+
+from src.frameprovider.shared_capture import SharedMemoryCapture
+
+
+class TestSharedMemoryCapture(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.video_path = os.path.join(self.tmp_dir.name, "video.avi")
+        writer = cv2.VideoWriter(self.video_path, cv2.VideoWriter_fourcc(*"MJPG"), 10, (64, 48))
+        for index in range(6):
+            writer.write(np.full((48, 64, 3), index * 40, dtype=np.uint8))
+        writer.release()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_frames_arrive_in_order_until_end_of_stream(self):
+        capture = SharedMemoryCapture(self.video_path, num_slots=2, max_shape=(48, 64, 3))
+        capture.start()
+        levels = []
+        while True:
+            ret, frame, ref = capture.read(timeout=30)
+            if not ret:
+                break
+            self.assertEqual(frame.shape, (48, 64, 3))
+            self.assertEqual(ref.metadata["frame_index"], len(levels))
+            levels.append(int(round(frame.mean() / 40)))
+            capture.release(ref)
+        capture.stop()
+        self.assertEqual(levels, [0, 1, 2, 3, 4, 5])
+
+    def test_stop_before_end_of_stream(self):
+        capture = SharedMemoryCapture(self.video_path, num_slots=2, max_shape=(48, 64, 3))
+        capture.start()
+        ret, _, ref = capture.read(timeout=30)
+        self.assertTrue(ret)
+        capture.release(ref)
+        capture.stop()
+        self.assertEqual(capture.read(), (False, None, None))
+
+    def test_frames_larger_than_a_slot_raise_in_the_consumer(self):
+        capture = SharedMemoryCapture(self.video_path, num_slots=2, max_shape=(24, 32, 3))
+        capture.start()
+        with self.assertRaisesRegex(ValueError, "SHARED_FRAME_SHAPE to at least 48,64"):
+            capture.read(timeout=30)
+        self.assertEqual(capture.read(), (False, None, None))
+        capture.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import json
+import os
+import tempfile
+import unittest
+
+from benchmarks.bench_pipeline import compare, main, measure
+from benchmarks.synthetic import make_frame, make_probability_map
+
+
+class TestSynthetic(unittest.TestCase):
+    def test_inputs_are_deterministic_and_denser_with_more_text(self):
+        self.assertTrue((make_frame(72, 128, 4, seed=1) == make_frame(72, 128, 4, seed=1)).all())
+        sparse = make_probability_map(96, 160, 2)
+        dense = make_probability_map(96, 160, 20)
+        self.assertEqual(dense.shape, (1, 1, 96, 160))
+        self.assertGreater((dense > 0.3).sum(), (sparse > 0.3).sum())
+        self.assertFalse((make_probability_map(96, 160, 0) > 0.3).any())
+
+
+class TestBenchPipeline(unittest.TestCase):
+    def test_measure_runs_at_least_iterations_and_min_duration(self):
+        calls = []
+        stats = measure(lambda: calls.append(1), iterations=3, warmup=1, min_duration=0.0)
+        self.assertEqual(stats["iterations"], 3)
+        self.assertEqual(len(calls), 4)
+        stats = measure(lambda: None, iterations=1, warmup=0, min_duration=0.01)
+        self.assertGreater(stats["iterations"], 1)
+
+    def test_compare_flags_changes_beyond_tolerance(self):
+        baseline = {
+            "a": {"median_ms": 10.0},
+            "b": {"median_ms": 10.0},
+            "c": {"median_ms": 10.0},
+            "tiny": {"median_ms": 0.01},
+        }
+        results = {
+            "a": {"median_ms": 11.0},
+            "b": {"median_ms": 13.0},
+            "c": {"median_ms": 7.0},
+            "tiny": {"median_ms": 0.05},
+            "d": {"median_ms": 1.0},
+        }
+        statuses = {row["case"]: row["status"] for row in compare(results, baseline, 0.2)}
+        self.assertEqual(
+            statuses,
+            {"a": "ok", "b": "regression", "c": "improved", "tiny": "ok", "d": "new"},
+        )
+
+    def test_main_writes_results_and_fails_on_regression(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output = os.path.join(tmp_dir, "results.json")
+            baseline = os.path.join(tmp_dir, "baseline.json")
+            args = [
+                "--backend", "numpy",
+                "--resolutions", "720p",
+                "--densities", "empty,dense",
+                "--iterations", "1",
+                "--warmup", "0",
+                "--min-duration", "0",
+                "--output", output,
+                "--baseline", baseline,
+            ]
+            self.assertEqual(main(args + ["--update-baseline"]), 0)
+            with open(output) as results_file:
+                document = json.load(results_file)
+            self.assertIn("end_to_end/720p/dense", document["results"])
+            self.assertIn("postprocess/720p/empty", document["results"])
+            self.assertEqual(document["machine"]["backend"], "numpy")
+            self.assertEqual(main(args + ["--tolerance", "100"]), 0)
+            # a baseline a hundred times faster than the current run
+            for values in document["results"].values():
+                values["median_ms"] /= 100.0
+            with open(baseline, "w") as baseline_file:
+                json.dump(document, baseline_file)
+            self.assertEqual(main(args + ["--min-delta-ms", "0"]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()